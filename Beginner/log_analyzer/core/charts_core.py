@@ -15,7 +15,8 @@ def plot_traffic_per_hour(hour_timestamp):
     """
     logger.info(f"Generating the hourly traffic plot")
     fig, ax = plt.subplots()
-    ax.plot(hour_timestamp.keys(), hour_timestamp.values(), linewidth=3)
+    hours = sorted(hour_timestamp)
+    ax.plot(hours, [hour_timestamp[hour] for hour in hours], linewidth=3)
     ax.set_title("Traffic Per Hour", fontsize=24)
     ax.set_xlabel("Hour", fontsize=14)
     ax.set_ylabel("Number of requests", fontsize=14)
@@ -0,0 +1,268 @@
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import os
+import re
+import time
+from .record_table import RecordTableWriter
+
+logger = logging.getLogger(__name__)
+
+log_pattern = re.compile(r'(?P<ip>\S+) - - \[(?P<timestamp>.*?)\] "(?P<method>\S+) (?P<url>\S+) .*" (?P<status>\d{3}) (?P<size>\d+)')
+hour_pattern = re.compile(r':(\d{2}):\d{2}:\d{2}')
+
+default_block_size = 4 * 1024 * 1024
+
+class LogRecord:
+    """ One parsed line of the access log. Slots keep it much smaller than
+    a dict, and status and size are stored as ints.
+    """
+    __slots__ = ('ip', 'timestamp', 'method', 'url', 'status', 'size')
+
+    def __init__(self, ip, timestamp, method, url, status, size):
+        self.ip = ip
+        self.timestamp = timestamp
+        self.method = method
+        self.url = url
+        self.status = status
+        self.size = size
+
+class ParseStats:
+    """ Counters of a parse run, and the request counts the stats reports
+    are built from, updated one record at a time
+    """
+    def __init__(self):
+        self.lines = 0
+        self.records = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.ips = Counter()
+        self.methods = Counter()
+        self.statuses = Counter()
+        self.urls = Counter()
+        self.hours = Counter()
+
+    def add(self, record):
+        """Counts a parsed record
+
+        Args:
+            record (LogRecord): the parsed line
+        """
+        self.records += 1
+        self.ips[record.ip] += 1
+        self.methods[record.method] += 1
+        self.statuses[record.status] += 1
+        self.urls[record.url] += 1
+        hour = hour_pattern.search(record.timestamp)
+        if hour:
+            self.hours[hour.group(1)] += 1
+
+    def merge(self, other):
+        """Adds the counters of a parse of another part of the log
+
+        Args:
+            other (ParseStats): counters of the other part
+        """
+        self.lines += other.lines
+        self.records += other.records
+        self.ips.update(other.ips)
+        self.methods.update(other.methods)
+        self.statuses.update(other.statuses)
+        self.urls.update(other.urls)
+        self.hours.update(other.hours)
+
+    def lines_per_second(self):
+        """Gets the parse throughput
+
+        Returns:
+            float: lines read per second
+        """
+        return self.lines / self.seconds if self.seconds else 0.0
+
+def iter_lines(path, block_size=default_block_size, start=0, end=None):
+    """Reads a text file in large blocks and splits them into lines
+
+    Args:
+        path (str): path of the file
+        block_size (int, optional): bytes read at a time. Defaults to
+        default_block_size.
+        start (int, optional): offset of the first byte read, the start of
+        a line. Defaults to 0.
+        end (int, optional): offset after the last byte read, the end of a
+        line. Defaults to None, the end of the file.
+
+    Yields:
+        str: every line, without its newline
+    """
+    with open(path, 'rb') as f:
+        if end is None:
+            end = os.fstat(f.fileno()).st_size
+        f.seek(start)
+        remaining = end - start
+        tail = b''
+        while remaining > 0 and (block := f.read(min(block_size, remaining))):
+            remaining -= len(block)
+            block = tail + block
+            lines_end = block.rfind(b'\n') + 1
+            tail = block[lines_end:]
+            # a block is decoded once, a character never straddles a newline
+            for line in block[:lines_end].decode('utf-8', errors='replace').split('\n')[:-1]:
+                yield line
+        if tail:
+            yield tail.decode('utf-8', errors='replace')
+
+def iter_log_records(path, stats=None, block_size=default_block_size, start=0, end=None):
+    """Parses an access log lazily, one record per matching line
+
+    Args:
+        path (str): path of the log file
+        stats (ParseStats, optional): counters updated with every line read
+        block_size (int, optional): bytes read at a time. Defaults to
+        default_block_size.
+        start (int, optional): offset of the first line parsed. Defaults to 0.
+        end (int, optional): offset after the last line parsed. Defaults
+        to None, the end of the file.
+
+    Yields:
+        LogRecord: the record of every line matching log_pattern
+    """
+    search = log_pattern.search
+    lines = 0
+    try:
+        for line in iter_lines(path, block_size, start, end):
+            lines += 1
+            log = search(line)
+            if not log:
+                continue
+            ip, timestamp, method, url, status, size = log.groups()
+            yield LogRecord(ip, timestamp, method, url, int(status), int(size))
+    finally:
+        if stats is not None:
+            stats.lines += lines
+
+def parse_log_file(log_path, table_path, block_size=default_block_size):
+    """Streams an access log into a record table file, counting the
+    requests on the way. Only the distinct strings are held in memory,
+    whatever the size of the log. The table is written under a temporary
+    name next to it and only renamed once it is complete, the temporary
+    file is removed if the parse fails.
+
+    Args:
+        log_path (str): path of the log file
+        table_path (str): path of the record table file
+        block_size (int, optional): bytes read at a time. Defaults to
+        default_block_size.
+
+    Returns:
+        ParseStats: counters of the run, no table file is kept when no line
+        matched
+    """
+    stats = ParseStats()
+    tmp_path = f"{table_path}.tmp"
+    writer = RecordTableWriter(tmp_path)
+    start = time.perf_counter()
+    try:
+        for record in iter_log_records(log_path, stats, block_size):
+            writer.append(record)
+            stats.add(record)
+    except BaseException:
+        writer.file.close()
+        os.remove(tmp_path)
+        raise
+    writer.close()
+    stats.seconds = time.perf_counter() - start
+    stats.bytes = os.path.getsize(log_path)
+    if stats.records:
+        os.replace(tmp_path, table_path)
+    else:
+        os.remove(tmp_path)
+    logger.info(f"Parsed {stats.records} of {stats.lines} lines in {stats.seconds:.2f}s, "
+                f"{stats.lines_per_second():,.0f} lines/s")
+    return stats
+
+def split_byte_ranges(path, n_ranges):
+    """Splits a file into byte ranges of about the same size, each one
+    starting at the beginning of a line and ending after a newline
+
+    Args:
+        path (str): path of the file
+        n_ranges (int): number of ranges wanted
+
+    Returns:
+        List: (start, end) offsets of the ranges, fewer than n_ranges when
+        the file has fewer lines
+    """
+    size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, 'rb') as f:
+        for i in range(1, n_ranges):
+            offset = size * i // n_ranges
+            if offset <= boundaries[-1]:
+                continue
+            # the range ends after the newline of the line holding the offset
+            f.seek(offset - 1)
+            f.readline()
+            boundary = f.tell()
+            if boundary >= size:
+                break
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+def parse_byte_range(log_path, start, end, block_size=default_block_size):
+    """Counts the requests of one byte range of an access log, the work of
+    a worker process
+
+    Args:
+        log_path (str): path of the log file
+        start (int): offset of the first line of the range
+        end (int): offset after the last line of the range
+        block_size (int, optional): bytes read at a time. Defaults to
+        default_block_size.
+
+    Returns:
+        ParseStats: counters of the range
+    """
+    stats = ParseStats()
+    for record in iter_log_records(log_path, stats, block_size, start, end):
+        stats.add(record)
+    return stats
+
+def parse_log_stats_parallel(log_path, workers=None, block_size=default_block_size):
+    """Counts the requests of an access log in parallel. The log is split
+    into one newline aligned byte range per worker process, and the
+    counters of the ranges are merged, giving the counts of a sequential
+    parse. Only the counters are sent back, so the parent does no work per
+    line and the run scales with the number of cores.
+
+    Args:
+        log_path (str): path of the log file
+        workers (int, optional): number of worker processes. Defaults to
+        None, one per cpu.
+        block_size (int, optional): bytes read at a time. Defaults to
+        default_block_size.
+
+    Returns:
+        ParseStats: merged counters of the whole log
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = split_byte_ranges(log_path, workers)
+    start = time.perf_counter()
+    stats = ParseStats()
+    if len(ranges) <= 1:
+        for range_start, range_end in ranges:
+            stats.merge(parse_byte_range(log_path, range_start, range_end, block_size))
+    else:
+        with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+            futures = [executor.submit(parse_byte_range, log_path, range_start, range_end,
+                                       block_size)
+                       for range_start, range_end in ranges]
+            # merged in file order, so ties keep the order of a sequential parse
+            for future in futures:
+                stats.merge(future.result())
+    stats.seconds = time.perf_counter() - start
+    stats.bytes = os.path.getsize(log_path)
+    logger.info(f"Parsed {stats.records} of {stats.lines} lines in {stats.seconds:.2f}s "
+                f"with {len(ranges)} processes, {stats.lines_per_second():,.0f} lines/s")
+    return stats
@@ -0,0 +1,80 @@
+from collections import Counter
+import json
+import logging
+import os
+from .log_parser import hour_pattern
+
+logger = logging.getLogger(__name__)
+
+summary_counters = ['ips', 'methods', 'statuses', 'urls', 'hours']
+
+def from_parse_stats(stats):
+    """Gets the summary of a parse run, the counters ParseStats builds
+    while the log is parsed
+
+    Args:
+        stats (ParseStats): counters of the parse run
+
+    Returns:
+        dict: number of records and the request counts of every ip, method,
+        status, url and hour
+    """
+    summary = {name: Counter(getattr(stats, name)) for name in summary_counters}
+    summary['records'] = stats.records
+    return summary
+
+def from_table(parsed_logs):
+    """Gets the summary of a parsed logs table, for the files parsed before
+    the summaries were saved. Every column is counted once over its codes.
+
+    Args:
+        parsed_logs (RecordTable): table of the parsed logs
+
+    Returns:
+        dict: number of records and the request counts of every ip, method,
+        status, url and hour
+    """
+    hours = Counter()
+    for timestamp, count in parsed_logs.counts('timestamp').items():
+        hour = hour_pattern.search(timestamp)
+        if hour:
+            hours[hour.group(1)] += count
+    return {'ips': parsed_logs.counts('ip'),
+            'methods': parsed_logs.counts('method'),
+            'statuses': parsed_logs.counts('status'),
+            'urls': parsed_logs.counts('url'),
+            'hours': hours,
+            'records': len(parsed_logs)}
+
+def save_summary(summary, path):
+    """Saves a summary as json, writing a temporary file first so that a
+    partial summary is never read
+
+    Args:
+        summary (dict): the summary
+        path (str): path of the summary file
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f)
+    os.replace(tmp_path, path)
+    logger.info(f"Summary saved to {os.path.basename(path)}")
+
+def load_summary(path):
+    """Loads a saved summary
+
+    Args:
+        path (str): path of the summary file
+
+    Returns:
+        dict: number of records and the request counts of every ip, method,
+        status, url and hour
+    """
+    with open(path, encoding='utf-8') as f:
+        saved = json.load(f)
+    summary = {name: Counter(saved[name]) for name in summary_counters}
+    # json keys are strings, the statuses are counted as ints
+    summary['statuses'] = Counter({int(status): count
+                                   for status, count in saved['statuses'].items()})
+    summary['records'] = saved['records']
+    return summary
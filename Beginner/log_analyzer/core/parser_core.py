@@ -6,23 +6,42 @@ logger = logging.getLogger(__name__)
 
 def load_and_parse_log_file():
     """Loads and parses the sample log file, and saves the parsed logs 
-    to a new json file.
+    to a new table file, or only counts the requests in parallel.
     """
     logger.info("Starting point of load and parse log file.")
     utils.clear_and_print_header("Load & Parse Log File")
-    print("\nEnsure that sample log file is placed in the data folder "
-    "with name 'sample_logs' and extension .log or .txt.")
-    utils.pause()
-    
-    logs_dict = utils.generate_parsed_logs()
-    if logs_dict:
-        parsed_json_file_name = utils.generate_parsed_logs_json(logs_dict)
-        print(f"Logs parsed succesfully, the file can be found in data/{parsed_json_file_name}")
+    print("Ensure that sample log file is placed in the data folder "
+    "with name 'sample_logs' and extension .log or .txt.\n")
+    show_load_and_parse_menu()
+    try:
+        choice = int(input("\nEnter input: "))
+    except ValueError:
+        choice = 0
+    match choice:
+        case 1:
+            parsed_file_name, stats = utils.generate_parsed_logs_table()
+        case 2:
+            parsed_file_name, stats = utils.generate_logs_summary()
+        case _:
+            print("\nInvalid choice, returning to main menu.")
+            logger.warning("Invalid choice, returning to main menu.")
+            time.sleep(2)
+            return
+    if parsed_file_name:
+        print(f"Logs parsed succesfully, the file can be found in data/{parsed_file_name}")
+        print(f"Parsed {stats.records} of {stats.lines} lines in {stats.seconds:.2f}s "
+              f"({stats.lines_per_second():,.0f} lines/s)")
         print("\nReturning to main menu.")
     else:
         print("\nNo logs data found to parse, returning to main menu.")
     time.sleep(3)
     logger.info("End of load and parse log file.")
+
+def show_load_and_parse_menu():
+    """Displays the load and parse menu
+    """
+    print("1. Parse the logs (stats, charts and CSV export)")
+    print("2. Count the requests in parallel (stats and charts only)")
     
 def show_basic_stats():
     """Starting point of show basic stats section, displays the menu 
@@ -30,8 +49,8 @@ def show_basic_stats():
     """
     logger.info("Starting point of show basic stats.")
     utils.clear_and_print_header("Show Basic Stats")
-    parsed_logs = utils.get_parsed_logs_data()
-    if parsed_logs:
+    summary = utils.get_parsed_logs_summary()
+    if summary:
         show_basic_stats_menu()
         try:
             choice = int(input("\nEnter input: "))
@@ -42,13 +61,13 @@ def show_basic_stats():
         else:
             match choice:
                 case 1:
-                    top_10_ips(parsed_logs)
+                    top_10_ips(summary)
                 case 2:
-                    count_by_http(parsed_logs)
+                    count_by_http(summary)
                 case 3:
-                    count_by_http_status(parsed_logs)
+                    count_by_http_status(summary)
                 case 4:
-                    most_requested_urls(parsed_logs)
+                    most_requested_urls(summary)
                 case 5:
                     print("\nReturning to main menu.")
                     time.sleep(2)
@@ -68,41 +87,41 @@ def show_basic_stats_menu():
     print("4. Most requested URLs")
     print("5. Return to main menu")
     
-def top_10_ips(parsed_logs):
+def top_10_ips(summary):
     """Finds the top 10 ip addresses and displays the same.
 
     Args:
-        parsed_logs (dict): dictionary of parsed logs 
+        summary (dict): request counts of the parsed logs
     """
-    stats_core.top_10_ips(parsed_logs)
+    stats_core.top_10_ips(summary)
     utils.pause()
 
 
-def count_by_http(parsed_logs):
+def count_by_http(summary):
     """Calculates the counts of each http methods and displays the same
 
     Args:
-        parsed_logs (dict): dictionary of parsed logs
+        summary (dict): request counts of the parsed logs
     """
-    stats_core.count_by_http(parsed_logs)
+    stats_core.count_by_http(summary)
     utils.pause()
 
-def count_by_http_status(parsed_logs):
+def count_by_http_status(summary):
     """Calculates the counts of each http statuses and displays the same
 
     Args:
-        parsed_logs (dict): dictionary of parsed logs
+        summary (dict): request counts of the parsed logs
     """
-    stats_core.count_by_http_status(parsed_logs)
+    stats_core.count_by_http_status(summary)
     utils.pause()
 
-def most_requested_urls(parsed_logs):
+def most_requested_urls(summary):
     """Calculates the counts ofall urls and displays the top ones
 
     Args:
-        parsed_logs (dict): dictionary of parsed logs
+        summary (dict): request counts of the parsed logs
     """
-    stats_core.most_requested_urls(parsed_logs)
+    stats_core.most_requested_urls(summary)
     utils.pause()
 
 def generate_charts():
@@ -111,8 +130,8 @@ def generate_charts():
     """
     logger.info("Starting point of generate charts.")
     utils.clear_and_print_header("Generate charts")
-    parsed_logs = utils.get_parsed_logs_data()
-    if parsed_logs:
+    summary = utils.get_parsed_logs_summary()
+    if summary:
         show_generate_charts_menu()
         try:
             choice = int(input("\nEnter input: "))
@@ -123,11 +142,11 @@ def generate_charts():
         else:
             match choice:
                 case 1:
-                    plot_traffic_per_hour(parsed_logs)
+                    plot_traffic_per_hour(summary)
                 case 2:
-                    plot_top_10_urls(parsed_logs)
+                    plot_top_10_urls(summary)
                 case 3:
-                    plot_http_status_distribution(parsed_logs)
+                    plot_http_status_distribution(summary)
                 case _:
                     print("\nInvalid choice, returning to main menu.")
                     time.sleep(2)
@@ -142,14 +161,14 @@ def show_generate_charts_menu():
     print("2. Bar chart – Top 10 URLs")
     print("3. Pie chart – HTTP status distribution")
     
-def plot_traffic_per_hour(parsed_logs):
+def plot_traffic_per_hour(summary):
     """Plots a line graph for number of requests per hour.
 
     Args:
-        parsed_logs (dict): dictionary of parsed logs 
+        summary (dict): request counts of the parsed logs
     """
     
-    hour_timestamp = stats_core.traffic_per_hour(parsed_logs)
+    hour_timestamp = stats_core.traffic_per_hour(summary)
             
     logger.info("Plotting traffic per hour")
     charts_core.plot_traffic_per_hour(hour_timestamp)
@@ -157,13 +176,13 @@ def plot_traffic_per_hour(parsed_logs):
     print("\nPlot generated and saved successfully, returning to main menu.")
     time.sleep(2)
     
-def plot_top_10_urls(parsed_logs):
+def plot_top_10_urls(summary):
     """Plots a bar chart for the top 10 requested urls 
 
     Args:
-        parsed_logs (dict): dictionary of parsed logs 
+        summary (dict): request counts of the parsed logs
     """
-    urls = stats_core.top_10_requested_urls(parsed_logs)
+    urls = stats_core.top_10_requested_urls(summary)
     
     logger.info("Plotting top 10 urls")
     charts_core.plot_top_urls(urls)
@@ -171,13 +190,13 @@ def plot_top_10_urls(parsed_logs):
     print("\nPlot generated and saved successfully, returning to main menu.")
     time.sleep(2)
 
-def plot_http_status_distribution(parsed_logs):
+def plot_http_status_distribution(summary):
     """Plots a pie chart for the HTTP status distribution
 
     Args:
-        parsed_logs (dict): dictionary of parsed logs
+        summary (dict): request counts of the parsed logs
     """
-    http_statuses = stats_core.http_status_distribution(parsed_logs)
+    http_statuses = stats_core.http_status_distribution(summary)
     
     logger.info("Plotting HTTP Status distribution")
     charts_core.plot_http_status_distribution(http_statuses)
@@ -0,0 +1,233 @@
+from array import array
+from collections import Counter
+import json
+import logging
+import os
+import struct
+import sys
+
+logger = logging.getLogger(__name__)
+
+column_types = {'ip': 'I', 'timestamp': 'I', 'method': 'I', 'url': 'I',
+                'status': 'H', 'size': 'Q'}
+string_columns = ['ip', 'timestamp', 'method', 'url']
+table_magic = b'LOGTABLE1\n'
+default_row_group_size = 1024 * 1024
+
+class StringDictionary:
+    """ Dictionary encoding of a string column: every distinct string is
+    stored once and the column keeps its integer code.
+    """
+    def __init__(self, values=()):
+        self.values = list(values)
+        self.codes = {value: code for code, value in enumerate(self.values)}
+
+    def encode(self, value):
+        """Gets the code of a string, adding it if it is new
+
+        Args:
+            value (str): the string
+
+        Returns:
+            int: code of the string
+        """
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+class RecordTable:
+    """ Append-only table of the parsed log lines, one typed array per
+    column, with the ip, timestamp, method and url strings dictionary
+    encoded. Every line is kept, same-second requests included.
+    """
+    def __init__(self):
+        self.columns = {name: array(typecode) for name, typecode in column_types.items()}
+        self.dictionaries = {name: StringDictionary() for name in string_columns}
+
+    def __len__(self):
+        return len(self.columns['status'])
+
+    def append(self, ip, timestamp, method, url, status, size):
+        """Appends one parsed line
+
+        Args:
+            ip (str): client ip
+            timestamp (str): request timestamp
+            method (str): http method
+            url (str): requested url
+            status (int): http status
+            size (int): response size in bytes
+        """
+        columns, dictionaries = self.columns, self.dictionaries
+        columns['ip'].append(dictionaries['ip'].encode(ip))
+        columns['timestamp'].append(dictionaries['timestamp'].encode(timestamp))
+        columns['method'].append(dictionaries['method'].encode(method))
+        columns['url'].append(dictionaries['url'].encode(url))
+        columns['status'].append(status)
+        columns['size'].append(size)
+
+    def counts(self, name):
+        """Counts the requests of every value of a column, counting the
+        codes and decoding each distinct one once
+
+        Args:
+            name (str): column name
+
+        Returns:
+            Counter: number of requests of every value
+        """
+        counts = Counter(self.columns[name])
+        if name not in self.dictionaries:
+            return counts
+        values = self.dictionaries[name].values
+        return Counter({values[code]: count for code, count in counts.items()})
+
+    def decode(self, name):
+        """Gets the values of a column
+
+        Args:
+            name (str): column name
+
+        Returns:
+            List: value of every row
+        """
+        if name not in self.dictionaries:
+            return self.columns[name].tolist()
+        values = self.dictionaries[name].values
+        return [values[code] for code in self.columns[name]]
+
+    def rows(self):
+        """Iterates over the decoded rows
+
+        Yields:
+            tuple: ip, timestamp, method, url, status and size of every row
+        """
+        decoders = [self.dictionaries[name].values.__getitem__ for name in string_columns]
+        columns = [self.columns[name] for name in string_columns]
+        for ip, timestamp, method, url, status, size in zip(*columns, self.columns['status'],
+                                                            self.columns['size']):
+            yield (decoders[0](ip), decoders[1](timestamp), decoders[2](method),
+                   decoders[3](url), status, size)
+
+    def nbytes(self):
+        """Gets the memory held by the columns and the distinct strings
+
+        Returns:
+            int: bytes of the table
+        """
+        column_bytes = sum(column.itemsize * len(column) for column in self.columns.values())
+        string_bytes = sum(sys.getsizeof(value) for dictionary in self.dictionaries.values()
+                           for value in dictionary.values)
+        return column_bytes + string_bytes
+
+    @classmethod
+    def from_parsed_logs(cls, parsed_logs):
+        """Builds a table from a parsed logs dict keyed by timestamp, the
+        json layout written by the earlier versions
+
+        Args:
+            parsed_logs (dict): dictionary of parsed logs
+
+        Returns:
+            RecordTable: the table of the entries
+        """
+        table = cls()
+        for timestamp, details in parsed_logs.items():
+            table.append(details['ip'], timestamp, details['method'], details['url'],
+                         int(details['status']), int(details.get('size') or 0))
+        return table
+
+class RecordTableWriter:
+    """ Writes a record table file while the log is parsed. The rows are
+    flushed as row groups of raw column arrays, so only the string
+    dictionaries grow in memory, and the dictionaries and the row group
+    offsets are written in a json footer when the writer is closed.
+    """
+    def __init__(self, path, row_group_size=default_row_group_size):
+        self.file = open(path, 'wb')
+        self.file.write(table_magic)
+        self.row_group_size = row_group_size
+        self.table = RecordTable()
+        self.row_groups = []
+        self.rows = 0
+
+    def append(self, record):
+        """Appends a parsed line, flushing a row group when it is full
+
+        Args:
+            record (LogRecord): the parsed line
+        """
+        self.table.append(record.ip, record.timestamp, record.method, record.url,
+                          record.status, record.size)
+        if len(self.table) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered rows as one row group
+        """
+        n_rows = len(self.table)
+        if not n_rows:
+            return
+        offsets = dict()
+        for name, column in self.table.columns.items():
+            offsets[name] = self.file.tell()
+            column.tofile(self.file)
+            # the dictionaries are shared by every row group
+            del column[:]
+        self.row_groups.append({"rows": n_rows, "offsets": offsets})
+        self.rows += n_rows
+
+    def close(self):
+        """Flushes the last rows and writes the footer
+        """
+        self.flush()
+        footer = json.dumps({
+            "rows": self.rows,
+            "byteorder": sys.byteorder,
+            "column_types": {name: [typecode, array(typecode).itemsize]
+                             for name, typecode in column_types.items()},
+            "row_groups": self.row_groups,
+            "dictionaries": {name: dictionary.values
+                             for name, dictionary in self.table.dictionaries.items()},
+        }).encode('utf-8')
+        self.file.write(footer)
+        self.file.write(struct.pack('<Q', len(footer)))
+        self.file.close()
+
+def load_table(path):
+    """Loads a record table file
+
+    Args:
+        path (str): path of the table file
+
+    Raises:
+        ValueError: if the file is not a record table
+
+    Returns:
+        RecordTable: the table
+    """
+    table = RecordTable()
+    with open(path, 'rb') as f:
+        if f.read(len(table_magic)) != table_magic:
+            raise ValueError(f"{os.path.basename(path)} is not a record table file")
+        f.seek(-8, os.SEEK_END)
+        footer_size = struct.unpack('<Q', f.read(8))[0]
+        f.seek(-8 - footer_size, os.SEEK_END)
+        footer = json.loads(f.read(footer_size))
+        swap = footer['byteorder'] != sys.byteorder
+        for name, (typecode, itemsize) in footer['column_types'].items():
+            if array(typecode).itemsize != itemsize:
+                raise ValueError(f"Column {name} was written with {itemsize} byte items")
+        for row_group in footer['row_groups']:
+            for name, offset in row_group['offsets'].items():
+                f.seek(offset)
+                column = array(footer['column_types'][name][0])
+                column.fromfile(f, row_group['rows'])
+                if swap:
+                    column.byteswap()
+                table.columns[name].extend(column)
+    table.dictionaries = {name: StringDictionary(values)
+                          for name, values in footer['dictionaries'].items()}
+    return table
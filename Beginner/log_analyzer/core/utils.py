@@ -6,11 +6,13 @@ import msvcrt
 import os
 from pathlib import Path
 import re
-
+from . import log_parser, log_summary, record_table
 
 logger = logging.getLogger(__name__)
 
 base_dir = os.path.dirname(os.path.abspath(__file__))
+parsed_file_pattern = re.compile(r'_([0-9]{14})\.(json|table)$')
+summary_file_pattern = re.compile(r'^logs_summary_([0-9]{14})\.json$')
 
 def clear_and_print_header(heading):
     """Clears CLI and displays the heading of any requested section
@@ -36,104 +38,160 @@ def pause(msg="\nPress any key to continue..."):
     print(msg)
     msvcrt.getch()
     
-def generate_parsed_logs():
-    """Finds the sample logs file, parses it and returns a dictionary
-    of the logs data.
+def get_sample_logs_path():
+    """Finds the sample logs file in the data folder
 
     Returns:
-        dict: dictionary of the logs data.
+        Path: path of sample_logs.log, or sample_logs.txt if there is no
+        .log file, None if neither exists
     """
-    logs_dict = {}
-    log_ext_path = os.path.join(base_dir, '..', 'data', 'sample_logs.log')
-    txt_ext_path = os.path.join(base_dir, '..', 'data', 'sample_logs.txt')
-    
-    regex = r'(?P<ip>\S+) - - \[(?P<timestamp>.*?)\] "(?P<method>\S+) (?P<url>\S+) .*" (?P<status>\d{3}) (?P<size>\d+)'
-    
     logger.info(f"Looking for sample logs file.")
-    path = Path(log_ext_path)
-    if not path.exists():
-        path = Path(txt_ext_path)
-    if path.exists():
-        
-        parse_logs(logs_dict, regex, path)
-    else:
-        logger.warning(f"No logs file found.")
-    return logs_dict
+    for ext in ('log', 'txt'):
+        path = Path(os.path.join(base_dir, '..', 'data', f'sample_logs.{ext}'))
+        if path.exists():
+            return path
+    logger.warning(f"No logs file found.")
+    return None
 
-def parse_logs(logs_dict, regex, path):
-    """Reads the log file line by line and parses the data.
+def generate_parsed_logs_table():
+    """Parses the sample logs file into a new parsed logs table file,
+    streaming it so that large logs are never held in memory.
 
-    Args:
-        logs_dict (dict): dictionary where logs data will be saved
-        regex (str): regex used to parse the data
-        path (Path): path of the sample logs file
+    Returns:
+        tuple: table file name and the ParseStats of the run, None and the
+        stats when no log line was parsed, None and None when there is no
+        sample logs file
     """
-    logger.info(f"Loading the sample logs file.")
-    with path.open('r', encoding='utf-8') as f:
-        for line in f:
-            log = re.search(regex,line)
-            if not log:
-                continue
-            timestamp, ip = log.group('timestamp'), log.group('ip')
-            method, url = log.group('method'), log.group('url')
-            status, size = log.group('status'), log.group('size')
-            logs_dict[timestamp] = {'ip' : ip,
-                                                'method' : method,
-                                                'url' : url,
-                                                'status' : status,
-                                                'size' : size}
-            
-def generate_parsed_logs_json(logs_dict):
-    """Saves the parsed logs dictionary to json file.
+    path = get_sample_logs_path()
+    if path is None:
+        return None, None
+    timestamp = datetime.strftime(datetime.now(), '%Y%m%d%H%M%S')
+    table_file_name = f'parsed_logs_{timestamp}.table'
+    logger.info(f"Parsing the sample logs file into {table_file_name}.")
+    table_path = os.path.join(base_dir, '..', 'data', table_file_name)
+    stats = log_parser.parse_log_file(str(path), table_path)
+    if not stats.records:
+        return None, stats
+    logger.info(f"{table_file_name} saved successfully.")
+    log_summary.save_summary(log_summary.from_parse_stats(stats),
+                             get_summary_path(table_file_name))
+    return table_file_name, stats
+
+def generate_logs_summary(workers=None):
+    """Counts the requests of the sample logs file in parallel worker
+    processes and saves only their summary, no parsed logs table. The
+    stats and the charts read this summary, the csv export still needs a
+    full parse.
 
     Args:
-        logs_dict (dict): dictionary of parsed logs data
+        workers (int, optional): number of worker processes. Defaults to
+        None, one per cpu.
+
+    Returns:
+        tuple: summary file name and the ParseStats of the run, None and
+        the stats when no log line was parsed, None and None when there is
+        no sample logs file
     """
+    path = get_sample_logs_path()
+    if path is None:
+        return None, None
     timestamp = datetime.strftime(datetime.now(), '%Y%m%d%H%M%S')
-    json_file_name = f'parsed_logs_{timestamp}.json'
-    logger.info(f"Saving the parsed logs json file {json_file_name}.")
-    json_path = os.path.join(base_dir, '..', 'data', json_file_name)
-    
-    path = Path(json_path)
-    content = json.dumps(logs_dict, indent=4)
-    path.write_text(content)
-    logger.info(f"{json_file_name} saved successfully.")
-    
-    return json_file_name
+    summary_file_name = f'logs_summary_{timestamp}.json'
+    logger.info(f"Counting the sample logs file into {summary_file_name}.")
+    stats = log_parser.parse_log_stats_parallel(str(path), workers)
+    if not stats.records:
+        return None, stats
+    log_summary.save_summary(log_summary.from_parse_stats(stats),
+                             os.path.join(base_dir, '..', 'data', summary_file_name))
+    return summary_file_name, stats
 
 def get_parsed_logs_data():
-    """Gets the parsed logs data
+    """Gets the parsed logs data. Parsed logs json files written by the
+    earlier versions are read into a table too.
 
     Returns:
-        dict: dictionary of parsed logs data
+        RecordTable: table of the parsed logs, empty if no file is found
     """
     logger.info("Getting the data from parsed logs file.")
-    parsed_logs = {}
-    parsed_json_file = get_latest_parsed_file()
-    if parsed_json_file:
-        parsed_file_dir = os.path.join(base_dir, '..', 'data', parsed_json_file)
-        path = Path(parsed_file_dir) 
-        content = path.read_text()
-        parsed_logs = json.loads(content)
-    return parsed_logs
+    parsed_file = get_latest_parsed_file()
+    if not parsed_file:
+        return record_table.RecordTable()
+    path = Path(os.path.join(base_dir, '..', 'data', parsed_file))
+    if path.suffix == '.json':
+        return record_table.RecordTable.from_parsed_logs(json.loads(path.read_text()))
+    return record_table.load_table(str(path))
+
+def get_summary_path(parsed_file):
+    """Gets the path of the summary saved next to a parsed logs file. The
+    name does not start with parsed_logs_, so it is never taken for a
+    parsed file.
+
+    Args:
+        parsed_file (str): parsed table or json file name
+
+    Returns:
+        str: path of the summary json file
+    """
+    timestamp = parsed_file_pattern.search(parsed_file).group(1)
+    return os.path.join(base_dir, '..', 'data', f'logs_summary_{timestamp}.json')
+
+def get_latest_summary_file():
+    """Gets the latest summary file in the data folder, the one of the
+    latest full parse or of a later parallel count
+
+    Returns:
+        str: summary file name, empty if there is none
+    """
+    data_dir = os.path.join(base_dir, '..', 'data')
+    summary_files = [file for file in os.listdir(data_dir) if summary_file_pattern.match(file)]
+    # the timestamps have a fixed width, the names sort by time
+    return max(summary_files, default="")
+
+def get_parsed_logs_summary():
+    """Gets the request counts of the latest parsed logs from their saved
+    summary, or of a parallel count done after the latest parse. The
+    summary of a file parsed before the summaries were saved is built from
+    its table once and saved.
+
+    Returns:
+        dict: number of records and the request counts of every ip, method,
+        status, url and hour, None if no parsed logs are found
+    """
+    logger.info("Getting the summary of the parsed logs.")
+    parsed_file = get_latest_parsed_file()
+    summary_file = get_latest_summary_file()
+    if summary_file and (not parsed_file or summary_file_pattern.match(summary_file).group(1)
+                         >= parsed_file_pattern.search(parsed_file).group(1)):
+        logger.info(f"Found summary file {summary_file}")
+        return log_summary.load_summary(os.path.join(base_dir, '..', 'data', summary_file))
+    if not parsed_file:
+        return None
+    summary_path = get_summary_path(parsed_file)
+    logger.info(f"No summary found for {parsed_file}, building it.")
+    summary = log_summary.from_table(get_parsed_logs_data())
+    if not summary['records']:
+        return None
+    log_summary.save_summary(summary, summary_path)
+    return summary
 
 def get_latest_parsed_file():
     """Gets the latest parsed file if multiple parsed files exist
     in data folder
 
     Returns:
-        str: parsed json file name
+        str: parsed table or json file name
     """
     parsed_json_file = ""
     data_dir = os.path.join(base_dir, '..', 'data')
     data_dir_files = os.listdir(data_dir)
-    parsed_json_files = [file for file in data_dir_files if "parsed_logs_" in file]
+    parsed_json_files = [file for file in data_dir_files if "parsed_logs_" in file
+                         and parsed_file_pattern.search(file)]
     if len(parsed_json_files) == 1:
         parsed_json_file = parsed_json_files[0]
     else:
         timestamp = None
         for file in parsed_json_files:
-            t = re.search('_([0-9]{14})\.json$',file).group(1)
+            t = parsed_file_pattern.search(file).group(1)
             t_dt = datetime.strptime(t,'%Y%m%d%H%M%S')
             if not timestamp:
                 timestamp = t_dt
@@ -144,23 +202,11 @@ def get_latest_parsed_file():
     logger.info(f"Found parsed file {parsed_json_file}")
     return parsed_json_file
 
-def get_hour_timestamp(timestamp):
-    """Gets the hour part from the timestamp
-
-    Args:
-        timestamp (str): timestamp string
-
-    Returns:
-        str: hour of the timestamp
-    """
-    hour = re.search(r':(\d{2}):\d{2}:\d{2}', timestamp).group(1)
-    return hour
-
 def export_to_csv(parsed_logs):
     """Saves all the parsed logs in csv file.
 
     Args:
-        parsed_logs (dict): dictionary of parsed logs
+        parsed_logs (RecordTable): table of the parsed logs
     """
     current_date_time = datetime.now().strftime("%d%m%Y_%H%M")
     base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -170,13 +216,7 @@ def export_to_csv(parsed_logs):
     with open(data_path, mode="w", newline="", encoding="utf-8") as file:
             writer = csv.writer(file)
             writer.writerow(['ip','url','status','timestamp','method','size'])
-            for timestamp, details in parsed_logs.items():
-                writer.writerow([
-                    details['ip'],
-                    details['url'],
-                    details['status'],
-                    timestamp,
-                    details['method'],
-                    details.get('size', '')
-                ])
+            writer.writerows((ip, url, status, timestamp, method, size)
+                             for ip, timestamp, method, url, status, size
+                             in parsed_logs.rows())
     logger.info(f"Data saved to file {new_csv_file_name}")
\ No newline at end of file
@@ -0,0 +1,110 @@
+import pytest
+import re
+
+from core import log_parser, log_summary, record_table, stats_core
+
+sample_lines = [
+    '127.0.0.1 - - [29/Nov/2025:06:58:26 +0530] "GET /products HTTP/1.1" 200 5120\n',
+    '10.0.0.7 - - [29/Nov/2025:07:01:02 +0530] "POST /orders HTTP/1.1" 301 770\n',
+    'not an access log line\n',
+    '10.0.0.7 - - [29/Nov/2025:07:01:02 +0530] "DELETE /cart?id=\\"3\\" HTTP/1.1" 404 0\n',
+    '192.168.1.10 - - [29/Nov/2025:23:59:59 +0530] "PUT /löгin HTTP/1.1" 500 12',
+]
+
+def write_log(tmp_path, lines=sample_lines):
+    path = tmp_path / "sample_logs.log"
+    path.write_text("".join(lines), encoding="utf-8")
+    return str(path)
+
+def test_records_match_line_by_line_search(tmp_path):
+    path = write_log(tmp_path)
+    regex = log_parser.log_pattern.pattern
+    expected = [re.search(regex, line).groups() for line in sample_lines
+                if re.search(regex, line)]
+    # a tiny block size splits lines and multi-byte characters across reads
+    records = list(log_parser.iter_log_records(path, block_size=7))
+    assert [(r.ip, r.timestamp, r.method, r.url, str(r.status), str(r.size))
+            for r in records] == expected
+
+def test_parse_log_file_keeps_every_line(tmp_path):
+    path = write_log(tmp_path)
+    table_path = str(tmp_path / "parsed_logs_20251129000000.table")
+    stats = log_parser.parse_log_file(path, table_path)
+    assert (stats.lines, stats.records) == (5, 4)
+    table = record_table.load_table(table_path)
+    # both same-second requests are kept
+    assert table.decode("method") == ["GET", "POST", "DELETE", "PUT"]
+    assert list(table.rows())[-1] == ("192.168.1.10", "29/Nov/2025:23:59:59 +0530",
+                                      "PUT", "/löгin", 500, 12)
+    assert table.counts("ip")["10.0.0.7"] == 2
+    assert stats.statuses == table.counts("status") == {200: 1, 301: 1, 404: 1, 500: 1}
+    assert stats.hours == {"06": 1, "07": 2, "23": 1}
+
+def test_table_row_groups_round_trip(tmp_path):
+    lines = [f'10.0.0.{i % 7} - - [29/Nov/2025:{i % 24:02d}:00:00 +0530] '
+             f'"GET /p/{i % 5} HTTP/1.1" {200 + i % 3} {i}\n' for i in range(100)]
+    path = write_log(tmp_path, lines)
+    table_path = str(tmp_path / "parsed.table")
+    writer = record_table.RecordTableWriter(table_path, row_group_size=16)
+    for record in log_parser.iter_log_records(path):
+        writer.append(record)
+    writer.close()
+    table = record_table.load_table(table_path)
+    assert len(table) == 100
+    assert table.decode("size") == list(range(100))
+    assert table.decode("url") == [f"/p/{i % 5}" for i in range(100)]
+
+def test_table_from_legacy_json():
+    parsed_logs = {"29/Nov/2025:06:58:26 +0530": {"ip": "127.0.0.1", "method": "GET",
+                                                 "url": "/", "status": "200",
+                                                 "size": "10"}}
+    table = record_table.RecordTable.from_parsed_logs(parsed_logs)
+    assert list(table.rows()) == [("127.0.0.1", "29/Nov/2025:06:58:26 +0530",
+                                   "GET", "/", 200, 10)]
+
+def test_no_table_file_without_records(tmp_path):
+    path = write_log(tmp_path, ["not an access log line\n"])
+    stats = log_parser.parse_log_file(path, str(tmp_path / "parsed.table"))
+    assert stats.records == 0
+    assert list(tmp_path.iterdir()) == [tmp_path / "sample_logs.log"]
+
+def test_byte_ranges_start_on_lines(tmp_path):
+    path = write_log(tmp_path)
+    data = open(path, 'rb').read()
+    ranges = log_parser.split_byte_ranges(path, 4)
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start and data[start - 1:start] == b'\n'
+
+def test_parallel_stats_match_sequential(tmp_path):
+    lines = [f'10.0.{i % 3}.{i % 11} - - [29/Nov/2025:{i % 24:02d}:{i % 60:02d}:00 +0530] '
+             f'"{("GET", "POST", "DELETE")[i % 3]} /p/{i % 13} HTTP/1.1" {200 + i % 4} {i}\n'
+             for i in range(500)] + ["garbage\n", "10.0.0.1 - - [29/Nov/2025:01:00:00 +0530]"]
+    path = write_log(tmp_path, lines)
+    sequential = log_parser.parse_log_file(path, str(tmp_path / "parsed.table"))
+    parallel = log_parser.parse_log_stats_parallel(path, workers=3, block_size=64)
+    for name in ("lines", "records", "ips", "methods", "statuses", "urls", "hours"):
+        assert getattr(parallel, name) == getattr(sequential, name)
+
+def test_summary_matches_table(tmp_path):
+    lines = [f'10.0.0.{i % 17} - - [29/Nov/2025:{i % 24:02d}:00:00 +0530] '
+             f'"GET /p/{i % 23} HTTP/1.1" {200 + i % 3} {i}\n' for i in range(300)]
+    path = write_log(tmp_path, lines)
+    table_path = str(tmp_path / "parsed.table")
+    stats = log_parser.parse_log_file(path, table_path)
+    summary_path = str(tmp_path / "logs_summary.json")
+    log_summary.save_summary(log_summary.from_parse_stats(stats), summary_path)
+    summary = log_summary.load_summary(summary_path)
+    assert summary == log_summary.from_table(record_table.load_table(table_path))
+    urls = sorted(summary["urls"].items(), key=lambda x: x[1], reverse=True)[:10]
+    assert stats_core.top_10_requested_urls(summary) == dict(urls)
+    assert stats_core.http_status_distribution(summary) == {200: 100, 201: 100, 202: 100}
+
+def test_failed_parse_leaves_no_temporary_file(tmp_path, monkeypatch):
+    path = write_log(tmp_path)
+    def fail(self, record):
+        raise OSError("disk full")
+    monkeypatch.setattr(record_table.RecordTableWriter, "append", fail)
+    with pytest.raises(OSError):
+        log_parser.parse_log_file(path, str(tmp_path / "parsed.table"))
+    assert list(tmp_path.iterdir()) == [tmp_path / "sample_logs.log"]
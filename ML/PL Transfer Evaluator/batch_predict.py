@@ -0,0 +1,41 @@
+import argparse
+import logging
+
+from core import batch_predict, ml_models
+import logging_config
+
+logging_config.setup_logging()
+logger = logging.getLogger(__name__)
+
+def parse_args():
+    """Parses the command line arguments of the batch prediction
+
+    Returns:
+        Namespace: parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Predicts the transfer value of every player in a csv file "
+                    "with the trained PL Transfer Evaluator models.")
+    parser.add_argument("input", help="csv file of the players to value")
+    parser.add_argument("-o", "--output", default="predictions.csv",
+                        help="csv file the results are saved to")
+    parser.add_argument("-m", "--models", nargs="+",
+                        choices=list(ml_models.model_paths),
+                        help="models to predict with, defaults to all")
+    parser.add_argument("-c", "--chunk-size", type=int,
+                        default=batch_predict.default_chunk_size,
+                        help="number of rows read and predicted at a time")
+    return parser.parse_args()
+
+def main():
+    """Starting point of the batch prediction
+    """
+    args = parse_args()
+    logger.info(f"Starting batch prediction for {args.input}")
+    total_rows = batch_predict.predict_players_file(args.input, args.output,
+                                                    args.models, args.chunk_size)
+    print(f"Predicted transfer values for {total_rows} players, "
+          f"results saved to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from core import data_loader, ml_models
+
+def per_trainer_matrices(df, training_data):
+    """Reference materialization where every trainer builds its own copy of
+    the inputs, as the trainers did before the shared matrices. All the
+    copies are kept, as they are when the trainers run in the process pool.
+
+    Returns:
+        List: the inputs of every trainer
+    """
+    best_features = training_data['best_features']
+    inputs = []
+    X = df[training_data['best_feature']].to_numpy().reshape(-1,1)
+    y = df['value_eur'].to_numpy(dtype=np.float64)
+    inputs.append(ml_models.split_training_data(X, y, training_data))
+    for _ in ("mlr", "knn"):
+        X = df.loc[:,best_features].to_numpy()
+        y = df['value_eur'].to_numpy(dtype=np.float64)
+        X_std = StandardScaler().fit_transform(X)
+        inputs.append(ml_models.split_training_data(X_std, y, training_data))
+    for model_key in ("dtr", "rf", "xgb"):
+        X = df.loc[:,best_features].to_numpy()
+        y = df['value_eur'].to_numpy(dtype=np.float64)
+        split = ml_models.split_training_data(X, y, training_data)
+        if model_key != "xgb":
+            # the sklearn trees fit on a float32 copy of the training rows
+            split = split + (np.asarray(split[0], dtype=np.float32),)
+        inputs.append(split)
+    return inputs
+
+def shared_matrices(df, training_data):
+    """Materialization with the shared training matrices: every trainer
+    gets views, only the linear models upcast their training rows.
+
+    Returns:
+        List: the inputs of every trainer
+    """
+    shared = ml_models.build_training_matrices(df, training_data['best_features'],
+                                               training_data['train_idx'],
+                                               training_data['test_idx'])
+    training_data = {**training_data, **shared}
+    col = training_data['best_features'].index(training_data['best_feature'])
+    inputs = [shared]
+    for standardized, columns in ((False, slice(col, col+1)), (True, slice(None))):
+        X_train, X_test, y_train, y_test = ml_models.get_training_split(
+            training_data, standardized, columns)
+        inputs.append((X_train.astype(np.float64), X_test, y_train, y_test))
+    for _ in ("knn", "dtr", "rf", "xgb"):
+        inputs.append(ml_models.get_training_split(training_data))
+    return inputs
+
+def measure(func, *args):
+    """Runs a function and measures its time and peak traced memory
+
+    Returns:
+        tuple: wall time in seconds and peak memory in bytes
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, peak
+
+def main():
+    """Starting point of the shared feature matrix benchmark
+    """
+    parser = argparse.ArgumentParser(description="Shared training matrices benchmark")
+    parser.add_argument("--scales", default="1,10,100",
+                        help="comma separated replication factors of players_22.csv")
+    args = parser.parse_args()
+
+    base = data_loader.load_dataset()
+    base.attrs.clear()
+    print(f"{'Rows':>8} {'Per trainer KiB':>16} {'Shared KiB':>11} {'Saved':>7} "
+          f"{'Per trainer ms':>15} {'Shared ms':>10}")
+    for scale in [int(scale) for scale in args.scales.split(',')]:
+        df = pd.concat([base] * scale, ignore_index=True)
+        training_data = ml_models.prepare_training_data(df)
+        legacy_time, legacy_peak = measure(per_trainer_matrices, df, training_data)
+        shared_time, shared_peak = measure(shared_matrices, df, training_data)
+        print(f"{len(df):>8} {legacy_peak / 1024:16,.1f} {shared_peak / 1024:11,.1f} "
+              f"{1 - shared_peak / legacy_peak:7.1%} {legacy_time * 1000:15.2f} "
+              f"{shared_time * 1000:10.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import time
+import numpy as np
+from sklearn.metrics import r2_score
+from sklearn.neighbors import KNeighborsRegressor
+from sklearn.preprocessing import StandardScaler
+
+from core import data_loader, ml_models
+
+def refit_sweep(X_train, X_test, y_train, y_test, max_k):
+    """Reference sweep which refits and predicts a KNN regressor per K
+
+    Returns:
+        tuple: max K, R2 scores and their standard deviation
+    """
+    r2s = np.zeros((max_k))
+    r2s_std = np.zeros((max_k))
+    for n in range(1,max_k+1):
+        knn_model_n = KNeighborsRegressor(n_neighbors = n).fit(X_train,y_train)
+        yhat = knn_model_n.predict(X_test)
+        r2s[n-1] = r2_score(y_test, yhat)
+        r2s_std[n-1] = np.std(yhat==y_test)/np.sqrt(yhat.shape[0])
+    return max_k,r2s,r2s_std
+
+def best_time(func, repeat, *args):
+    """Runs a function several times and keeps the fastest run
+
+    Returns:
+        tuple: fastest wall time in seconds and the function's result
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    """Starting point of the KNN K-sweep benchmark
+    """
+    parser = argparse.ArgumentParser(description="KNN K-sweep benchmark")
+    parser.add_argument("--max-k", type=int, default=ml_models.knn_sweep_max_k)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = data_loader.load_dataset()
+    training_data = ml_models.prepare_training_data(df)
+    X = StandardScaler().fit_transform(df.loc[:, training_data['best_features']].to_numpy())
+    y = df['value_eur'].to_numpy(dtype=np.float64)
+    split = ml_models.split_training_data(X, y, training_data)
+
+    refit_time, (_, refit_r2s, refit_std) = best_time(refit_sweep, args.repeat, *split, args.max_k)
+    sweep_time, (_, r2s, r2s_std) = best_time(ml_models.generate_plot_data_for_knn,
+                                              args.repeat, *split, args.max_k)
+
+    print(f"rows: {len(df)}, K=1..{args.max_k}")
+    print(f"refit per K : {refit_time * 1000:10.1f} ms")
+    print(f"vectorized  : {sweep_time * 1000:10.1f} ms")
+    print(f"speedup     : {refit_time / sweep_time:10.1f}x")
+    print(f"max |r2 diff|: {np.abs(refit_r2s - r2s).max():.3e}, "
+          f"max |std diff|: {np.abs(refit_std - r2s_std).max():.3e}")
+
+if __name__ == '__main__':
+    main()
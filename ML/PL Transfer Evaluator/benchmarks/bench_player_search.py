@@ -0,0 +1,86 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+from core import data_loader, player_search
+
+def full_scan(index, x, n, min_value=None, max_value=None, min_age=None,
+              max_age=None, positions=None):
+    """Reference search checking the filters on every row, without the
+    sorted indexes
+
+    Returns:
+        np array: row positions of the closest players
+    """
+    mask = np.ones(len(index.X), dtype=bool)
+    if min_value is not None:
+        mask &= index.values >= min_value
+    if max_value is not None:
+        mask &= index.values <= max_value
+    if min_age is not None:
+        mask &= index.ages >= min_age
+    if max_age is not None:
+        mask &= index.ages <= max_age
+    if positions:
+        mask &= np.isin(index.positions, positions)
+    rows = np.flatnonzero(mask)
+    distances = ((index.X[rows] - x) ** 2).sum(axis=1)
+    return rows[np.argsort(distances, kind='stable')[:n]]
+
+def time_queries(search, queries, rounds):
+    """Runs every query rounds times
+
+    Returns:
+        np array: latency of every query in milliseconds
+    """
+    latencies = []
+    for _ in range(rounds):
+        for x in queries:
+            start = time.perf_counter()
+            search(x)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+def main():
+    """Starting point of the player search benchmark
+    """
+    parser = argparse.ArgumentParser(description="Player similarity search benchmark")
+    parser.add_argument("--scales", default="1,10,154",
+                        help="comma separated replication factors of players_22.csv, "
+                             "154 is about 100k players")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    base = data_loader.load_dataset()
+    base_labels = player_search.load_labels()
+    filter_sets = {
+        "none": {},
+        "value": {"max_value": 20e6},
+        "value+age": {"max_value": 20e6, "max_age": 23},
+        "value+age+pos": {"max_value": 20e6, "max_age": 23, "positions": ["ST", "LW", "RW"]},
+    }
+    print(f"{'Players':>8} {'Build ms':>9} {'Filters':<14} {'Candidates':>10} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'Full scan p50 ms':>17}")
+    for scale in [int(scale) for scale in args.scales.split(',')]:
+        df = pd.concat([base] * scale, ignore_index=True)
+        labels = pd.concat([base_labels] * scale, ignore_index=True)
+        start = time.perf_counter()
+        index = player_search.build_search_index(df, labels)
+        build_ms = (time.perf_counter() - start) * 1000
+        rng = np.random.default_rng(42)
+        queries = index.X[rng.integers(0, len(index.X), args.queries)]
+        for label, filters in filter_sets.items():
+            candidates = index.get_candidates(**filters)
+            n_candidates = len(index.X) if candidates is None else len(candidates)
+            indexed = time_queries(lambda x: index.search(x, 10, **filters),
+                                   queries, args.rounds)
+            scanned = time_queries(lambda x: full_scan(index, x, 10, **filters),
+                                   queries, args.rounds)
+            print(f"{len(df):>8} {build_ms:9.1f} {label:<14} {n_candidates:>10} "
+                  f"{np.percentile(indexed, 50):8.3f} {np.percentile(indexed, 95):8.3f} "
+                  f"{np.percentile(scanned, 50):17.3f}")
+
+if __name__ == '__main__':
+    main()
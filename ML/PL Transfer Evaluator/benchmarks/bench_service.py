@@ -0,0 +1,69 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import time
+import urllib.request
+import numpy as np
+
+def get_json(url):
+    """Sends a GET request and decodes the JSON response
+    """
+    with urllib.request.urlopen(url) as response:
+        return json.loads(response.read())
+
+def post_json(url, payload):
+    """Sends a POST request with a JSON body and decodes the JSON response
+    """
+    request = urllib.request.Request(url, data=json.dumps(payload).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+def run_client(url, payload, requests_per_client):
+    """Sends requests one after another and records each round trip
+
+    Returns:
+        List: round trip latency of every request in milliseconds
+    """
+    latencies = []
+    for _ in range(requests_per_client):
+        start = time.perf_counter()
+        post_json(url, payload)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def main():
+    """Starting point of the prediction service load test
+    """
+    parser = argparse.ArgumentParser(description="Load test of the prediction service")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--model", default="rf")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200,
+                        help="requests sent by each client")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="rows per request, above 1 uses the batch endpoint")
+    args = parser.parse_args()
+
+    feature_names = get_json(f"{args.url}/models")["models"][args.model]
+    row = {name: 70 for name in feature_names}
+    if args.batch_size > 1:
+        url, payload = f"{args.url}/predict/{args.model}/batch", [row] * args.batch_size
+    else:
+        url, payload = f"{args.url}/predict/{args.model}", row
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as executor:
+        futures = [executor.submit(run_client, url, payload, args.requests)
+                   for _ in range(args.clients)]
+        latencies = np.concatenate([future.result() for future in futures])
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(latencies)} requests to {url} with {args.clients} clients")
+    print(f"throughput : {len(latencies) / elapsed:10.1f} requests/s "
+          f"({len(latencies) * args.batch_size / elapsed:,.0f} rows/s)")
+    print(f"latency ms : p50 {np.percentile(latencies, 50):.2f}, "
+          f"p95 {np.percentile(latencies, 95):.2f}, max {latencies.max():.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+import argparse
+import csv
+from datetime import datetime
+import json
+import os
+import platform
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import sklearn
+
+from core import data_loader, ml_models
+from core.training_scheduler import trainers
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+results_path = os.path.join(base_dir, 'results')
+
+def timed(func, *args, repeat=1, **kwargs):
+    """Runs a function and keeps the fastest of the repeated runs
+
+    Returns:
+        tuple: fastest wall time in seconds and the function's result
+    """
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def replicate_csv(path, scale, tmp_dir):
+    """Writes a copy of the csv with every row replicated scale times
+
+    Returns:
+        str: path of the replicated csv
+    """
+    if scale == 1:
+        return path
+    raw = pd.read_csv(path)
+    scaled = pd.concat([raw] * scale, ignore_index=True)
+    scaled_path = os.path.join(tmp_dir, f"players_x{scale}.csv")
+    scaled.to_csv(scaled_path, index=False)
+    return scaled_path
+
+def bench_scale(scale, tmp_dir, repeat):
+    """Times every stage of the training and inference paths at one scale
+
+    Returns:
+        List: benchmark records of this scale
+    """
+    records = []
+    def record(stage, seconds, rows):
+        records.append({"scale": scale, "rows": rows, "stage": stage,
+                        "seconds": round(seconds, 6),
+                        "rows_per_second": round(rows / seconds, 1) if seconds else None})
+        print(f"x{scale:<4} {stage:<28} {seconds * 1000:12.2f} ms")
+
+    csv_path = replicate_csv(data_loader.data_path, scale, tmp_dir)
+    seconds, raw = timed(pd.read_csv, csv_path, repeat=repeat)
+    rows = len(raw)
+    record("load_csv", seconds, rows)
+
+    seconds, _ = timed(lambda: data_loader.cleanup_dataframe(raw.copy()), repeat=repeat)
+    record("cleanup_dataframe", seconds, rows)
+    df = raw
+    data_loader.cleanup_dataframe(df)
+    df.attrs.clear()
+
+    cache_path = os.path.join(tmp_dir, f"players_x{scale}.npz")
+    df.attrs['fingerprint'] = f"benchmark_x{scale}"
+    data_loader.save_cached_dataset(df, cache_path, os.stat(csv_path))
+    seconds, _ = timed(data_loader.load_cached_dataset, cache_path, os.stat(csv_path),
+                       repeat=repeat)
+    record("load_cached_dataset", seconds, rows)
+    df.attrs.clear()
+
+    seconds, training_data = timed(ml_models.prepare_training_data, df, repeat=repeat)
+    record("feature_selection", seconds, rows)
+
+    for model_key, trainer in trainers.items():
+        seconds, _ = timed(trainer, df, training_data, use_cache=False)
+        record(f"train_{model_key}", seconds, rows)
+
+    split = ml_models.get_training_split(training_data, standardized=True)
+    seconds, _ = timed(ml_models.generate_plot_data_for_knn, *split, repeat=repeat)
+    record("knn_k_sweep", seconds, len(split[1]))
+
+    for model_key in ml_models.model_paths:
+        variants = [(model_key, False)]
+        if model_key in ml_models.compiled_model_paths:
+            variants.append((f"{model_key}_compiled", True))
+        for stage_key, compiled in variants:
+            try:
+                predictor = ml_models.load_predictor(model_key, compiled=compiled)
+            except FileNotFoundError:
+                print(f"x{scale:<4} no saved {model_key} model, skipping its predictions")
+                break
+            X_model = df.loc[:, ml_models.get_feature_names(predictor[0])].to_numpy()
+            single_rounds = 200
+            seconds, _ = timed(lambda: [ml_models.predict_values(predictor, X_model[i:i+1])
+                                        for i in range(single_rounds)], repeat=repeat)
+            record(f"predict_single_{stage_key}", seconds / single_rounds, 1)
+            seconds, _ = timed(ml_models.predict_values, predictor, X_model, repeat=repeat)
+            record(f"predict_batch_{stage_key}", seconds, rows)
+    return records
+
+def save_report(records):
+    """Saves the benchmark records to a json and a csv report
+
+    Returns:
+        str: path of the json report
+    """
+    os.makedirs(results_path, exist_ok=True)
+    timestamp = datetime.strftime(datetime.now(), '%Y%m%d%H%M%S')
+    report = {
+        "timestamp": timestamp,
+        "environment": {"python": platform.python_version(),
+                        "numpy": np.__version__,
+                        "pandas": pd.__version__,
+                        "sklearn": sklearn.__version__,
+                        "cpu_count": os.cpu_count()},
+        "records": records,
+    }
+    json_path = os.path.join(results_path, f"benchmark_{timestamp}.json")
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4)
+    with open(os.path.join(results_path, f"benchmark_{timestamp}.csv"),
+              'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(records[0]))
+        writer.writeheader()
+        writer.writerows(records)
+    return json_path
+
+def compare_reports(previous_path, records):
+    """Prints the change of every stage against a previous json report
+    """
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = {(r['scale'], r['stage']): r['seconds'] for r in json.load(f)['records']}
+    print(f"\n{'Scale':<6} {'Stage':<28} {'Previous ms':>12} {'Current ms':>12} {'Change':>8}")
+    for r in records:
+        before = previous.get((r['scale'], r['stage']))
+        if not before:
+            continue
+        change = (r['seconds'] - before) / before * 100
+        print(f"x{r['scale']:<5} {r['stage']:<28} {before * 1000:12.2f} "
+              f"{r['seconds'] * 1000:12.2f} {change:+7.1f}%")
+
+def main():
+    """Starting point of the benchmark suite
+    """
+    parser = argparse.ArgumentParser(description="PL Transfer Evaluator benchmark suite")
+    parser.add_argument("--scales", default="1,10,100",
+                        help="comma separated replication factors of players_22.csv")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs of the cheap stages, the fastest is kept")
+    parser.add_argument("--compare", help="previous json report to compare against")
+    args = parser.parse_args()
+
+    records = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for scale in [int(scale) for scale in args.scales.split(',')]:
+            records.extend(bench_scale(scale, tmp_dir, args.repeat))
+    json_path = save_report(records)
+    print(f"\nReport saved to {json_path}")
+    if args.compare:
+        compare_reports(args.compare, records)
+
+if __name__ == '__main__':
+    main()
@@ -1,32 +1,30 @@
 import logging
-from . import data_loader, ml_models, app_utils, ml_plots
+from . import data_loader, ensemble, ml_models, app_utils, ml_plots, training_scheduler
+from .model_registry import registry
+from .prediction_cache import prediction_cache
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
 def init_all_ml_models():
-    """Loads & cleans up the dataset, and then trains and predicts
+    """Loads the cleaned up dataset, and then trains and predicts
     the dataset with all the ML models.
     """
     logger.info("Initializing and training all ML models")
     df = data_loader.load_dataset()
-    data_loader.cleanup_dataframe(df)
     train_and_predict_models(df)
     
-def train_and_predict_models(df):
+def train_and_predict_models(df, max_workers=training_scheduler.default_max_workers):
     """Trains, predicts, and then saves model, its metrics and
     the plot corresponding to it.
 
     Args:
         df (DataFrame): the full dataset
+        max_workers (int, optional): number of processes used to train the
+        models in parallel. Defaults to training_scheduler.default_max_workers.
     """
     logger.info("Creating/Loading all ML Models")
-    ml_models.train_and_predict_simple_lr(df)
-    ml_models.train_and_predict_multiple_lr(df)
-    ml_models.train_and_predict_dtr(df)
-    ml_models.train_and_predict_knn(df)
-    ml_models.train_and_predict_rf(df)
-    ml_models.train_and_predict_xgb(df)
+    training_scheduler.train_models(df, max_workers)
     logger.info("All ML Models ready to use now!")
     
 def predict_new_player_value():
@@ -56,7 +54,11 @@ def predict_new_player_value():
             case 6:
                 predict_new_player_value_xgb()
             case 7:
+                predict_new_player_value_ensemble()
+            case 8:
                 pass
+        logger.info(f"Model registry stats: {registry.stats()}")
+        logger.info(f"Prediction cache stats: {prediction_cache.stats()}")
     
 def show_predict_player_menu():
     """Displays the player prediction menu
@@ -67,7 +69,8 @@ def show_predict_player_menu():
     print("4. Predict using KNN regressor")
     print("5. Predict using random forest")
     print("6. Predict using XGBoost")
-    print("7. Return to main menu.")
+    print("7. Predict using all models (weighted consensus)")
+    print("8. Return to main menu.")
     
 def predict_new_player_value_slr():
     """Predicts new players value via SLR
@@ -177,17 +180,44 @@ def predict_new_player_value_xgb():
     ml_models.predict_player_value_xgb(X)
     input("...")
     
+def predict_new_player_value_ensemble():
+    """Predicts new players value via all the models at once
+    """
+    logger.info("Predicting new players value using the ensemble of all models")
+    feature_names = ensemble.get_feature_union(ensemble.load_predictors())
+    features = dict()
+    for feature_name in feature_names:
+        while True:
+            try:
+                feature_value = int(input(f"Enter value for {feature_name}: "))
+            except ValueError:
+                print("Invalid input, try again.")
+            else:
+                features[feature_name] = feature_value
+                break
+    ensemble.predict_player_value_ensemble(features)
+    input("...")
+    
 def display_ml_metrics():
-    """Displays the metrics for all the ML models.
+    """Displays the metrics of the latest training run of all the ML models,
+    and the change in R2 score since the previous run.
     """
     app_utils.clear_cli()
     app_utils.clear_and_print_header("PL Transfer Evaluator - Displaying All Metrics")
     logger.info("Displaying metrics for all the ML models")
-    all_metrics_dict = ml_models.get_metrics_for_all_models()
-    print(f"{'Model Name':<30} {'MSE':<30} {'RMSE':<25} {'MAE':<25} {'R2 Score':<15}")
-    for metrics in all_metrics_dict.values():
-        print(f"{metrics['model']:<30} {metrics['mse']:<30} {metrics['rmse']:<25}" 
-              f"{metrics['mae']:<25} {metrics['r2']:<15}")
+    runs_by_model = ml_models.get_metrics_history_for_all_models()
+    if not runs_by_model:
+        print("No metrics stored yet, train the models first.")
+    else:
+        print(f"{'Model Name':<30} {'MSE':<30} {'RMSE':<25} {'MAE':<25} {'R2 Score':<15}"
+              f"{'R2 Change':<15} {'Train Time (s)':<15}")
+    for runs in runs_by_model.values():
+        metrics = runs[-1]
+        r2_change = f"{metrics['r2'] - runs[-2]['r2']:+.3f}" if len(runs) > 1 else "-"
+        train_seconds = metrics.get('train_seconds')
+        train_time = f"{train_seconds:.3f}" if train_seconds is not None else "-"
+        print(f"{metrics['model']:<30} {metrics['mse']:<30.3f} {metrics['rmse']:<25.3f}" 
+              f"{metrics['mae']:<25.3f} {metrics['r2']:<15.3f}{r2_change:<15} {train_time:<15}")
     input("\n...")
     
 def show_plots():
@@ -206,7 +236,7 @@ def show_plots():
             case 1:
                 ml_plots.show_slr_scatter_plot()
             case 2:
-                ml_plots.show_dt_plot_tree()
+                ml_plots.show_dt_plot_tree(ml_models.dtr_model_path)
             case 3:
                 ml_plots.show_knn_plot()
             case 4:
@@ -0,0 +1,86 @@
+import logging
+import time
+import pandas as pd
+from . import ml_models
+
+logger = logging.getLogger(__name__)
+
+default_chunk_size = 50000
+id_columns = ['short_name', 'club_position']
+
+def load_predictors(model_keys=None):
+    """Loads every requested model and its scaler once for a batch run.
+
+    Args:
+        model_keys (List, optional): keys of the models to use. Defaults to
+        all the models in ml_models.model_paths.
+
+    Returns:
+        dict: predictor (model, scaler) for each model key
+    """
+    if model_keys is None:
+        model_keys = list(ml_models.model_paths)
+    predictors = dict()
+    for model_key in model_keys:
+        if model_key not in ml_models.model_paths:
+            raise ValueError(f"Unknown model '{model_key}', expected one of "
+                             f"{', '.join(ml_models.model_paths)}")
+        logger.info(f"Loading {model_key} model for batch prediction")
+        # the estimators are faster than the compiled trees on large chunks
+        predictors[model_key] = ml_models.load_predictor(model_key, compiled=False)
+    return predictors
+
+def predict_players(df, predictors):
+    """Predicts the transfer values of every player in the dataframe with
+    one vectorized predict call per model.
+
+    Args:
+        df (DataFrame): players to value, must contain the features each
+        model was trained with
+        predictors (dict): predictors returned by load_predictors
+
+    Returns:
+        DataFrame: identifying columns of the players and one predicted
+        value column per model
+    """
+    results = df.loc[:, [col for col in id_columns if col in df.columns]].copy()
+    for model_key, predictor in predictors.items():
+        feature_names = ml_models.get_feature_names(predictor[0])
+        missing = [name for name in feature_names if name not in df.columns]
+        if missing:
+            raise ValueError(f"Input is missing features for {model_key}: "
+                             f"{', '.join(missing)}")
+        X = df.loc[:, feature_names].fillna(0).to_numpy()
+        results[f"{model_key}_value_eur"] = ml_models.predict_values(predictor, X)
+    return results
+
+def predict_players_file(input_path, output_path, model_keys=None,
+                         chunk_size=default_chunk_size):
+    """Streams a players csv file in chunks, predicts the transfer values
+    of every chunk and appends them to the results csv file.
+
+    Args:
+        input_path (str): csv file of players to value
+        output_path (str): csv file the results are written to
+        model_keys (List, optional): keys of the models to use. Defaults to
+        all the models.
+        chunk_size (int, optional): rows read per chunk. Defaults to
+        default_chunk_size.
+
+    Returns:
+        int: number of players valued
+    """
+    predictors = load_predictors(model_keys)
+    logger.info(f"Batch predicting {input_path} in chunks of {chunk_size} rows")
+    start = time.perf_counter()
+    total_rows = 0
+    with pd.read_csv(input_path, chunksize=chunk_size) as reader:
+        for i, chunk in enumerate(reader):
+            results = predict_players(chunk, predictors)
+            results.to_csv(output_path, mode='w' if i == 0 else 'a',
+                           header=(i == 0), index_label='row_id')
+            total_rows += len(chunk)
+    elapsed = time.perf_counter() - start
+    logger.info(f"Batch predicted {total_rows} players in {elapsed:.2f}s, "
+                f"results saved to {output_path}")
+    return total_rows
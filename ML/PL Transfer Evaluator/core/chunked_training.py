@@ -0,0 +1,442 @@
+import glob
+import hashlib
+import logging
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+from . import data_loader, ml_models, ml_plots, training_scheduler
+
+logger = logging.getLogger(__name__)
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+players_pattern = os.path.join(base_dir, '../data/players_*.csv')
+
+default_chunk_size = 50000
+default_sample_size = 200000
+default_test_sample_size = 50000
+test_size = 0.2
+random_state = 42
+
+sampled_models = ["dtr", "knn", "rf", "xgb"]
+
+class CoMomentAccumulator:
+    """ One-pass accumulator of the row count, column means and co-moment
+    matrix (the sum of the products of the deviations from the means) of a
+    stream of row chunks. Chunks are merged with the pairwise update of
+    Chan et al., which stays accurate where summing the raw squares would
+    cancel out.
+    """
+    def __init__(self, n_columns):
+        self.n = 0
+        self.mean = np.zeros(n_columns)
+        self.comoment = np.zeros((n_columns, n_columns))
+
+    def update(self, X):
+        """Adds a chunk of rows
+
+        Args:
+            X (np array): 2D matrix of the chunk, one column per accumulated column
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if not len(X):
+            return
+        mean = X.mean(axis=0)
+        centered = X - mean
+        self.merge(len(X), mean, centered.T @ centered)
+
+    def merge(self, n, mean, comoment):
+        """Merges the moments of another set of rows into this one
+
+        Args:
+            n (int): row count of the other set
+            mean (np array): column means of the other set
+            comoment (np array): co-moment matrix of the other set
+        """
+        total = self.n + n
+        delta = mean - self.mean
+        self.comoment += comoment + np.outer(delta, delta) * (self.n * n / total)
+        self.mean += delta * (n / total)
+        self.n = total
+
+    def covariance(self, ddof=0):
+        """Gets the covariance matrix of the accumulated rows
+
+        Args:
+            ddof (int, optional): delta degrees of freedom. Defaults to 0.
+
+        Returns:
+            np array: covariance matrix
+        """
+        return self.comoment / (self.n - ddof)
+
+    def correlation(self):
+        """Gets the Pearson correlation matrix of the accumulated rows, nan
+        for the constant columns
+
+        Returns:
+            np array: correlation matrix
+        """
+        std = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.comoment / np.outer(std, std)
+
+class BottomKReservoir:
+    """ Uniform sample of at most k rows of a stream. Every row draws a
+    random key and the sample keeps the rows with the k smallest keys, so a
+    chunk is added with one partial sort of the sample and the chunk.
+    """
+    def __init__(self, k, n_columns, rng):
+        self.k = k
+        self.rng = rng
+        self.keys = np.empty(0)
+        self.rows = np.empty((0, n_columns))
+        self.row_ids = np.empty(0, dtype=np.int64)
+        self.seen = 0
+
+    def update(self, rows, row_ids):
+        """Offers a chunk of rows to the sample
+
+        Args:
+            rows (np array): 2D matrix of the chunk
+            row_ids (np array): row id of every row of the chunk
+        """
+        self.seen += len(rows)
+        keys = np.concatenate([self.keys, self.rng.random(len(rows))])
+        rows = np.vstack([self.rows, rows])
+        row_ids = np.concatenate([self.row_ids, row_ids])
+        if len(keys) > self.k:
+            keep = np.argpartition(keys, self.k)[:self.k]
+            keys, rows, row_ids = keys[keep], rows[keep], row_ids[keep]
+        self.keys, self.rows, self.row_ids = keys, rows, row_ids
+
+def get_dataset_paths(pattern=players_pattern):
+    """Gets the players csv files of every season
+
+    Args:
+        pattern (str, optional): glob of the csv files. Defaults to
+        players_pattern, the players_*.csv files under data/.
+
+    Raises:
+        FileNotFoundError: if no file matches the pattern
+
+    Returns:
+        List: paths of the csv files, sorted by name
+    """
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        raise FileNotFoundError(f"No players csv file matches {pattern}")
+    return paths
+
+def get_datasets_fingerprint(paths):
+    """Hashes the content of several dataset files together
+
+    Args:
+        paths (List): paths of the dataset files
+
+    Returns:
+        str: sha256 hex digest of the digests of the files
+    """
+    if len(paths) == 1:
+        return data_loader.get_dataset_fingerprint(paths[0])
+    sha = hashlib.sha256()
+    for path in paths:
+        sha.update(data_loader.get_dataset_fingerprint(path).encode())
+    return sha.hexdigest()
+
+def iter_chunks(paths, chunk_size=default_chunk_size):
+    """Reads the csv files in chunks of rows, cleaned up as the in-memory
+    dataset is: numeric columns only and nulls as zeros. The numeric
+    columns of the first chunk are the columns of every chunk, a column
+    missing from a later season reads as zeros.
+
+    Args:
+        paths (List): paths of the csv files
+        chunk_size (int, optional): rows per chunk. Defaults to default_chunk_size.
+
+    Yields:
+        DataFrame: float64 chunk of the numeric columns
+    """
+    columns = None
+    for path in paths:
+        logger.info(f"Streaming {os.path.basename(path)} in chunks of {chunk_size} rows")
+        for chunk in pd.read_csv(path, chunksize=chunk_size, low_memory=False):
+            if columns is None:
+                columns = list(chunk.select_dtypes(include='number').columns)
+                if 'value_eur' not in columns:
+                    raise ValueError(f"{os.path.basename(path)} has no numeric value_eur column")
+            chunk = chunk.reindex(columns=columns)
+            yield (chunk.apply(pd.to_numeric, errors='coerce')
+                        .fillna(0)
+                        .astype(np.float64))
+
+def stream_datasets(paths, chunk_size=default_chunk_size, sample_size=default_sample_size,
+                    test_sample_size=default_test_sample_size):
+    """Streams the csv files once. Every row is drawn into the training or
+    the test split and both splits are reservoir sampled. The moments of
+    all the rows select the features and scale them, as the in-memory
+    training does, the moments of the training rows fit the linear models.
+
+    Args:
+        paths (List): paths of the csv files
+        chunk_size (int, optional): rows per chunk. Defaults to default_chunk_size.
+        sample_size (int, optional): training rows sampled for the models
+        that need the rows. Defaults to default_sample_size.
+        test_sample_size (int, optional): test rows sampled for the metrics.
+        Defaults to default_test_sample_size.
+
+    Returns:
+        dict: columns, row count, moments of all the rows and of the
+        training rows, and the training and test samples
+    """
+    rng = np.random.default_rng(random_state)
+    columns, moments, train_moments, train_sample, test_sample = None, None, None, None, None
+    n_rows = 0
+    for chunk in iter_chunks(paths, chunk_size):
+        if columns is None:
+            columns = list(chunk.columns)
+            moments = CoMomentAccumulator(len(columns))
+            train_moments = CoMomentAccumulator(len(columns))
+            train_sample = BottomKReservoir(sample_size, len(columns), rng)
+            test_sample = BottomKReservoir(test_sample_size, len(columns), rng)
+        X = chunk.to_numpy()
+        row_ids = np.arange(n_rows, n_rows + len(X))
+        is_test = rng.random(len(X)) < test_size
+        moments.update(X)
+        train_moments.update(X[~is_test])
+        train_sample.update(X[~is_test], row_ids[~is_test])
+        test_sample.update(X[is_test], row_ids[is_test])
+        n_rows += len(X)
+    logger.info(f"Streamed {n_rows} players, {train_moments.n} training rows, "
+                f"{len(train_sample.rows)} sampled for the tree models and KNN")
+    return {"columns": columns,
+            "n_rows": n_rows,
+            "moments": moments,
+            "train_moments": train_moments,
+            "train_sample": train_sample,
+            "test_sample": test_sample}
+
+def get_sorted_corr_features(moments, columns):
+    """Sorts all features on their correlation with value_eur, as
+    ml_models.get_sorted_corr_features does for an in-memory dataset
+
+    Args:
+        moments (CoMomentAccumulator): moments of all the rows
+        columns (List): names of the accumulated columns
+
+    Returns:
+        Series: sorted correlated features
+    """
+    target = columns.index('value_eur')
+    corr_series = pd.Series(moments.correlation()[:, target], index=columns,
+                            name='value_eur')
+    return corr_series.drop('value_eur').sort_values(ascending=False)
+
+def get_scaler(moments, columns):
+    """Builds a fitted StandardScaler from the accumulated moments
+
+    Args:
+        moments (CoMomentAccumulator): moments of all the rows
+        columns (List): indices of the scaled columns
+
+    Returns:
+        StandardScaler: the scaler of the columns
+    """
+    var = np.diag(moments.covariance())[columns]
+    scaler = StandardScaler()
+    scaler.mean_ = moments.mean[columns].copy()
+    scaler.var_ = var
+    # constant columns are left unscaled, as StandardScaler.fit does
+    scaler.scale_ = np.where(var > 0, np.sqrt(var), 1.0)
+    scaler.n_samples_seen_ = moments.n
+    scaler.n_features_in_ = len(columns)
+    return scaler
+
+def solve_linear_regression(moments, columns, target, scaler=None):
+    """Solves the least squares regression of the target on the columns
+    from the accumulated moments, on the scaled columns when a scaler is
+    given, like a LinearRegression fitted on all the training rows.
+
+    Args:
+        moments (CoMomentAccumulator): moments of the training rows
+        columns (List): indices of the input columns
+        target (int): index of the target column
+        scaler (StandardScaler, optional): scaler of the input columns
+
+    Returns:
+        LinearRegression: the fitted model, with its sufficient statistics
+    """
+    scale = np.ones(len(columns)) if scaler is None else scaler.scale_
+    shift = np.zeros(len(columns)) if scaler is None else scaler.mean_
+    # moments of the scaled columns, z = (x - shift) / scale
+    mean = (moments.mean[columns] - shift) / scale
+    cxx = moments.comoment[np.ix_(columns, columns)] / np.outer(scale, scale)
+    cxy = moments.comoment[columns, target] / scale
+    mean_y = moments.mean[target]
+    n = moments.n
+    xtx = np.empty((len(columns) + 1, len(columns) + 1))
+    xtx[0, 0] = n
+    xtx[0, 1:] = xtx[1:, 0] = n * mean
+    xtx[1:, 1:] = cxx + n * np.outer(mean, mean)
+    xty = np.concatenate([[n * mean_y], cxy + n * mean * mean_y])
+
+    model = LinearRegression()
+    model.coef_ = np.linalg.lstsq(cxx, cxy, rcond=None)[0]
+    model.intercept_ = float(mean_y - mean @ model.coef_)
+    model.n_features_in_ = len(columns)
+    model.rank_ = np.linalg.matrix_rank(cxx)
+    model.sufficient_stats_ = {"n": n, "xtx": xtx, "xty": xty}
+    return model
+
+def score_and_save(model_key, model, X_test, y_test, train_seconds, fingerprint):
+    """Scores a model on the test sample, stores its metrics and saves it
+
+    Returns:
+        np array: the predictions of the test sample
+    """
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+    ml_models.store_metrics(ml_models.model_names[model_key], y_test, y_pred,
+                            train_seconds, predict_seconds, fingerprint)
+    logger.info(f"Saving the chunked {model_key} model")
+    model_path = ml_models.model_paths[model_key]
+    joblib.dump(model, f"{model_path}.tmp")
+    os.replace(f"{model_path}.tmp", model_path)
+    return y_pred
+
+def train_linear_models(streamed, best_feature, best_features, X_test, y_test,
+                        fingerprint):
+    """Fits SLR and MLR from the moments of all the training rows
+
+    Returns:
+        StandardScaler: scaler of the best features, shared with KNN
+    """
+    columns = streamed['columns']
+    moments = streamed['train_moments']
+    target = columns.index('value_eur')
+    feature_idx = [columns.index(name) for name in best_features]
+
+    start = time.perf_counter()
+    slr_model = solve_linear_regression(moments, [columns.index(best_feature)], target)
+    slr_model.feature_names_ = [best_feature]
+    train_seconds = time.perf_counter() - start
+    slr_X_test = X_test[:, [best_features.index(best_feature)]]
+    score_and_save("slr", slr_model, slr_X_test, y_test, train_seconds, fingerprint)
+    ml_plots.save_slr_scatter_data(slr_model, slr_X_test, y_test)
+
+    start = time.perf_counter()
+    scaler = get_scaler(streamed['moments'], feature_idx)
+    mlr_model = solve_linear_regression(moments, feature_idx, target, scaler)
+    mlr_model.feature_names_ = best_features
+    train_seconds = time.perf_counter() - start
+    score_and_save("mlr", mlr_model, scaler.transform(X_test), y_test,
+                   train_seconds, fingerprint)
+    joblib.dump(scaler, ml_models.mlr_scaler_path)
+    return scaler
+
+def get_sample_training_data(streamed, best_feature, best_features, scaler):
+    """Builds the shared training matrices of the trainers from the
+    training and test samples
+
+    Returns:
+        tuple: frame of the sampled rows and its training data
+    """
+    train_sample, test_sample = streamed['train_sample'], streamed['test_sample']
+    sample_df = pd.DataFrame(np.vstack([train_sample.rows, test_sample.rows]),
+                             columns=streamed['columns'])
+    n_train = len(train_sample.rows)
+    train_idx = np.arange(n_train)
+    test_idx = np.arange(n_train, len(sample_df))
+    training_data = {"best_feature": best_feature,
+                     "best_features": best_features,
+                     "train_idx": train_idx,
+                     "test_idx": test_idx,
+                     **ml_models.build_training_matrices(sample_df, best_features,
+                                                         train_idx, test_idx)}
+    # KNN is scaled with the moments of all the rows, not the sample's
+    training_data['scaler'] = scaler
+    training_data['X_std'] = scaler.transform(training_data['X'].astype(np.float64))
+    return sample_df, training_data
+
+def train_sampled_model(model_key, sample_df, training_data, train_row_ids, fingerprint):
+    """Trains a model that needs the rows on the training sample, scores it
+    on the test sample and saves it with its scaler, index or compiled trees
+
+    Returns:
+        float: time taken by the training in seconds
+    """
+    start = time.perf_counter()
+    model = training_scheduler.trainers[model_key](sample_df, training_data,
+                                                   use_cache=False)
+    train_seconds = time.perf_counter() - start
+    _, X_test, _, y_test = ml_models.get_training_split(
+        training_data, standardized=model_key == "knn")
+    if model_key == "knn":
+        # the sampled rows keep their row ids in the streamed files
+        model.row_ids_ = train_row_ids
+    y_pred = score_and_save(model_key, model, X_test, y_test, train_seconds, fingerprint)
+    if model_key == "knn":
+        joblib.dump(training_data['scaler'], ml_models.knn_scaler_path)
+        ml_models.save_knn_neighbor_index(model)
+    elif model_key == "rf":
+        ml_plots.save_random_forest_data(y_test, y_pred)
+    elif model_key == "xgb":
+        ml_plots.save_xgboost_data(y_test, y_pred)
+    if model_key in ml_models.compiled_model_paths:
+        ml_models.save_compiled_model(model_key, model)
+    return train_seconds
+
+def train_chunked(pattern=players_pattern, chunk_size=default_chunk_size,
+                  sample_size=default_sample_size,
+                  test_sample_size=default_test_sample_size):
+    """Trains every model on players csv files too large to load at once,
+    streaming them in chunks. The correlations, the scaler and the linear
+    models come from the streamed moments of the rows, the tree models and
+    KNN are trained on a uniform sample of the training rows. Every model is scored
+    on a sample of the held out test rows.
+
+    Args:
+        pattern (str, optional): glob of the csv files. Defaults to players_pattern.
+        chunk_size (int, optional): rows per chunk. Defaults to default_chunk_size.
+        sample_size (int, optional): training rows sampled for the tree
+        models and KNN. Defaults to default_sample_size.
+        test_sample_size (int, optional): test rows sampled for the metrics.
+        Defaults to default_test_sample_size.
+
+    Returns:
+        dict: training time in seconds of every model
+    """
+    paths = get_dataset_paths(pattern)
+    fingerprint = get_datasets_fingerprint(paths)
+    start = time.perf_counter()
+    streamed = stream_datasets(paths, chunk_size, sample_size, test_sample_size)
+    stream_seconds = time.perf_counter() - start
+
+    corr_features = get_sorted_corr_features(streamed['moments'], streamed['columns'])
+    best_feature = corr_features.index[0]
+    best_features = ml_models.select_best_features(corr_features)
+    logger.info(f"Selected features {best_features} from {streamed['n_rows']} players")
+
+    test_sample = streamed['test_sample']
+    columns = streamed['columns']
+    X_test = test_sample.rows[:, [columns.index(name) for name in best_features]]
+    y_test = test_sample.rows[:, columns.index('value_eur')]
+    timings = {"stream": stream_seconds}
+    start = time.perf_counter()
+    scaler = train_linear_models(streamed, best_feature, best_features, X_test, y_test,
+                                 fingerprint)
+    timings["slr"] = timings["mlr"] = time.perf_counter() - start
+
+    sample_df, training_data = get_sample_training_data(streamed, best_feature,
+                                                        best_features, scaler)
+    for model_key in sampled_models:
+        timings[model_key] = train_sampled_model(model_key, sample_df, training_data,
+                                                 streamed['train_sample'].row_ids,
+                                                 fingerprint)
+    for model_key, seconds in timings.items():
+        logger.info(f"Chunked training of {model_key} took {seconds:.2f}s")
+    return timings
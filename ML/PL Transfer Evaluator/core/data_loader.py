@@ -1,29 +1,166 @@
+import hashlib
 import logging
+import numpy as np
 import pandas as pd
 import os
 
 logger = logging.getLogger(__name__)
 
-def load_dataset():
-    """Loads the players dataset from the csv file.
+base_dir = os.path.dirname(os.path.abspath(__file__))
+data_path = os.path.join(base_dir, '../data/players_22.csv')
+data_cache_path = os.path.join(base_dir, '../data/cache/')
+
+int_dtypes = [np.int8, np.int16, np.int32, np.int64]
+
+def load_dataset(path=data_path):
+    """Loads the players dataset. The already cleaned up numeric frame is
+    read from the columnar cache, and the csv file is parsed only when the
+    cache is missing or the csv's size or mtime has changed. The dataset
+    fingerprint is stored in df.attrs so that derived results can be
+    cached against it.
+
+    Args:
+        path (str, optional): path of the csv file. Defaults to data_path.
 
     Returns:
         df: the players full dataset
     """
     logger.info("Importing the players data.")
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(base_dir, '../data/players_22.csv')   
-    df = pd.read_csv(data_path)
+    csv_stat = os.stat(path)
+    cache_path = get_cache_path(path)
+    df = load_cached_dataset(cache_path, csv_stat)
+    if df is None:
+        logger.info("No valid dataset cache found, parsing the csv file.")
+        df = pd.read_csv(path)
+        cleanup_dataframe(df)
+        df.attrs['fingerprint'] = get_dataset_fingerprint(path)
+        save_cached_dataset(df, cache_path, csv_stat)
     return df
 
+def get_cache_path(path):
+    """Gets the path of the columnar cache file of a csv file
+
+    Args:
+        path (str): path of the csv file
+
+    Returns:
+        str: path of the .npz cache file
+    """
+    file_name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(data_cache_path, f"{file_name}.npz")
+
+def load_cached_dataset(cache_path, csv_stat):
+    """Loads the cleaned up dataset from the columnar cache
+
+    Args:
+        cache_path (str): path of the .npz cache file
+        csv_stat (os.stat_result): stat of the csv file the cache was built from
+
+    Returns:
+        DataFrame: the cached dataset, None if the cache is missing or stale
+    """
+    try:
+        with np.load(cache_path) as cache:
+            if (int(cache['csv_size']) != csv_stat.st_size
+                    or int(cache['csv_mtime_ns']) != csv_stat.st_mtime_ns):
+                logger.info("Dataset cache is stale.")
+                return None
+            columns = [str(col) for col in cache['columns']]
+            df = pd.DataFrame({col: cache[f"col_{i}"] for i, col in enumerate(columns)})
+            df.attrs['fingerprint'] = str(cache['fingerprint'])
+    except FileNotFoundError:
+        return None
+    logger.info(f"Loaded {len(df)} players from the dataset cache.")
+    return df
+
+def save_cached_dataset(df, cache_path, csv_stat):
+    """Saves the cleaned up dataset to the columnar cache
+
+    Args:
+        df (DataFrame): the cleaned up dataset
+        cache_path (str): path of the .npz cache file
+        csv_stat (os.stat_result): stat of the csv file the cache is built from
+    """
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    arrays = {f"col_{i}": df[col].to_numpy() for i, col in enumerate(df.columns)}
+    tmp_path = f"{cache_path}.tmp.npz"
+    np.savez(tmp_path,
+             columns=np.array(df.columns, dtype=str),
+             csv_size=csv_stat.st_size,
+             csv_mtime_ns=csv_stat.st_mtime_ns,
+             fingerprint=df.attrs['fingerprint'],
+             **arrays)
+    os.replace(tmp_path, cache_path)
+    logger.info(f"Dataset cache saved to {os.path.basename(cache_path)}.")
+
+def get_compact_dtypes(df):
+    """Gets the narrowest dtype that holds every value of each column
+    without loss. Integer valued columns get the smallest fitting integer
+    type, other float columns become float32 only if they round-trip exactly.
+
+    Args:
+        df (DataFrame): a numeric dataframe without nulls
+
+    Returns:
+        dict: compact dtype per column
+    """
+    dtypes = dict()
+    for col in df.columns:
+        values = df[col].to_numpy()
+        dtype = values.dtype
+        if len(values) and (np.issubdtype(dtype, np.integer)
+                            or np.array_equal(values, np.round(values))):
+            low, high = values.min(), values.max()
+            for int_dtype in int_dtypes:
+                info = np.iinfo(int_dtype)
+                if info.min <= low and high <= info.max:
+                    dtype = int_dtype
+                    break
+        elif np.issubdtype(dtype, np.floating):
+            if np.array_equal(values.astype(np.float32), values):
+                dtype = np.float32
+        dtypes[col] = dtype
+    return dtypes
+
+def get_dataset_fingerprint(path):
+    """Hashes the content of a dataset file
+
+    Args:
+        path (str): path of the dataset file
+
+    Returns:
+        str: sha256 hex digest of the file
+    """
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
 def cleanup_dataframe(df):
-    """Cleans up the dataframe
+    """Cleans up the dataframe, and downcasts every column to its narrowest
+    lossless dtype.
 
     Args:
         df (DataFrame): the players full dataset
     """
+    memory_before = df.memory_usage(deep=True).sum()
     if df.isna().any().any():
         logger.info("Null values present in dataset, filling them with zeros.")
         df.fillna(0, inplace=True)
     # df.drop(columns=['short_name','club_position'], inplace=True)
     df.drop(columns=df.select_dtypes(exclude='number').columns, inplace=True)
+    downcast_dataframe(df)
+    memory_after = df.memory_usage(deep=True).sum()
+    logger.info(f"Dataset memory footprint reduced from {memory_before / 1024:,.1f} KiB "
+                f"to {memory_after / 1024:,.1f} KiB.")
+
+def downcast_dataframe(df):
+    """Downcasts the columns of a numeric dataframe in place
+
+    Args:
+        df (DataFrame): a numeric dataframe without nulls
+    """
+    for col, dtype in get_compact_dtypes(df).items():
+        if df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
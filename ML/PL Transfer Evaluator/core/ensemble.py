@@ -0,0 +1,133 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import time
+import numpy as np
+from . import ml_models
+
+logger = logging.getLogger(__name__)
+
+# one thread per model, the predict calls of sklearn, xgboost and the
+# compiled trees spend most of their time in numpy or C with the GIL released
+executor = ThreadPoolExecutor(max_workers=len(ml_models.model_paths),
+                              thread_name_prefix="ensemble")
+
+def load_predictors():
+    """Gets every trained model from the model registry
+
+    Returns:
+        dict: predictor of every trained model, by model key
+    """
+    predictors = dict()
+    for model_key in ml_models.model_paths:
+        try:
+            predictors[model_key] = ml_models.load_predictor(model_key)
+        except FileNotFoundError:
+            logger.warning(f"No saved {model_key} model, it is left out of the ensemble")
+    return predictors
+
+def get_feature_union(predictors):
+    """Gets the features of all the models, each one once
+
+    Args:
+        predictors (dict): predictors returned by load_predictors
+
+    Returns:
+        List: features in the order the models first use them
+    """
+    feature_names = []
+    for model, _ in predictors.values():
+        for name in ml_models.get_feature_names(model):
+            if name not in feature_names:
+                feature_names.append(name)
+    return feature_names
+
+def get_model_weights(model_keys):
+    """Gets the consensus weight of every model, its R2 score on the test
+    split of its latest training run. Models scoring below zero, or without
+    a stored run, get no weight.
+
+    Args:
+        model_keys (List): keys of the models
+
+    Returns:
+        dict: weight of every model
+    """
+    latest_runs = ml_models.get_metrics_for_all_models()
+    weights = dict()
+    for model_key in model_keys:
+        run = latest_runs.get(ml_models.model_names[model_key])
+        weights[model_key] = max(run['r2'], 0.0) if run else 0.0
+    return weights
+
+def timed_predict(predictor, X):
+    """Predicts with one model and times it, the worker of the thread pool
+
+    Returns:
+        tuple: predicted values and the time taken in seconds
+    """
+    start = time.perf_counter()
+    y_pred = ml_models.predict_values(predictor, X)
+    return y_pred, time.perf_counter() - start
+
+def predict_ensemble(X, feature_names, predictors=None):
+    """Predicts the values of players with every model concurrently and
+    combines them into a consensus weighted by each model's R2 score.
+
+    Args:
+        X (np array): 2D matrix of input features, one row per player
+        feature_names (List): features of the columns of X, the union of
+        the features of all the models
+        predictors (dict, optional): predictors returned by load_predictors.
+        Defaults to None, which gets them from the model registry.
+
+    Returns:
+        dict: predictions, weight and latency of every model, the weighted
+        consensus and the total latency
+    """
+    start = time.perf_counter()
+    if predictors is None:
+        predictors = load_predictors()
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    futures = dict()
+    for model_key, predictor in predictors.items():
+        columns = [feature_names.index(name)
+                   for name in ml_models.get_feature_names(predictor[0])]
+        futures[model_key] = executor.submit(timed_predict, predictor, X[:, columns])
+    predictions, latencies = dict(), dict()
+    for model_key, future in futures.items():
+        predictions[model_key], latencies[model_key] = future.result()
+
+    weights = get_model_weights(predictions)
+    total_weight = sum(weights.values())
+    if total_weight:
+        consensus = sum(weights[key] * predictions[key] for key in predictions) / total_weight
+    else:
+        consensus = np.mean(list(predictions.values()), axis=0)
+    total_seconds = time.perf_counter() - start
+    logger.info(f"Ensemble of {len(predictions)} models predicted {len(X)} rows in "
+                f"{total_seconds * 1000:.2f} ms, slowest model "
+                f"{max(latencies.values()) * 1000:.2f} ms")
+    return {"predictions": predictions,
+            "weights": weights,
+            "latencies": latencies,
+            "consensus": consensus,
+            "seconds": total_seconds}
+
+def predict_player_value_ensemble(features):
+    """Predicts the player's value with every model and prints the value of
+    each one along with the weighted consensus
+
+    Args:
+        features (dict): value of every feature of the feature union
+    """
+    predictors = load_predictors()
+    feature_names = get_feature_union(predictors)
+    X = [[features[name] for name in feature_names]]
+    logger.info("Predicting player's value using the ensemble of all the models")
+    result = predict_ensemble(X, feature_names, predictors)
+    print(f"\n{'Model':<8} {'Predicted value':>20} {'Weight (R2)':>12} {'Latency ms':>11}")
+    for model_key, y_pred in result['predictions'].items():
+        print(f"{model_key:<8} {y_pred[0]:>20,.2f} {result['weights'][model_key]:>12.3f} "
+              f"{result['latencies'][model_key] * 1000:>11.2f}")
+    print(f"\nPlayer's weighted consensus transfer value is {result['consensus'][0]:,.2f} "
+          f"({result['seconds'] * 1000:.2f} ms for all the models)")
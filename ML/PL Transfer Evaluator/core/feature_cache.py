@@ -0,0 +1,60 @@
+import json
+import logging
+import os
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+data_models_path = os.path.join(base_dir, '../data/models/')
+feature_cache_path = f"{data_models_path}feature_selection_cache.json"
+
+memory_cache = dict()
+
+def load_corr_features(fingerprint, threshold):
+    """Gets the cached feature correlation ranking for a dataset
+
+    Args:
+        fingerprint (str): fingerprint of the dataset file
+        threshold (float): correlation threshold used for feature selection
+
+    Returns:
+        Series: features sorted on the basis of corr values, None if the
+        cache is missing or was built for another dataset or threshold
+    """
+    key = (fingerprint, threshold)
+    if key in memory_cache:
+        return memory_cache[key]
+    try:
+        with open(feature_cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if cache.get('fingerprint') != fingerprint or cache.get('threshold') != threshold:
+        logger.info("Feature selection cache is stale, rebuilding it")
+        return None
+
+    logger.info("Using the cached feature correlations")
+    names, values = zip(*cache['corr_features'])
+    corr_series = pd.Series(values, index=list(names), name='value_eur')
+    memory_cache[key] = corr_series
+    return corr_series
+
+def save_corr_features(fingerprint, threshold, corr_series):
+    """Saves the feature correlation ranking of a dataset
+
+    Args:
+        fingerprint (str): fingerprint of the dataset file
+        threshold (float): correlation threshold used for feature selection
+        corr_series (Series): features sorted on the basis of corr values
+    """
+    cache = {
+        "fingerprint": fingerprint,
+        "threshold": threshold,
+        "corr_features": [[name, float(value)] for name, value in corr_series.items()]
+    }
+    os.makedirs(data_models_path, exist_ok=True)
+    with open(feature_cache_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=4)
+    memory_cache[(fingerprint, threshold)] = corr_series
+    logger.info("Feature selection cache saved")
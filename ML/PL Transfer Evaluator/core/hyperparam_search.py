@@ -0,0 +1,190 @@
+from datetime import datetime
+import json
+import logging
+import math
+import os
+import time
+from joblib import Parallel, delayed, effective_n_jobs
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold, ParameterGrid, ParameterSampler
+
+logger = logging.getLogger(__name__)
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+data_models_path = os.path.join(base_dir, '../data/models/')
+
+search_spaces = {
+    "dtr": {"max_depth": [4, 6, 8, 10, 12, None],
+            "min_samples_leaf": [1, 2, 4, 8]},
+    "knn": {"n_neighbors": [3, 5, 7, 10, 15, 20, 30],
+            "weights": ["uniform", "distance"]},
+    "rf": {"n_estimators": [50, 100, 200],
+           "max_depth": [None, 10, 20],
+           "min_samples_leaf": [1, 2, 4],
+           "max_features": [1.0, "sqrt"]},
+    "xgb": {"n_estimators": [100, 200, 400],
+            "max_depth": [3, 4, 6],
+            "learning_rate": [0.05, 0.1, 0.3],
+            "subsample": [0.8, 1.0]},
+}
+
+def get_search_result_path(model_key):
+    """Gets the path the search result of a model is saved to
+
+    Args:
+        model_key (str): key of the model
+
+    Returns:
+        str: path of the json search result
+    """
+    return f"{data_models_path}{model_key}_search.json"
+
+def fit_and_score(estimator, params, X, y, train_idx, test_idx):
+    """Fits one configuration on one fold and scores it
+
+    Returns:
+        float: R2 score on the held out fold
+    """
+    model = clone(estimator).set_params(**params)
+    model.fit(X[train_idx], y[train_idx])
+    return r2_score(y[test_idx], model.predict(X[test_idx]))
+
+def get_candidates(param_space, n_candidates=None, random_state=42):
+    """Gets the configurations to search, the full grid or a random sample
+
+    Args:
+        param_space (dict): values to search for every parameter
+        n_candidates (int, optional): number of random configurations.
+        Defaults to None, which searches the full grid.
+        random_state (int, optional): seed of the random sample
+
+    Returns:
+        List: configurations to search
+    """
+    grid = ParameterGrid(param_space)
+    if n_candidates is None or n_candidates >= len(grid):
+        return list(grid)
+    return list(ParameterSampler(param_space, n_candidates, random_state=random_state))
+
+def successive_halving_search(estimator, param_space, X, y, n_splits=5, factor=3,
+                              n_candidates=None, time_budget=None, n_jobs=-1,
+                              random_state=42):
+    """Searches the configurations with k-fold cross-validation and successive
+    halving: every rung scores the remaining configurations on a growing
+    sample of rows and keeps the best 1/factor of them. The fold fits of a
+    rung are spread across all cores. With a time budget, a rung that is
+    not expected to fit in the remaining time is skipped, and every rung,
+    the first one included, scores its configurations one batch per core
+    at a time and stops once the budget is spent. The budget is overrun by
+    at most one batch, and the best configuration scored so far wins.
+
+    Args:
+        estimator (estimator): unfitted model with the fixed parameters set
+        param_space (dict): values to search for every parameter
+        X (np array): Input features
+        y (np array): Target values
+        n_splits (int, optional): folds of the cross-validation. Defaults to 5.
+        factor (int, optional): halving factor between rungs. Defaults to 3.
+        n_candidates (int, optional): random configurations to start from.
+        Defaults to None, which searches the full grid.
+        time_budget (float, optional): seconds the search may run. Defaults
+        to None, no limit.
+        n_jobs (int, optional): parallel fold fits. Defaults to -1, all cores.
+        random_state (int, optional): seed of the sampling. Defaults to 42.
+
+    Returns:
+        dict: best parameters, their CV scores and a summary of every rung
+    """
+    start = time.perf_counter()
+    candidates = get_candidates(param_space, n_candidates, random_state)
+    n_rungs = max(1, math.ceil(math.log(len(candidates), factor)) + 1)
+    min_resources = max(n_splits * 20, len(X) // factor ** (n_rungs - 1))
+    rows = np.random.default_rng(random_state).permutation(len(X))
+    folds = KFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+
+    rungs = []
+    best = None
+    deadline = None if time_budget is None else start + time_budget
+    for rung in range(n_rungs):
+        n_resources = len(X) if rung == n_rungs - 1 else min(len(X), min_resources * factor ** rung)
+        # a rung keeps 1/factor of the configurations on factor times the
+        # rows, so it is expected to take about as long as the previous one
+        projected = time.perf_counter() + (rungs[-1]["seconds"] if rungs else 0)
+        if best and deadline is not None and projected > deadline:
+            logger.info(f"Time budget of {time_budget}s reached after {rung} rungs")
+            break
+        sample = rows[:n_resources]
+        splits = list(folds.split(sample))
+        rung_start = time.perf_counter()
+        batch_size = len(candidates) if deadline is None else effective_n_jobs(n_jobs)
+        scores = []
+        for batch_start in range(0, len(candidates), batch_size):
+            if scores and time.perf_counter() > deadline:
+                logger.info(f"Time budget of {time_budget}s reached in rung {rung}, "
+                            f"after {len(scores) // n_splits} of {len(candidates)} configurations")
+                break
+            scores += Parallel(n_jobs=n_jobs)(
+                delayed(fit_and_score)(estimator, params, X, y, sample[train], sample[test])
+                for params in candidates[batch_start:batch_start + batch_size]
+                for train, test in splits)
+        # a rung cut short by the budget only ranks the configurations it scored
+        candidates = candidates[:len(scores) // n_splits]
+        scores = np.array(scores).reshape(len(candidates), n_splits)
+        means, stds = scores.mean(axis=1), scores.std(axis=1)
+        order = np.argsort(-means)
+        best = {"params": candidates[order[0]],
+                "cv_score_mean": float(means[order[0]]),
+                "cv_score_std": float(stds[order[0]]),
+                "cv_scores": scores[order[0]].tolist()}
+        rungs.append({"rung": rung, "n_resources": int(n_resources),
+                      "n_candidates": len(candidates),
+                      "best_score": best["cv_score_mean"],
+                      "seconds": round(time.perf_counter() - rung_start, 3)})
+        logger.info(f"Rung {rung}: {len(candidates)} configurations on {n_resources} "
+                    f"rows, best R2 {best['cv_score_mean']:.4f}")
+        if deadline is not None and time.perf_counter() > deadline:
+            logger.info(f"Time budget of {time_budget}s reached after {rung + 1} rungs")
+            break
+        candidates = [candidates[i] for i in order[:max(1, len(candidates) // factor)]]
+
+    return {"best_params": best["params"],
+            "cv_score_mean": best["cv_score_mean"],
+            "cv_score_std": best["cv_score_std"],
+            "cv_scores": best["cv_scores"],
+            "n_splits": n_splits,
+            "rungs": rungs,
+            "seconds": round(time.perf_counter() - start, 3)}
+
+def save_search_result(model_key, result, fingerprint=None):
+    """Saves the winning configuration of a model next to its saved model
+
+    Args:
+        model_key (str): key of the model
+        result (dict): result of successive_halving_search
+        fingerprint (str, optional): fingerprint of the dataset searched on
+    """
+    result = {"model": model_key,
+              "timestamp": datetime.now().isoformat(timespec='seconds'),
+              "dataset_fingerprint": fingerprint,
+              **result}
+    os.makedirs(data_models_path, exist_ok=True)
+    with open(get_search_result_path(model_key), 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=4)
+    logger.info(f"Saved the best {model_key} configuration {result['best_params']}")
+
+def load_best_params(model_key):
+    """Gets the winning configuration of the last search of a model
+
+    Args:
+        model_key (str): key of the model
+
+    Returns:
+        dict: best parameters, empty if the model was never searched
+    """
+    try:
+        with open(get_search_result_path(model_key), 'r', encoding='utf-8') as f:
+            return json.load(f)['best_params']
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return dict()
@@ -0,0 +1,469 @@
+from datetime import datetime
+import joblib
+import json
+import logging
+import os
+import time
+import numpy as np
+import pandas as pd
+from . import data_loader, ml_models, ml_plots, training_scheduler
+from .model_registry import registry
+
+logger = logging.getLogger(__name__)
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+data_deltas_path = os.path.join(base_dir, '../data/deltas/')
+applied_deltas_path = f"{data_deltas_path}applied_players.csv"
+applied_log_path = f"{data_deltas_path}applied_deltas.json"
+
+drift_threshold = 0.25
+xgb_update_rounds = 10
+psi_bins = 10
+psi_rows_per_bin = 20
+
+linear_models = ["slr", "mlr"]
+retrained_models = ["dtr", "rf"]
+
+def load_delta(path):
+    """Loads a delta file of new or changed players, in the same csv format
+    as the players dataset, and cleans it up the same way.
+
+    Args:
+        path (str): path of the delta csv file
+
+    Returns:
+        DataFrame: the cleaned up delta rows
+    """
+    logger.info(f"Loading the player delta {os.path.basename(path)}")
+    delta = pd.read_csv(path)
+    data_loader.cleanup_dataframe(delta)
+    return delta
+
+def load_applied_deltas():
+    """Loads the delta rows applied by the earlier incremental updates
+
+    Returns:
+        DataFrame: the applied delta rows, None if no delta was applied yet
+    """
+    if not os.path.exists(applied_deltas_path):
+        return None
+    applied = pd.read_csv(applied_deltas_path)
+    data_loader.cleanup_dataframe(applied)
+    return applied
+
+def stage_applied_delta(delta, columns):
+    """Writes the applied deltas with the delta rows appended under a
+    temporary name, so that they are replaced together with the models.
+
+    Args:
+        delta (DataFrame): cleaned up delta rows
+        columns (Index): columns of the players dataset
+
+    Returns:
+        tuple: temporary and final path of the applied deltas
+    """
+    os.makedirs(data_deltas_path, exist_ok=True)
+    tmp_path = f"{applied_deltas_path}.tmp"
+    exists = os.path.exists(applied_deltas_path)
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        if exists:
+            with open(applied_deltas_path, 'r', newline='', encoding='utf-8') as applied:
+                f.write(applied.read())
+        delta.reindex(columns=columns, fill_value=0).to_csv(f, index=False, header=not exists)
+    return tmp_path, applied_deltas_path
+
+def load_applied_log():
+    """Loads the log of the applied deltas
+
+    Returns:
+        dict: record of every applied delta, and the delta being committed
+        if a refresh stopped while replacing its files
+    """
+    try:
+        with open(applied_log_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"applied": [], "pending": None}
+
+def save_applied_log(log):
+    """Saves the log of the applied deltas through a temporary file
+
+    Args:
+        log (dict): the log of the applied deltas
+    """
+    os.makedirs(data_deltas_path, exist_ok=True)
+    with open(f"{applied_log_path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(log, f, indent=4)
+    os.replace(f"{applied_log_path}.tmp", applied_log_path)
+
+def get_applied_record(log, delta_fingerprint):
+    """Gets the record of a delta that was already applied
+
+    Args:
+        log (dict): the log of the applied deltas
+        delta_fingerprint (str): content hash of the delta file
+
+    Returns:
+        dict: the record of the delta, None if it was never applied
+    """
+    return next((record for record in log["applied"]
+                 if record["fingerprint"] == delta_fingerprint), None)
+
+def commit_pending(log):
+    """Replaces the files staged by a refresh with their temporary copies
+    and records its delta as applied. The pending delta is logged before
+    the first file is replaced, so a refresh that stopped halfway is
+    finished by the next one, and replacing again is harmless.
+
+    Args:
+        log (dict): the log of the applied deltas, with its pending delta
+    """
+    pending = log["pending"]
+    for tmp_path, path in pending["replacements"]:
+        if os.path.exists(tmp_path):
+            os.replace(tmp_path, path)
+    log["applied"].append(pending["record"])
+    log["pending"] = None
+    save_applied_log(log)
+    logger.info(f"Recorded the delta {pending['record']['file']} as applied")
+
+def get_training_frame(df):
+    """Gets the players dataset with every applied delta appended
+
+    Args:
+        df (DataFrame): The players full dataset
+
+    Returns:
+        DataFrame: the dataset the models are currently trained on
+    """
+    applied = load_applied_deltas()
+    if applied is None:
+        return df
+    return pd.concat([df, applied.reindex(columns=df.columns, fill_value=0)],
+                     ignore_index=True)
+
+def save_model(model, path):
+    """Saves a model through a temporary file, so that a reader such as
+    the prediction service never loads a partly written file.
+
+    Args:
+        model (estimator): the model to save
+        path (str): path of the joblib file
+    """
+    tmp_path = f"{path}.tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+
+def population_stability_index(expected, actual, bins=psi_bins):
+    """Measures how far the distribution of a column has shifted, on the
+    quantile bins of the reference values. Below 0.1 is usually read as
+    no shift, above 0.2 as a significant one. Small deltas get fewer bins
+    and every bin half a row, so that sampling noise and empty bins do
+    not read as drift.
+
+    Args:
+        expected (np array): reference values
+        actual (np array): new values
+        bins (int, optional): most quantile bins. Defaults to psi_bins.
+
+    Returns:
+        float: population stability index
+    """
+    bins = max(2, min(bins, len(actual) // psi_rows_per_bin))
+    edges = np.unique(np.quantile(expected, np.linspace(0, 1, bins + 1)))
+    edges[0], edges[-1] = -np.inf, np.inf
+    n_bins = len(edges) - 1
+    expected_share = ((np.histogram(expected, edges)[0] + 0.5)
+                      / (len(expected) + 0.5 * n_bins))
+    actual_share = (np.histogram(actual, edges)[0] + 0.5) / (len(actual) + 0.5 * n_bins)
+    return float(np.sum((actual_share - expected_share)
+                        * np.log(actual_share / expected_share)))
+
+def get_drift(reference, delta, columns):
+    """Gets the population stability index of every column of the delta
+
+    Args:
+        reference (DataFrame): rows the models are trained on
+        delta (DataFrame): new rows
+        columns (List): columns to compare
+
+    Returns:
+        dict: index of every column
+    """
+    return {col: population_stability_index(reference[col].to_numpy(),
+                                            delta[col].to_numpy())
+            for col in columns}
+
+def update_linear_regression(model, X_delta, y_delta, X_train=None, y_train=None):
+    """Updates a linear regression in place by adding the sufficient
+    statistics of the delta rows and solving the normal equations again.
+
+    Args:
+        model (LinearRegression): fitted model
+        X_delta (np array): Input features of the delta, scaled as the model's
+        y_delta (np array): Target values of the delta
+        X_train (np array, optional): training features, only used to rebuild
+        the statistics of models saved before they were stored
+        y_train (np array, optional): training target values
+    """
+    stats = getattr(model, 'sufficient_stats_', None)
+    if stats is None:
+        stats = ml_models.get_sufficient_stats(X_train, y_train)
+    delta_stats = ml_models.get_sufficient_stats(X_delta, y_delta)
+    stats = {key: stats[key] + delta_stats[key] for key in stats}
+    beta = np.linalg.lstsq(stats["xtx"], stats["xty"], rcond=None)[0]
+    model.intercept_ = float(beta[0])
+    model.coef_ = beta[1:]
+    model.sufficient_stats_ = stats
+
+def update_knn(model, X_delta, y_delta, first_row_id):
+    """Updates a KNN regressor in place by appending the delta rows to the
+    rows it searches. Building the index over the appended rows costs no
+    more than a tree build, no model is fitted.
+
+    Args:
+        model (KNeighborsRegressor): fitted model
+        X_delta (np array): standardized input features of the delta
+        y_delta (np array): Target values of the delta
+        first_row_id (int): row id of the first delta row, the delta rows
+        are numbered after the dataset rows in the order they are applied
+    """
+    # _fit_X and _y hold the rows the fitted index was built from
+    model.fit(np.vstack([model._fit_X, X_delta]),
+              np.concatenate([model._y, y_delta]))
+    model.row_ids_ = np.concatenate([model.row_ids_,
+                                     np.arange(first_row_id, first_row_id + len(X_delta))])
+
+def update_xgb(model, X_delta, y_delta, rounds=xgb_update_rounds):
+    """Updates an XGBoost model in place by boosting more trees on the
+    delta rows, on top of the trees already in the booster.
+
+    Args:
+        model (XGBRegressor): fitted model
+        X_delta (np array): Input features of the delta
+        y_delta (np array): Target values of the delta
+        rounds (int, optional): trees to add. Defaults to xgb_update_rounds.
+    """
+    model.set_params(n_estimators=rounds)
+    model.fit(X_delta, y_delta, xgb_model=model.get_booster())
+    model.set_params(n_estimators=model.get_booster().num_boosted_rounds())
+
+def update_model(model_key, df, training_data, delta, first_row_id):
+    """Updates a copy of one saved model with the delta rows and scores it
+    on the held out test split. Nothing is saved.
+
+    Args:
+        model_key (str): one of slr, mlr, knn or xgb
+        df (DataFrame): The players full dataset
+        training_data (dict): output of prepare_training_data
+        delta (DataFrame): cleaned up delta rows
+        first_row_id (int): row id of the first delta row
+
+    Returns:
+        tuple: the updated model, the update time in seconds, and the test
+        target values, predictions and prediction time of its metrics
+    """
+    model_path = ml_models.model_paths[model_key]
+    # a private copy, the registry's instance may be serving predictions
+    model = joblib.load(model_path)
+    scaler = None
+    if model_key in ml_models.scaler_paths:
+        scaler = registry.get(ml_models.scaler_paths[model_key])
+    feature_names = ml_models.get_feature_names(model)
+
+    def get_matrix(frame):
+        X = frame.loc[:, feature_names].to_numpy(dtype=np.float64)
+        return X if scaler is None else scaler.transform(X)
+    X = get_matrix(df)
+    y = df['value_eur'].to_numpy(dtype=np.float64)
+    X_train, X_test, y_train, y_test = ml_models.split_training_data(X, y, training_data)
+    X_delta = get_matrix(delta)
+    y_delta = delta['value_eur'].to_numpy(dtype=np.float64)
+
+    start = time.perf_counter()
+    if model_key in linear_models:
+        update_linear_regression(model, X_delta, y_delta, X_train, y_train)
+    elif model_key == "knn":
+        if not hasattr(model, 'row_ids_'):
+            model.row_ids_ = training_data['train_idx']
+        update_knn(model, X_delta, y_delta, first_row_id)
+    else:
+        update_xgb(model, X_delta, y_delta)
+    update_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+    logger.info(f"Updated the {model_key} model with {len(delta)} rows "
+                f"in {update_seconds:.3f}s")
+    return model, update_seconds, (y_test, y_pred, predict_seconds)
+
+def stage_model(model_key, model):
+    """Saves an updated model, and the neighbor index or compiled model
+    built from it, under temporary names
+
+    Args:
+        model_key (str): one of slr, mlr, knn or xgb
+        model (estimator): the updated model
+
+    Returns:
+        List: temporary and final path of every file, the model first so
+        that its compiled model stays newer than it once replaced
+    """
+    model_path = ml_models.model_paths[model_key]
+    joblib.dump(model, f"{model_path}.tmp")
+    replacements = [(f"{model_path}.tmp", model_path)]
+    if model_key == "knn":
+        ml_models.save_knn_neighbor_index(model, f"{ml_models.knn_index_path}.tmp")
+        replacements.append((f"{ml_models.knn_index_path}.tmp", ml_models.knn_index_path))
+    elif model_key in ml_models.compiled_model_paths:
+        compiled_path = ml_models.compiled_model_paths[model_key]
+        ml_models.save_compiled_model(model_key, model, f"{compiled_path}.tmp")
+        replacements.append((f"{compiled_path}.tmp", compiled_path))
+    return replacements
+
+def retrain_model(model_key, training_frame, training_data, fingerprint):
+    """Retrains a saved model from scratch on the dataset with every
+    applied delta, then scores it on its test split and saves it.
+
+    Args:
+        model_key (str): key of the model
+        training_frame (DataFrame): players dataset with the applied deltas
+        training_data (dict): output of prepare_training_data for the frame
+        fingerprint (str): fingerprint of the dataset and the delta
+
+    Returns:
+        float: time taken by the training in seconds
+    """
+    start = time.perf_counter()
+    model = training_scheduler.trainers[model_key](training_frame, training_data,
+                                                   use_cache=False)
+    train_seconds = time.perf_counter() - start
+
+    X = training_frame.loc[:, model.feature_names_].to_numpy()
+    y = training_frame['value_eur'].to_numpy(dtype=np.float64)
+    _, X_test, _, y_test = ml_models.split_training_data(X, y, training_data)
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+    ml_models.store_metrics(ml_models.model_names[model_key], y_test, y_pred,
+                            train_seconds, predict_seconds, fingerprint)
+    if model_key == "rf":
+        ml_plots.save_random_forest_data(y_test, y_pred)
+    save_model(model, ml_models.model_paths[model_key])
+    if model_key in ml_models.compiled_model_paths:
+        ml_models.save_compiled_model(model_key, model)
+    logger.info(f"Retrained the {model_key} model on {len(training_frame)} rows "
+                f"in {train_seconds:.2f}s")
+    return train_seconds
+
+def retrain_drifted_models(df, log, record, fingerprint):
+    """Retrains the tree models a delta drifted, on the dataset with every
+    applied delta, and clears them from the delta's record
+
+    Args:
+        df (DataFrame): The players full dataset
+        log (dict): the log of the applied deltas
+        record (dict): record of the delta in the log
+        fingerprint (str): fingerprint of the dataset and the delta
+
+    Returns:
+        dict: training time of every retrained model in seconds
+    """
+    seconds = dict()
+    if not record["retrain"]:
+        return seconds
+    training_frame = get_training_frame(df)
+    frame_training_data = ml_models.prepare_training_data(training_frame)
+    for model_key in list(record["retrain"]):
+        seconds[model_key] = retrain_model(model_key, training_frame,
+                                           frame_training_data, fingerprint)
+        record["retrain"].remove(model_key)
+        save_applied_log(log)
+    return seconds
+
+def refresh_models(delta_path, threshold=drift_threshold):
+    """Refreshes the saved models with a delta file of new or changed
+    players. Linear regression, KNN and XGBoost are updated in place,
+    the decision tree and random forest are retrained only when the
+    population stability index of one of their features or of the
+    target exceeds the threshold.
+
+    The updated models, the files built from them and the applied delta
+    rows are written under temporary names and replaced together, after
+    the delta is logged as pending, so a refresh that stops halfway is
+    finished by the next one. A delta is recognised by the hash of its
+    content and applied once: running it again only finishes the
+    retraining it left undone.
+
+    Args:
+        delta_path (str): path of the delta csv file
+        threshold (float, optional): drift that triggers the retraining of
+        the tree models. Defaults to drift_threshold.
+
+    Returns:
+        dict: action taken, time and drift of every model
+    """
+    df = data_loader.load_dataset()
+    missing = training_scheduler.get_missing_models()
+    if missing:
+        raise FileNotFoundError(f"Models {', '.join(missing)} are not trained yet, "
+                                "run a full training first")
+
+    log = load_applied_log()
+    if log["pending"]:
+        logger.warning(f"Finishing the interrupted refresh with "
+                       f"{log['pending']['record']['file']}")
+        commit_pending(log)
+    delta_fingerprint = data_loader.get_dataset_fingerprint(delta_path)
+    fingerprint = f"{df.attrs.get('fingerprint')}+{delta_fingerprint}"
+
+    record = get_applied_record(log, delta_fingerprint)
+    if record is not None:
+        logger.warning(f"The delta {os.path.basename(delta_path)} was already applied "
+                       f"on {record['applied_at']}, skipping it")
+        summary = {model_key: {"action": "skipped", "seconds": 0.0}
+                   for model_key in linear_models + ["knn", "xgb"] + retrained_models}
+        for model_key, seconds in retrain_drifted_models(df, log, record, fingerprint).items():
+            summary[model_key] = {"action": "retrained", "seconds": seconds}
+        return summary
+
+    delta = load_delta(delta_path)
+    training_frame = get_training_frame(df)
+    training_data = ml_models.prepare_training_data(df)
+
+    summary = dict()
+    replacements, scores = [], dict()
+    for model_key in linear_models + ["knn", "xgb"]:
+        model, seconds, scores[model_key] = update_model(
+            model_key, df, training_data, delta, len(training_frame))
+        replacements += stage_model(model_key, model)
+        summary[model_key] = {"action": "updated", "seconds": seconds}
+
+    for model_key in retrained_models:
+        model = registry.get(ml_models.model_paths[model_key])
+        drift = get_drift(training_frame, delta,
+                          ml_models.get_feature_names(model) + ['value_eur'])
+        max_col = max(drift, key=drift.get)
+        summary[model_key] = {"action": "kept", "seconds": 0.0,
+                              "drift": drift[max_col], "drift_column": max_col}
+    replacements.append(stage_applied_delta(delta, df.columns))
+
+    record = {"fingerprint": delta_fingerprint,
+              "file": os.path.basename(delta_path),
+              "rows": len(delta),
+              "applied_at": datetime.now().isoformat(timespec='seconds'),
+              "retrain": [key for key in retrained_models
+                          if summary[key]["drift"] > threshold]}
+    log["pending"] = {"record": record, "replacements": replacements}
+    save_applied_log(log)
+    commit_pending(log)
+
+    for model_key, (y_test, y_pred, predict_seconds) in scores.items():
+        ml_models.store_metrics(ml_models.model_names[model_key], y_test, y_pred,
+                                summary[model_key]["seconds"], predict_seconds, fingerprint)
+    record = get_applied_record(log, delta_fingerprint)
+    for model_key, seconds in retrain_drifted_models(df, log, record, fingerprint).items():
+        summary[model_key]["action"] = "retrained"
+        summary[model_key]["seconds"] = seconds
+    return summary
@@ -0,0 +1,91 @@
+from datetime import datetime
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+data_metrics_path = os.path.join(base_dir, '../data/metrics/')
+metrics_store_path = f"{data_metrics_path}metrics.jsonl"
+
+def append_run(model, metrics, train_seconds=None, predict_seconds=None,
+               fingerprint=None):
+    """Appends one training run of a model to the metrics store
+
+    Args:
+        model (str): name of the model
+        metrics (dict): r2, mae, mse and rmse scores as numbers
+        train_seconds (float, optional): time taken to fit the model
+        predict_seconds (float, optional): time taken to predict the test data
+        fingerprint (str, optional): fingerprint of the dataset trained on
+
+    Returns:
+        dict: the stored run
+    """
+    run = {
+        "model": model,
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+        "dataset_fingerprint": fingerprint,
+        "train_seconds": train_seconds,
+        "predict_seconds": predict_seconds,
+        **metrics
+    }
+    os.makedirs(data_metrics_path, exist_ok=True)
+    # a single write of one line keeps appends from parallel trainers whole
+    with open(metrics_store_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(run) + '\n')
+    logger.info(f"Stored metrics of the {model} training run")
+    return run
+
+def read_runs():
+    """Reads every training run from the metrics store
+
+    Returns:
+        List: stored runs, oldest first
+    """
+    try:
+        with open(metrics_store_path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return []
+    runs = []
+    for line in lines:
+        try:
+            runs.append(json.loads(line))
+        except json.JSONDecodeError:
+            logger.warning("Skipping a corrupt line in the metrics store")
+    return runs
+
+def get_latest_runs():
+    """Gets the latest training run of every model
+
+    Returns:
+        dict: latest run per model name
+    """
+    latest_runs = dict()
+    for run in read_runs():
+        latest_runs[run['model']] = run
+    return latest_runs
+
+def get_runs_by_model():
+    """Groups every training run by model with a single read of the store
+
+    Returns:
+        dict: runs of each model, oldest first
+    """
+    runs_by_model = dict()
+    for run in read_runs():
+        runs_by_model.setdefault(run['model'], []).append(run)
+    return runs_by_model
+
+def get_model_history(model):
+    """Gets all the training runs of a model to compare them
+
+    Args:
+        model (str): name of the model
+
+    Returns:
+        List: runs of the model, oldest first
+    """
+    return [run for run in read_runs() if run['model'] == model]
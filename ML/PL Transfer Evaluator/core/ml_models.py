@@ -2,12 +2,15 @@ import joblib
 import logging
 import numpy as np
 import os
-from . import ml_plots
+import time
+from . import feature_cache, hyperparam_search, metrics_store, ml_plots, neighbor_index, tree_compiler
+from .model_registry import registry
+from .prediction_cache import prediction_cache
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
 from sklearn.model_selection import train_test_split
-from sklearn.neighbors import KNeighborsRegressor
+from sklearn.neighbors import KNeighborsRegressor, NearestNeighbors
 from sklearn.preprocessing import StandardScaler
 from sklearn.tree import DecisionTreeRegressor
 from xgboost import XGBRegressor
@@ -17,7 +20,6 @@ logger = logging.getLogger(__name__)
 base_dir = os.path.dirname(os.path.abspath(__file__))
 data_path = os.path.join(base_dir, '../data/')
 data_models_path = os.path.join(base_dir, '../data/models/')
-data_metrics_path = os.path.join(base_dir, '../data/metrics/')
 
 slr_model_path = f"{data_models_path}linear_regression_model.joblib"
 mlr_model_path = f"{data_models_path}mutiple_linear_regression_model.joblib"
@@ -25,266 +27,573 @@ dtr_model_path = f"{data_models_path}decision_tree_model.joblib"
 knn_model_path = f"{data_models_path}knn_model.joblib"
 rf_model_path = f"{data_models_path}rf_model.joblib"
 xgb_model_path = f"{data_models_path}xgb_model.joblib"
+knn_index_path = f"{data_models_path}knn_neighbor_index.joblib"
+rf_compiled_path = f"{data_models_path}rf_compiled.joblib"
+xgb_compiled_path = f"{data_models_path}xgb_compiled.joblib"
 
 mlr_scaler_path = f"{data_path}mutiple_linear_regression_scaler.joblib"
 knn_scaler_path = f"{data_path}knn_scaler.joblib"
 
-def train_and_predict_simple_lr(df):
-    """Trains, predicts, generates metrics, plots and saves the SLR Model.
+corr_threshold = 0.2
+knn_sweep_max_k = 100
+
+estimator_classes = {
+    "dtr": DecisionTreeRegressor,
+    "knn": KNeighborsRegressor,
+    "rf": RandomForestRegressor,
+    "xgb": XGBRegressor,
+}
+default_params = {
+    "dtr": {"criterion": "squared_error", "max_depth": 8,
+            "min_samples_leaf": 2, "random_state": 42},
+    "knn": {"n_neighbors": 10},
+    "rf": {"n_estimators": 100, "random_state": 42},
+    "xgb": {"n_estimators": 100, "random_state": 42},
+}
+
+model_paths = {
+    "slr": slr_model_path,
+    "mlr": mlr_model_path,
+    "dtr": dtr_model_path,
+    "knn": knn_model_path,
+    "rf": rf_model_path,
+    "xgb": xgb_model_path,
+}
+scaler_paths = {
+    "mlr": mlr_scaler_path,
+    "knn": knn_scaler_path,
+}
+compiled_model_paths = {
+    "rf": rf_compiled_path,
+    "xgb": xgb_compiled_path,
+}
+model_names = {
+    "slr": "simple_linear_regression",
+    "mlr": "multiple_linear_regression",
+    "dtr": "decision_trees_regression",
+    "knn": "k_nearest_neighbors",
+    "rf": "random_forest",
+    "xgb": "xgboost",
+}
+
+def train_and_predict_simple_lr(df, training_data=None, use_cache=True):
+    """Trains, predicts, generates metrics, plot data and saves the SLR Model.
 
     Args:
         df (DataFrame): The players full dataset
+        training_data (dict, optional): shared features and train/test split
+        from prepare_training_data. Defaults to None, which computes them.
+        use_cache (bool, optional): load an existing saved model, and save
+        the new model, its metrics and plot. Defaults to True, False always
+        trains in memory without touching the saved files.
+
+    Returns:
+        estimator: the trained model
     """
-    try:
-        lr_model = joblib.load(slr_model_path)
-    except FileNotFoundError:
-        logger.info("No linear regression model found, creating new")
-        logger.info("Fetching best feature for linear regression model")
-        
-        corr_features = get_sorted_corr_features(df)
-        best_feature = corr_features.index[0]    
-        X = df[best_feature].to_numpy().reshape(-1,1)
-        y = df['value_eur'].to_numpy()
-        
-        logger.info("Splitting & training the linear regression")
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, 
-            y, 
-            test_size=0.2, 
-            random_state=42)
-        lr_model = LinearRegression()
-        lr_model.fit(X_train, y_train)
-        
-        logger.info("Predicting the linear regression model")
-        y_pred = lr_model.predict(X_test)
-        store_metrics("simple_linear_regression", y_test, y_pred)
-        ml_plots.plot_slr_scatter(lr_model, X_test, y_test)
+    if use_cache:
+        try:
+            lr_model = registry.get(slr_model_path)
+        except FileNotFoundError:
+            logger.info("No linear regression model found, creating new")
+        else:
+            logger.info("Existing linear regression model found!")
+            return lr_model
+        
+    logger.info("Fetching best feature for linear regression model")
+    
+    if training_data is None:
+        training_data = prepare_training_data(df)
+    best_feature = training_data['best_feature']
+    col = training_data['best_features'].index(best_feature)
+    
+    logger.info("Splitting & training the linear regression")
+    X_train, X_test, y_train, y_test = get_training_split(
+        training_data, columns=slice(col, col+1))
+    lr_model = LinearRegression()
+    lr_model.feature_names_ = [best_feature]
+    # least squares is solved in the input precision, so not in float32
+    X_train = X_train.astype(np.float64)
+    start = time.perf_counter()
+    lr_model.fit(X_train, y_train)
+    train_seconds = time.perf_counter() - start
+    lr_model.sufficient_stats_ = get_sufficient_stats(X_train, y_train)
+    
+    logger.info("Predicting the linear regression model")
+    start = time.perf_counter()
+    y_pred = lr_model.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+    if use_cache:
+        store_metrics("simple_linear_regression", y_test, y_pred, train_seconds,
+                      predict_seconds, df.attrs.get('fingerprint'))
+        ml_plots.save_slr_scatter_data(lr_model, X_test, y_test)
         
         logger.info("Saving the linear regression model")
         joblib.dump(lr_model, slr_model_path)
-    else:
-        logger.info("Existing linear regression model found!")
+    return lr_model
         
-def train_and_predict_multiple_lr(df):
+def train_and_predict_multiple_lr(df, training_data=None, use_cache=True):
     """Trains, predicts, generates metrics and saves the MLR Model.
 
     Args:
         df (DataFrame): The players full dataset
+        training_data (dict, optional): shared features and train/test split
+        from prepare_training_data. Defaults to None, which computes them.
+        use_cache (bool, optional): load an existing saved model, and save
+        the new model, its metrics and plot. Defaults to True, False always
+        trains in memory without touching the saved files.
+
+    Returns:
+        estimator: the trained model
     """
-    try:
-        mlr_model = joblib.load(mlr_model_path)
-    except FileNotFoundError:
-        logger.info("No multiple linear regression model found, creating new")
-        logger.info("Fetching best feature for multiple linear regression")
-        
-        best_features = get_best_corr_features(df)
-        X = df.loc[:,best_features].to_numpy()
-        y = df['value_eur'].to_numpy()
-        
-        scaler = StandardScaler()
-        X_std = scaler.fit_transform(X)
-        
-        logger.info("Splitting & training the multiple linear regression")
-        X_train, X_test, y_train, y_test = train_test_split(
-            X_std, 
-            y, 
-            test_size=0.2, 
-            random_state=42)
-        mlr_model = LinearRegression()
-        mlr_model.feature_names_ = best_features
-        mlr_model.fit(X_train, y_train)
-        
-        logger.info("Predicting the multiple linear regression model")
-        y_pred = mlr_model.predict(X_test)
-        store_metrics("multiple_linear_regression", y_test, y_pred)
+    if use_cache:
+        try:
+            mlr_model = registry.get(mlr_model_path)
+        except FileNotFoundError:
+            logger.info("No multiple linear regression model found, creating new")
+        else:
+            logger.info("Existing multiple linear regression model found!")
+            return mlr_model
+        
+    logger.info("Fetching best feature for multiple linear regression")
+    
+    if training_data is None:
+        training_data = prepare_training_data(df)
+    best_features = training_data['best_features']
+    scaler = training_data['scaler']
+    
+    logger.info("Splitting & training the multiple linear regression")
+    X_train, X_test, y_train, y_test = get_training_split(training_data, standardized=True)
+    mlr_model = LinearRegression()
+    mlr_model.feature_names_ = best_features
+    start = time.perf_counter()
+    mlr_model.fit(X_train, y_train)
+    train_seconds = time.perf_counter() - start
+    mlr_model.sufficient_stats_ = get_sufficient_stats(X_train, y_train)
+    
+    logger.info("Predicting the multiple linear regression model")
+    start = time.perf_counter()
+    y_pred = mlr_model.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+    if use_cache:
+        store_metrics("multiple_linear_regression", y_test, y_pred, train_seconds,
+                      predict_seconds, df.attrs.get('fingerprint'))
         
         logger.info("Saving the multiple linear regression model")
         joblib.dump(mlr_model, mlr_model_path)
         joblib.dump(scaler, mlr_scaler_path)
-    else:
-        logger.info("Existing multiple linear regression model found!")
+    return mlr_model
         
-def train_and_predict_dtr(df):
-    """Trains, predicts, generates metrics, plots and saves the DTR Model.
+def train_and_predict_dtr(df, training_data=None, use_cache=True):
+    """Trains, predicts, generates metrics and saves the DTR Model.
 
     Args:
         df (DataFrame): The players full dataset
+        training_data (dict, optional): shared features and train/test split
+        from prepare_training_data. Defaults to None, which computes them.
+        use_cache (bool, optional): load an existing saved model, and save
+        the new model, its metrics and plot. Defaults to True, False always
+        trains in memory without touching the saved files.
+
+    Returns:
+        estimator: the trained model
     """
-    try:
-        dtr_model = joblib.load(dtr_model_path)
-    except FileNotFoundError:
-        logger.info("No decision tree regressor model found, creating new")
-        logger.info("Fetching best feature for decision tree regressor")
-        
-        best_features = get_best_corr_features(df)
-        X = df.loc[:,best_features].to_numpy()
-        y = df['value_eur'].to_numpy()
-        
-        logger.info("Splitting & training the decision tree regressor")
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, 
-            y, 
-            test_size=0.2, 
-            random_state=42)
-        dtr_model = DecisionTreeRegressor(criterion = 'squared_error',
-                               max_depth=8,
-                               min_samples_leaf=2, 
-                               random_state=42)
-        dtr_model.feature_names_ = best_features
-        dtr_model.fit(X_train, y_train)
-        
-        logger.info("Predicting the decision tree regressor model")
-        y_pred = dtr_model.predict(X_test)
-        store_metrics("decision_trees_regression", y_test, y_pred)
-        ml_plots.plot_dt_plot_tree(dtr_model)
+    if use_cache:
+        try:
+            dtr_model = registry.get(dtr_model_path)
+        except FileNotFoundError:
+            logger.info("No decision tree regressor model found, creating new")
+        else:
+            logger.info("Existing decision tree regressor model found!")
+            return dtr_model
+        
+    logger.info("Fetching best feature for decision tree regressor")
+    
+    if training_data is None:
+        training_data = prepare_training_data(df)
+    best_features = training_data['best_features']
+    
+    logger.info("Splitting & training the decision tree regressor")
+    X_train, X_test, y_train, y_test = get_training_split(training_data)
+    dtr_model = DecisionTreeRegressor(**get_model_params("dtr"))
+    dtr_model.feature_names_ = best_features
+    start = time.perf_counter()
+    dtr_model.fit(X_train, y_train)
+    train_seconds = time.perf_counter() - start
+    
+    logger.info("Predicting the decision tree regressor model")
+    start = time.perf_counter()
+    y_pred = dtr_model.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+    if use_cache:
+        store_metrics("decision_trees_regression", y_test, y_pred, train_seconds,
+                      predict_seconds, df.attrs.get('fingerprint'))
         
         logger.info("Saving the decision tree regressor model")
         joblib.dump(dtr_model, dtr_model_path)
-    else:
-        logger.info("Existing decision tree regressor model found!")
+    return dtr_model
 
-def train_and_predict_knn(df):
-    """Trains, predicts, generates metrics, plots and saves the KNN Model.
+def train_and_predict_knn(df, training_data=None, use_cache=True):
+    """Trains, predicts, generates metrics, plot data and saves the KNN Model.
 
     Args:
         df (DataFrame): The players full dataset
+        training_data (dict, optional): shared features and train/test split
+        from prepare_training_data. Defaults to None, which computes them.
+        use_cache (bool, optional): load an existing saved model, and save
+        the new model, its metrics and plot. Defaults to True, False always
+        trains in memory without touching the saved files.
+
+    Returns:
+        estimator: the trained model
     """
-    try:
-        knn_model = joblib.load(knn_model_path)
-    except FileNotFoundError:
-        logger.info("No KNN model found, creating new")
-        logger.info("Fetching best feature for KNN regressor")
-        
-        best_features = get_best_corr_features(df)
-        X = df.loc[:,best_features].to_numpy()
-        y = df['value_eur'].to_numpy()
-        
-        scaler = StandardScaler()
-        X_std = scaler.fit_transform(X)
-        
-        logger.info("Splitting & training the KNN regressor")
-        X_train, X_test, y_train, y_test = train_test_split(
-            X_std, 
-            y, 
-            test_size=0.2, 
-            random_state=42)
-        
-        k = 10
-        knn_model = KNeighborsRegressor(n_neighbors=k)
-        knn_model.feature_names_ = best_features
-        knn_model.fit(X_train, y_train)
-        
-        logger.info("Predicting the KNN regressor model")
-        y_pred = knn_model.predict(X_test)
-        store_metrics("k_nearest_neighbors", y_test, y_pred)
+    if use_cache:
+        try:
+            knn_model = registry.get(knn_model_path)
+        except FileNotFoundError:
+            logger.info("No KNN model found, creating new")
+        else:
+            logger.info("Existing KNN regressor model found!")
+            if not os.path.exists(knn_index_path):
+                if not hasattr(knn_model, 'row_ids_'):
+                    training_data = training_data or prepare_training_data(df)
+                    knn_model.row_ids_ = training_data['train_idx']
+                save_knn_neighbor_index(knn_model)
+            return knn_model
+        
+    logger.info("Fetching best feature for KNN regressor")
+    
+    if training_data is None:
+        training_data = prepare_training_data(df)
+    best_features = training_data['best_features']
+    scaler = training_data['scaler']
+    
+    logger.info("Splitting & training the KNN regressor")
+    X_train, X_test, y_train, y_test = get_training_split(training_data, standardized=True)
+    
+    knn_model = KNeighborsRegressor(**get_model_params("knn"))
+    knn_model.feature_names_ = best_features
+    knn_model.row_ids_ = training_data['train_idx']
+    start = time.perf_counter()
+    knn_model.fit(X_train, y_train)
+    train_seconds = time.perf_counter() - start
+    
+    logger.info("Predicting the KNN regressor model")
+    start = time.perf_counter()
+    y_pred = knn_model.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+    if use_cache:
+        store_metrics("k_nearest_neighbors", y_test, y_pred, train_seconds,
+                      predict_seconds, df.attrs.get('fingerprint'))
         
         Ks, r2s, r2s_std = generate_plot_data_for_knn(X_train, X_test, y_train, y_test)
-        ml_plots.plot_knn(Ks, r2s, r2s_std)
+        ml_plots.save_knn_plot_data(Ks, r2s, r2s_std)
         
         logger.info("Saving the KNN regressor model")
         joblib.dump(knn_model, knn_model_path)
         joblib.dump(scaler, knn_scaler_path)
-    else:
-        logger.info("Existing KNN regressor model found!")
+        save_knn_neighbor_index(knn_model)
+    return knn_model
+
+def save_knn_neighbor_index(knn_model, path=knn_index_path):
+    """Builds the neighbor index over the standardized rows of the KNN
+    model and saves it, so that similar players are found without a scan.
+
+    Args:
+        knn_model (KNeighborsRegressor): fitted model with its row_ids_
+        path (str, optional): path of the index file. Defaults to
+        knn_index_path.
+    """
+    logger.info("Saving the KNN neighbor index")
+    # _fit_X holds the standardized rows the regressor was fitted on
+    index = neighbor_index.NeighborIndex(knn_model._fit_X, knn_model.row_ids_)
+    joblib.dump(index, path)
 
-def generate_plot_data_for_knn(X_train, X_test, y_train, y_test):
-    """Generates data needed for plotting KNN.
+def find_similar_players(X, n_neighbors=10):
+    """Finds the players closest to each row of features in the space of
+    the standardized KNN features, with one batched index query.
+
+    Args:
+        X (np array): 2D matrix of KNN input features, one row per player
+        n_neighbors (int, optional): players to find per row. Defaults to 10.
+
+    Raises:
+        FileNotFoundError: if the KNN model has not been trained yet
+
+    Returns:
+        tuple: distances and dataset row ids of the similar players, both
+        of shape (len(X), n_neighbors), closest first
+    """
+    scaler = registry.get(knn_scaler_path)
+    index = registry.get(knn_index_path)
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    return index.query(scaler.transform(X), n_neighbors)
+
+def generate_plot_data_for_knn(X_train, X_test, y_train, y_test, max_k=knn_sweep_max_k):
+    """Generates data needed for plotting KNN. The neighbors are searched
+    once for the largest K, and the prediction for every smaller K is the
+    running mean over the sorted neighbor targets.
 
     Args:
         X_train (np array): Input features training data
         X_test (np array): Input features test data
         y_train (np array): Training target values
         y_test (np array): Test target values
+        max_k (int, optional): largest K of the sweep. Defaults to
+        knn_sweep_max_k.
 
     Returns:
-        _type_: _description_
+        tuple: max K, R2 scores and their standard deviation for K=1..max K
     """
     logger.info("Generating plot data for KNN")
-    Ks = 100
-    r2s = np.zeros((Ks))
-    r2s_std = np.zeros((Ks))
-    for n in range(1,Ks+1):
-        knn_model_n = KNeighborsRegressor(n_neighbors = n).fit(X_train,y_train)
-        yhat = knn_model_n.predict(X_test)
-        r2s[n-1] = r2_score(y_test, yhat)
-        r2s_std[n-1] = np.std(yhat==y_test)/np.sqrt(yhat.shape[0])
+    Ks = min(max_k, len(X_train))
+    neighbors = NearestNeighbors(n_neighbors=Ks).fit(X_train)
+    neighbor_idx = neighbors.kneighbors(X_test, return_distance=False)
+    
+    # column n-1 holds the prediction of a KNN regressor with n neighbors
+    yhats = np.cumsum(y_train[neighbor_idx], axis=1, dtype=np.float64) / np.arange(1, Ks+1)
+    y_test = y_test.reshape(-1,1)
+    ss_res = ((y_test - yhats) ** 2).sum(axis=0)
+    ss_tot = ((y_test - y_test.mean()) ** 2).sum()
+    r2s = 1 - ss_res / ss_tot
+    r2s_std = np.std(yhats==y_test, axis=0)/np.sqrt(yhats.shape[0])
     return Ks,r2s,r2s_std
 
-def train_and_predict_rf(df):
-    """Trains, predicts, generates metrics, plots and saves the RF Model.
+def train_and_predict_rf(df, training_data=None, use_cache=True):
+    """Trains, predicts, generates metrics, plot data and saves the RF Model.
 
     Args:
         df (DataFrame): The players full dataset
+        training_data (dict, optional): shared features and train/test split
+        from prepare_training_data. Defaults to None, which computes them.
+        use_cache (bool, optional): load an existing saved model, and save
+        the new model, its metrics and plot. Defaults to True, False always
+        trains in memory without touching the saved files.
+
+    Returns:
+        estimator: the trained model
     """
-    try:
-        rf_model = joblib.load(rf_model_path)
-    except FileNotFoundError:
-        logger.info("No RF model found, creating new")
-        logger.info("Fetching best feature for random forest")
-        
-        best_features = get_best_corr_features(df)
-        X = df.loc[:,best_features].to_numpy()
-        y = df['value_eur'].to_numpy()
-        
-        logger.info("Splitting & training the random forest")
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, 
-            y, 
-            test_size=0.2, 
-            random_state=42)
-        
-        n_estimators = 100
-        rf_model = RandomForestRegressor(n_estimators=n_estimators, random_state=42)
-        rf_model.feature_names_ = best_features
-        rf_model.fit(X_train, y_train)
-        
-        logger.info("Predicting the random forest model")
-        y_pred = rf_model.predict(X_test)
-        store_metrics("random_forest", y_test, y_pred)
-        ml_plots.plot_random_forest(y_test, y_pred)
+    if use_cache:
+        try:
+            rf_model = registry.get(rf_model_path)
+        except FileNotFoundError:
+            logger.info("No RF model found, creating new")
+        else:
+            logger.info("Existing random forest model found!")
+            if not os.path.exists(rf_compiled_path):
+                save_compiled_model("rf", rf_model)
+            return rf_model
+        
+    logger.info("Fetching best feature for random forest")
+    
+    if training_data is None:
+        training_data = prepare_training_data(df)
+    best_features = training_data['best_features']
+    
+    logger.info("Splitting & training the random forest")
+    X_train, X_test, y_train, y_test = get_training_split(training_data)
+    
+    rf_model = RandomForestRegressor(**get_model_params("rf"))
+    rf_model.feature_names_ = best_features
+    start = time.perf_counter()
+    rf_model.fit(X_train, y_train)
+    train_seconds = time.perf_counter() - start
+    
+    logger.info("Predicting the random forest model")
+    start = time.perf_counter()
+    y_pred = rf_model.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+    if use_cache:
+        store_metrics("random_forest", y_test, y_pred, train_seconds,
+                      predict_seconds, df.attrs.get('fingerprint'))
+        ml_plots.save_random_forest_data(y_test, y_pred)
         
         logger.info("Saving the random forest model")
         joblib.dump(rf_model, rf_model_path)
-    else:
-        logger.info("Existing random forest model found!")
+        save_compiled_model("rf", rf_model)
+    return rf_model
         
-def train_and_predict_xgb(df):
-    """Trains, predicts, generates metrics, plots and saves the XGB Model.
+def train_and_predict_xgb(df, training_data=None, use_cache=True):
+    """Trains, predicts, generates metrics, plot data and saves the XGB Model.
 
     Args:
         df (DataFrame): The players full dataset
+        training_data (dict, optional): shared features and train/test split
+        from prepare_training_data. Defaults to None, which computes them.
+        use_cache (bool, optional): load an existing saved model, and save
+        the new model, its metrics and plot. Defaults to True, False always
+        trains in memory without touching the saved files.
+
+    Returns:
+        estimator: the trained model
     """
-    try:
-        xgb_model = joblib.load(xgb_model_path)
-    except FileNotFoundError:
-        logger.info("No XGBoost model found, creating new")
-        logger.info("Fetching best feature for XGBoost")
-        
-        best_features = get_best_corr_features(df)
-        X = df.loc[:,best_features].to_numpy()
-        y = df['value_eur'].to_numpy()
-        
-        logger.info("Splitting & training the XGBoost")
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, 
-            y, 
-            test_size=0.2, 
-            random_state=42)
-        
-        n_estimators = 100
-        xgb_model = XGBRegressor(n_estimators=n_estimators, random_state=42)
-        xgb_model.feature_names_ = best_features
-        xgb_model.fit(X_train, y_train)
-        
-        logger.info("Predicting the XGBoost model")
-        y_pred = xgb_model.predict(X_test)
-        store_metrics("xgboost", y_test, y_pred)
-        ml_plots.plot_xgboost(y_test, y_pred)
+    if use_cache:
+        try:
+            xgb_model = registry.get(xgb_model_path)
+        except FileNotFoundError:
+            logger.info("No XGBoost model found, creating new")
+        else:
+            logger.info("Existing XGBoost model found!")
+            if not os.path.exists(xgb_compiled_path):
+                save_compiled_model("xgb", xgb_model)
+            return xgb_model
+        
+    logger.info("Fetching best feature for XGBoost")
+    
+    if training_data is None:
+        training_data = prepare_training_data(df)
+    best_features = training_data['best_features']
+    
+    logger.info("Splitting & training the XGBoost")
+    X_train, X_test, y_train, y_test = get_training_split(training_data)
+    
+    xgb_model = XGBRegressor(**get_model_params("xgb"))
+    xgb_model.feature_names_ = best_features
+    start = time.perf_counter()
+    xgb_model.fit(X_train, y_train)
+    train_seconds = time.perf_counter() - start
+    
+    logger.info("Predicting the XGBoost model")
+    start = time.perf_counter()
+    y_pred = xgb_model.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+    if use_cache:
+        store_metrics("xgboost", y_test, y_pred, train_seconds,
+                      predict_seconds, df.attrs.get('fingerprint'))
+        ml_plots.save_xgboost_data(y_test, y_pred)
         
         logger.info("Saving the XGBoost model")
         joblib.dump(xgb_model, xgb_model_path)
-    else:
-        logger.info("Existing XGBoost model found!")
+        save_compiled_model("xgb", xgb_model)
+    return xgb_model
+
+def save_compiled_model(model_key, model, path=None):
+    """Flattens the trees of a tree ensemble into arrays and saves them, the
+    compiled model serves single rows without the estimator overhead.
+
+    Args:
+        model_key (str): key of the model, one of compiled_model_paths
+        model (estimator): the fitted ensemble
+        path (str, optional): path of the compiled model file. Defaults to
+        None, the model's compiled_model_paths entry.
+    """
+    logger.info(f"Saving the compiled {model_key} model")
+    compiled_path = path or compiled_model_paths[model_key]
+    # it is picked up as soon as it is newer than the model, never half written
+    joblib.dump(tree_compiler.compile_model(model), f"{compiled_path}.tmp")
+    os.replace(f"{compiled_path}.tmp", compiled_path)
+
+def get_model_params(model_key):
+    """Gets the settings of a model, the defaults overridden by the best
+    configuration of its last hyperparameter search.
+
+    Args:
+        model_key (str): key of the model
+
+    Returns:
+        dict: keyword arguments of the model's estimator
+    """
+    return {**default_params[model_key], **hyperparam_search.load_best_params(model_key)}
+
+def get_sufficient_stats(X, y):
+    """Gets the sufficient statistics of a least squares fit, so that a
+    linear regression can be updated with new rows without the old ones.
+
+    Args:
+        X (np array): Input features
+        y (np array): Target values
+
+    Returns:
+        dict: row count, X'X and X'y of the features with an intercept column
+    """
+    X1 = np.hstack([np.ones((len(X), 1)), np.asarray(X, dtype=np.float64)])
+    return {"n": len(X), "xtx": X1.T @ X1, "xty": X1.T @ y}
+
+def prepare_training_data(df):
+    """Selects the features, computes the train/test split and builds the
+    training matrices once, so that they can be shared by all the trainers.
+
+    Args:
+        df (DataFrame): The full dataset
+
+    Returns:
+        dict: best feature, best correlated features, the train/test row
+        indices and the matrices of build_training_matrices
+    """
+    logger.info("Preparing the features and train/test split")
+    corr_features = get_sorted_corr_features(df)
+    best_features = select_best_features(corr_features)
+    train_idx, test_idx = train_test_split(
+        np.arange(len(df)), 
+        test_size=0.2, 
+        random_state=42)
+    return {"best_feature": corr_features.index[0],
+            "best_features": best_features,
+            "train_idx": train_idx,
+            "test_idx": test_idx,
+            **build_training_matrices(df, best_features, train_idx, test_idx)}
+
+def build_training_matrices(df, best_features, train_idx, test_idx):
+    """Builds the one float32 matrix of the best features and its
+    standardized copy shared by all the trainers. The rows are ordered
+    training rows first, so every trainer's split is a pair of views. The
+    standardized copy is float64, the KNN distances and the MLR solve are
+    the same as with a matrix standardized from the float64 frame.
+
+    Args:
+        df (DataFrame): The full dataset
+        best_features (List): columns of the matrix
+        train_idx (np array): training row indices
+        test_idx (np array): test row indices
+
+    Returns:
+        dict: float32 matrix X, its float64 standardized copy X_std, the
+        float64 target values y, the number of training rows n_train and the scaler
+    """
+    order = np.concatenate([train_idx, test_idx])
+    X = np.empty((len(order), len(best_features)), dtype=np.float32)
+    for i, col in enumerate(best_features):
+        X[:, i] = df[col].to_numpy()[order]
+    y = df['value_eur'].to_numpy(dtype=np.float64)[order]
+    # the feature ratings are small integers, exact in float32, their
+    # standardized values are not. The scaler is fitted in the frame's row
+    # order, the order its sums were always taken in.
+    scaler = StandardScaler().fit(df.loc[:, best_features].to_numpy(dtype=np.float64))
+    X_std = scaler.transform(X.astype(np.float64), copy=False)
+    shared_bytes = X.nbytes + X_std.nbytes + y.nbytes
+    logger.info(f"Built the shared training matrices, {shared_bytes / 1024:,.1f} KiB")
+    return {"X": X, "X_std": X_std, "y": y, "n_train": len(train_idx), "scaler": scaler}
+
+def get_training_split(training_data, standardized=False, columns=slice(None)):
+    """Gets the train/test split of the shared training matrices as views,
+    without copying them.
+
+    Args:
+        training_data (dict): output of prepare_training_data
+        standardized (bool, optional): split the standardized matrix.
+        Defaults to False.
+        columns (slice, optional): columns to keep. Defaults to all of them.
+
+    Returns:
+        tuple: X_train, X_test, y_train, y_test
+    """
+    X = training_data['X_std' if standardized else 'X'][:, columns]
+    y, n_train = training_data['y'], training_data['n_train']
+    return X[:n_train], X[n_train:], y[:n_train], y[n_train:]
+
+def split_training_data(X, y, training_data):
+    """Splits the input features and target values with the shared
+    train/test row indices.
+
+    Args:
+        X (np array): Input features
+        y (np array): Target values
+        training_data (dict): output of prepare_training_data
+
+    Returns:
+        tuple: X_train, X_test, y_train, y_test
+    """
+    train_idx, test_idx = training_data['train_idx'], training_data['test_idx']
+    return X[train_idx], X[test_idx], y[train_idx], y[test_idx]
 
 def get_best_corr_features(df):
     """Gets the best correlated features from the dataframe.
@@ -295,40 +604,128 @@ def get_best_corr_features(df):
     Returns:
         List: best correlated features
     """
-    corr_features = get_sorted_corr_features(df)
-    best_features = [corr_features.index[i] for i in range(0,len(corr_features)) 
-                         if corr_features[i] > 0.2]
-    return best_features
-        
+    return select_best_features(get_sorted_corr_features(df))
+
+def select_best_features(corr_features):
+    """Selects the features correlated above the threshold
+
+    Args:
+        corr_features (Series): features sorted on the basis of corr values
+
+    Returns:
+        List: best correlated features
+    """
+    return [corr_features.index[i] for i in range(0,len(corr_features)) 
+                if corr_features.iloc[i] > corr_threshold]
 
 def get_sorted_corr_features(df):
-    """Sorts all features on the basis of corr values
+    """Sorts all features on the basis of corr values. The ranking is read
+    from the feature cache when the dataset fingerprint is known.
 
     Args:
         df (DataFrame): The full dataset
 
     Returns:
-        List: sorted correlated features
+        Series: sorted correlated features
     """
+    fingerprint = df.attrs.get('fingerprint')
+    if fingerprint:
+        corr_series = feature_cache.load_corr_features(fingerprint, corr_threshold)
+        if corr_series is not None:
+            return corr_series
+    
+    logger.info("Computing the feature correlations with value_eur")
     corr_series = (
-        df.corr()['value_eur']
+        df.corrwith(df['value_eur'])
           .drop('value_eur')
           .sort_values(ascending=False)
     )
+    if fingerprint:
+        feature_cache.save_corr_features(fingerprint, corr_threshold, corr_series)
     return corr_series
 
+def load_predictor(model_key, compiled=True):
+    """Gets a trained model along with the scaler it was trained with from
+    the model registry.
+
+    Args:
+        model_key (str): key of the model, one of model_paths
+        compiled (bool, optional): get the compiled model of a tree ensemble
+        when it is up to date with the saved model. Defaults to True, it is
+        the faster one for single rows and small batches.
+
+    Returns:
+        tuple: the fitted model and its scaler (None if no scaler is used)
+    """
+    model_path = model_paths[model_key]
+    compiled_path = compiled_model_paths.get(model_key)
+    if (compiled and compiled_path and os.path.exists(compiled_path)
+            and os.path.getmtime(compiled_path) >= os.path.getmtime(model_path)):
+        model_path = compiled_path
+    model = registry.get(model_path)
+    scaler = None
+    if model_key in scaler_paths:
+        scaler = registry.get(scaler_paths[model_key])
+    return model, scaler
+
+def get_feature_names(model):
+    """Gets the input features a model was trained with
+
+    Args:
+        model (estimator): fitted model
+
+    Returns:
+        List: input features trained with this model.
+    """
+    # SLR models saved before feature_names_ was stored were trained on overall
+    return getattr(model, 'feature_names_', ['overall'])
+
+def predict_values(predictor, X):
+    """Predicts the values for a whole matrix of players with one predict call.
+
+    Args:
+        predictor (tuple): model and scaler returned by load_predictor
+        X (np array): 2D matrix of input features, one row per player
+
+    Returns:
+        np array: predicted transfer values, one per row
+    """
+    model, scaler = predictor
+    X = np.asarray(X, dtype=np.float64)
+    if scaler is not None:
+        X = scaler.transform(X)
+    return model.predict(X)
+
+def predict_player_value(model_key, X):
+    """Predicts one player's value, memoized in the prediction cache for
+    the version of the saved model
+
+    Args:
+        model_key (str): key of the model, one of model_paths
+        X (np array): input features of the player
+
+    Returns:
+        float: predicted transfer value
+    """
+    features = tuple(float(x) for x in np.ravel(X))
+    version = os.stat(model_paths[model_key]).st_mtime_ns
+    value = prediction_cache.get(model_key, version, features)
+    if value is None:
+        X_test = np.array(features).reshape(1,-1)
+        value = float(predict_values(load_predictor(model_key), X_test)[0])
+        prediction_cache.put(model_key, version, features, value)
+    return value
+
 def predict_player_value_slr(overall):
     """Predicts the player's value using SLR
 
     Args:
         overall (int): overall feature from the dataset
     """
-    X_test = np.array([overall]).reshape(-1,1)
     logger.info("Predicting new player's value using linear regression")
-    lr_model = joblib.load(slr_model_path)
-    y_pred = lr_model.predict(X_test)
+    y_pred = predict_player_value("slr", [overall])
     print("Player's predicted transfer value using Linear Regression is " 
-          f"{y_pred[0]:,.2f}")
+          f"{y_pred:,.2f}")
     
 def get_mlr_feature_names():
     """Gets the feature name from MLR
@@ -336,7 +733,7 @@ def get_mlr_feature_names():
     Returns:
         List: input features trained with this model. 
     """
-    return joblib.load(mlr_model_path).feature_names_
+    return registry.get(mlr_model_path).feature_names_
 
 def get_dtr_feature_names():
     """Gets the feature name from DTR
@@ -344,7 +741,7 @@ def get_dtr_feature_names():
     Returns:
         List: input features trained with this model. 
     """
-    return joblib.load(dtr_model_path).feature_names_
+    return registry.get(dtr_model_path).feature_names_
 
 def get_knn_feature_names():
     """Gets the feature name from KNN
@@ -352,7 +749,7 @@ def get_knn_feature_names():
     Returns:
         List: input features trained with this model. 
     """
-    return joblib.load(knn_model_path).feature_names_
+    return registry.get(knn_model_path).feature_names_
 
 def get_rf_feature_names():
     """Gets the feature name from random forest
@@ -360,7 +757,7 @@ def get_rf_feature_names():
     Returns:
         List: input features trained with this model. 
     """
-    return joblib.load(rf_model_path).feature_names_
+    return registry.get(rf_model_path).feature_names_
 
 def get_xgb_feature_names():
     """Gets the feature name from XGB
@@ -368,7 +765,7 @@ def get_xgb_feature_names():
     Returns:
         List: input features trained with this model. 
     """
-    return joblib.load(xgb_model_path).feature_names_
+    return registry.get(xgb_model_path).feature_names_
 
 def predict_player_value_mlr(X):
     """Predicts the player's value using MLR
@@ -376,16 +773,10 @@ def predict_player_value_mlr(X):
     Args:
         X (np array): input features of the player to be tested.
     """
-    X_test = np.array(X).reshape(1,-1)
     logger.info("Predicting player's value using multiple linear regression")
-    
-    mlr_model = joblib.load(mlr_model_path)
-    scaler = joblib.load(mlr_scaler_path)
-    
-    X_test_std = scaler.transform(X_test)
-    y_pred = mlr_model.predict(X_test_std)
+    y_pred = predict_player_value("mlr", X)
     print("Player's predicted transfer value using multiple Linear " 
-          f"Regression is {y_pred[0]:,.2f}")
+          f"Regression is {y_pred:,.2f}")
     
 def predict_player_value_dtr(X):
     """Predicts the player's value using DTR
@@ -393,14 +784,10 @@ def predict_player_value_dtr(X):
     Args:
         X (np array): input features of the player to be tested.
     """
-    X_test = np.array(X).reshape(1,-1)
     logger.info("Predicting player's value using decision tree regressor")
-    
-    dtr_model = joblib.load(dtr_model_path)
-    
-    y_pred = dtr_model.predict(X_test)
+    y_pred = predict_player_value("dtr", X)
     print("Player's predicted transfer value using decision tree " 
-          f"regressor is {y_pred[0]:,.2f}")
+          f"regressor is {y_pred:,.2f}")
     
 def predict_player_value_knn(X):
     """Predicts the player's value using KNN
@@ -408,16 +795,10 @@ def predict_player_value_knn(X):
     Args:
         X (np array): input features of the player to be tested.
     """
-    X_test = np.array(X).reshape(1,-1)
     logger.info("Predicting player's value using KNN regressor")
-    
-    knn_model = joblib.load(knn_model_path)
-    
-    scaler = joblib.load(knn_scaler_path)
-    X_test_std = scaler.transform(X_test_std)
-    y_pred = knn_model.predict(X_test)
+    y_pred = predict_player_value("knn", X)
     print("Player's predicted transfer value using KNN " 
-          f"regressor is {y_pred[0]:,.2f}")
+          f"regressor is {y_pred:,.2f}")
     
 def predict_player_value_rf(X):
     """Predicts the player's value using RF
@@ -425,14 +806,10 @@ def predict_player_value_rf(X):
     Args:
         X (np array): input features of the player to be tested.
     """
-    X_test = np.array(X).reshape(1,-1)
     logger.info("Predicting player's value using random forest")
-    
-    rf_model = joblib.load(rf_model_path)
-    
-    y_pred = rf_model.predict(X_test)
+    y_pred = predict_player_value("rf", X)
     print("Player's predicted transfer value using random " 
-          f"forest is {y_pred[0]:,.2f}")
+          f"forest is {y_pred:,.2f}")
     
 def predict_player_value_xgb(X):
     """Predicts the player's value using XGB
@@ -440,57 +817,47 @@ def predict_player_value_xgb(X):
     Args:
         X (np array): input features of the player to be tested.
     """
-    X_test = np.array(X).reshape(1,-1)
     logger.info("Predicting player's value using XGBoost")
-    
-    xgb_model = joblib.load(xgb_model_path)
-    
-    y_pred = xgb_model.predict(X_test)
+    y_pred = predict_player_value("xgb", X)
     print("Player's predicted transfer value using XGBoost " 
-          f"is {y_pred[0]:,.2f}")
+          f"is {y_pred:,.2f}")
     
-def store_metrics(ml_model_name, y_test, y_pred):
-    """Stores the model scores for a model in a joblib file
+def store_metrics(ml_model_name, y_test, y_pred, train_seconds=None,
+                  predict_seconds=None, fingerprint=None):
+    """Appends the model scores of a training run to the metrics store
 
     Args:
         ml_model_name (str): name of the model
         y_test (np array): Test target values 
-        y_pred (_type_): Predicted target values
+        y_pred (np array): Predicted target values
+        train_seconds (float, optional): time taken to fit the model
+        predict_seconds (float, optional): time taken to predict the test data
+        fingerprint (str, optional): fingerprint of the dataset trained on
     """
+    mse = mean_squared_error(y_test, y_pred)
     metrics = {
-    "model": ml_model_name,
-    "r2": "{0:.3f}".format(r2_score(y_test, y_pred)),
-    "mae": "{0:.3f}".format(mean_absolute_error(y_test, y_pred)),
-    "mse": "{0:.3f}".format(mean_squared_error(y_test, y_pred)),
-    "rmse": "{0:.3f}".format(np.sqrt(mean_squared_error(y_test, y_pred)))
+    "r2": float(r2_score(y_test, y_pred)),
+    "mae": float(mean_absolute_error(y_test, y_pred)),
+    "mse": float(mse),
+    "rmse": float(np.sqrt(mse))
     }
-    joblib.dump(metrics, f"{data_metrics_path}{metrics['model']}.joblib")
+    metrics_store.append_run(ml_model_name, metrics, train_seconds,
+                             predict_seconds, fingerprint)
 
 def get_metrics_for_all_models():
-    """Gets the metric scores for all the models, stores and returns it
-    in a dictionary
+    """Gets the metric scores of the latest training run of every model
+    with a single read of the metrics store
 
     Returns:
         dict: metric scores for all the models
     """
-    all_metrics_dict = dict()
-    slr_metrics = joblib.load(f'{data_metrics_path}simple_linear_regression.joblib')
-    all_metrics_dict[slr_metrics['model']] = slr_metrics
-    
-    mlr_metrics = joblib.load(f'{data_metrics_path}multiple_linear_regression.joblib')
-    all_metrics_dict[mlr_metrics['model']] = mlr_metrics
-    
-    dtr_metrics = joblib.load(f'{data_metrics_path}decision_trees_regression.joblib')
-    all_metrics_dict[dtr_metrics['model']] = dtr_metrics
-    
-    knn_metrics = joblib.load(f'{data_metrics_path}k_nearest_neighbors.joblib')
-    all_metrics_dict[knn_metrics['model']] = knn_metrics
-    
-    rf_metrics = joblib.load(f'{data_metrics_path}random_forest.joblib')
-    all_metrics_dict[rf_metrics['model']] = rf_metrics
-    
-    xgb_metrics = joblib.load(f'{data_metrics_path}xgboost.joblib')
-    all_metrics_dict[xgb_metrics['model']] = xgb_metrics
-    
-    return all_metrics_dict
-    
\ No newline at end of file
+    return metrics_store.get_latest_runs()
+
+def get_metrics_history_for_all_models():
+    """Gets every stored training run grouped by model, so that the latest
+    run can be compared with the earlier ones
+
+    Returns:
+        dict: runs of each model, oldest first
+    """
+    return metrics_store.get_runs_by_model()
@@ -1,8 +1,7 @@
 import logging
 import os
-import matplotlib.pyplot as plt
-import matplotlib.image as mpimg
-from sklearn.tree import plot_tree
+import numpy as np
+from .model_registry import registry
 
 logger = logging.getLogger(__name__)
 
@@ -15,126 +14,235 @@ knn_plot_path = f'{data_plots_path}knn_plot.png'
 rf_plot_path = f'{data_plots_path}rf_plot.png'
 xgb_plot_path = f'{data_plots_path}xgb_plot.png'
 
-def plot_slr_scatter(lr_model, X_test, y_test):
-    """Generates a plot for simple linear regression model result over
-    test data.
+slr_scatter_data_path = f'{data_plots_path}slr_scatter_data.npz'
+knn_plot_data_path = f'{data_plots_path}knn_plot_data.npz'
+rf_plot_data_path = f'{data_plots_path}rf_plot_data.npz'
+xgb_plot_data_path = f'{data_plots_path}xgb_plot_data.npz'
+
+def save_plot_data(data_path, **arrays):
+    """Saves the arrays a plot needs, the plot itself is rendered on demand.
+    Any previously rendered png is now stale as the data file is newer.
+
+    Args:
+        data_path (str): path of the .npz plot data file
+    """
+    os.makedirs(data_plots_path, exist_ok=True)
+    np.savez(data_path, **arrays)
+
+def save_slr_scatter_data(lr_model, X_test, y_test):
+    """Saves the data of the simple linear regression scatter plot
 
     Args:
         lr_model (LinearRegression): linear regression model
         X_test (np array): Input test features
         y_test (np array): Test target values
     """
+    logger.info("Saving scatter plot data for simple linear regression")
+    save_plot_data(slr_scatter_data_path, X_test=X_test, y_test=y_test,
+                   coef=lr_model.coef_, intercept=lr_model.intercept_)
+
+def save_knn_plot_data(Ks, r2s, r2s_std):
+    """Saves the data of the plot of model R2 score corresponding to K value
+
+    Args:
+        Ks (int): max range of K value
+        r2s (np array): Array of R2 scores for all values of K
+        r2s_std (np array): Standard deviation of R2 scores for
+        all values of K
+    """
+    logger.info("Saving KNN plot data")
+    save_plot_data(knn_plot_data_path, Ks=Ks, r2s=r2s, r2s_std=r2s_std)
+
+def save_random_forest_data(y_test, y_pred):
+    """Saves the data of the random forest scatter plot
+
+    Args:
+        y_test (np array): Test target values
+        y_pred (np array): Predicted target values
+    """
+    logger.info("Saving random forest plot data")
+    save_plot_data(rf_plot_data_path, y_test=y_test, y_pred=y_pred)
+
+def save_xgboost_data(y_test, y_pred):
+    """Saves the data of the XGBoost scatter plot
+
+    Args:
+        y_test (np array): Test target values
+        y_pred (np array): Predicted target values
+    """
+    logger.info("Saving XGBoost plot data")
+    save_plot_data(xgb_plot_data_path, y_test=y_test, y_pred=y_pred)
+
+def new_figure():
+    """Creates a figure on the non-interactive Agg canvas, without going
+    through pyplot's global state.
+
+    Returns:
+        tuple: the figure and its axes
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    return fig, fig.add_subplot()
+
+def render_slr_scatter(data):
+    """Renders the scatter plot of the simple linear regression model result
+    over test data.
+
+    Args:
+        data (NpzFile): saved plot data
+
+    Returns:
+        Figure: the rendered figure
+    """
     logger.info("Generating scatter plot for simple linear regression")
-    plt.figure()
-    plt.scatter(X_test, y_test, color='blue')
-    plt.plot(X_test, lr_model.coef_ * X_test + lr_model.intercept_, '-r')
-    plt.savefig(slr_scatter_path)
-    plt.close()
-    
-def show_slr_scatter_plot():
-    """Gets the existing SLR scatter plot
+    fig, ax = new_figure()
+    X_test, y_test = data['X_test'], data['y_test']
+    ax.scatter(X_test, y_test, color='blue')
+    ax.plot(X_test, data['coef'] * X_test + data['intercept'], '-r')
+    return fig
+
+def render_dt_plot_tree(dt_model):
+    """Renders the plot tree of the decision tree
+
+    Args:
+        dt_model (DecisionTreeRegressor): DT model
+
+    Returns:
+        Figure: the rendered figure
     """
-    logger.info("Fetching existing simple linear regression plot")
-    show_existing_plot(slr_scatter_path)
-    
+    from sklearn.tree import plot_tree
+    logger.info("Generating decision tree regressor plot tree")
+    fig, ax = new_figure()
+    plot_tree(dt_model, ax=ax)
+    return fig
+
+def render_knn(data):
+    """Renders the plot of the model R2 score corresponding to K value
+
+    Args:
+        data (NpzFile): saved plot data
+
+    Returns:
+        Figure: the rendered figure
+    """
+    logger.info("Generating KNN scatter plot")
+    fig, ax = new_figure()
+    Ks, r2s, r2s_std = int(data['Ks']), data['r2s'], data['r2s_std']
+    ax.plot(range(1,Ks+1),r2s,'g')
+    ax.fill_between(range(1,Ks+1),r2s - 1 * r2s_std,r2s + 1 * r2s_std, alpha=0.10)
+    ax.legend(('R2 value', 'Standard Deviation'))
+    ax.set_ylabel('Model R2')
+    ax.set_xlabel('Number of Neighbors (K)')
+    return fig
+
+def render_predictions_vs_actual(data, title):
+    """Renders a scatter plot of the predicted against the actual values
+
+    Args:
+        data (NpzFile): saved plot data
+        title (str): title of the plot
+
+    Returns:
+        Figure: the rendered figure
+    """
+    logger.info(f"Generating {title} scatter plot")
+    fig, ax = new_figure()
+    y_test, y_pred = data['y_test'], data['y_pred']
+    ax.scatter(y_test, y_pred, alpha=0.5, color="blue",ec='k')
+    ax.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'k--', lw=2,label="perfect model")
+    ax.set_title(title)
+    ax.set_xlabel("Actual Values")
+    ax.set_ylabel("Predicted Values")
+    ax.legend()
+    return fig
+
+def get_plot(plot_path, source_path, render):
+    """Gets the png of a plot, rendering it only when it is missing or
+    older than the data it is rendered from.
+
+    Args:
+        plot_path (str): path of the cached png
+        source_path (str): path of the plot data or model file
+        render (function): renders the figure from the source file
+
+    Returns:
+        bool: True if the png is available, False if there is no source data
+    """
+    if not os.path.exists(source_path):
+        logger.warning(f"No plot data found at {source_path}")
+        return False
+    if (os.path.exists(plot_path)
+            and os.path.getmtime(plot_path) >= os.path.getmtime(source_path)):
+        return True
+    if source_path.endswith('.npz'):
+        with np.load(source_path) as data:
+            fig = render(data)
+    else:
+        fig = render(registry.get(source_path))
+    os.makedirs(data_plots_path, exist_ok=True)
+    fig.savefig(plot_path)
+    logger.info(f"Plot saved to {os.path.basename(plot_path)}")
+    return True
+
 def show_existing_plot(plot_path):
     """Generic function to fetch existing plot of any ML model
 
     Args:
         plot_path (str): path of the saved plot
     """
+    import matplotlib.pyplot as plt
+    import matplotlib.image as mpimg
     img = mpimg.imread(plot_path)
     plt.imshow(img)
     plt.axis("off")
     plt.show()
-    
-def plot_dt_plot_tree(dt_model):
-    """Generates a plot tree for the decision tree
+
+def show_plot(plot_path, source_path, render):
+    """Renders the plot if needed and displays it
 
     Args:
-        dt_model (DecisionTreeRegressor): DT model
+        plot_path (str): path of the cached png
+        source_path (str): path of the plot data or model file
+        render (function): renders the figure from the source file
     """
-    logger.info("Generating decision tree regressor plot tree")
-    plt.figure()
-    plot_tree(dt_model)
-    plt.savefig(dt_plot_tree_path)
-    plt.close()
-    
-def show_dt_plot_tree():
-    """Gets the existing DT scatter plot
-    """
-    logger.info("Fetching existing decision tree regressor plot tree")
-    show_existing_plot(dt_plot_tree_path)
-    
-def plot_knn(Ks, r2s, r2s_std):
-    """Plots the model R2 score corresponding to K value
+    if get_plot(plot_path, source_path, render):
+        show_existing_plot(plot_path)
+    else:
+        print("No plot available yet, the model has to be trained first.")
+
+def show_slr_scatter_plot():
+    """Gets the SLR scatter plot
+    """
+    logger.info("Fetching simple linear regression plot")
+    show_plot(slr_scatter_path, slr_scatter_data_path, render_slr_scatter)
+
+def show_dt_plot_tree(dt_model_path):
+    """Gets the DT plot tree
 
     Args:
-        Ks (int): max range of K value
-        r2s (np array): Array of R2 scores for all values of K
-        r2s_std (np array): Standard deviation of R2 scores for 
-        all values of K
+        dt_model_path (str): path of the saved decision tree model
     """
-    logger.info("Generating KNN scatter plot")
-    plt.figure()
-    plt.plot(range(1,Ks+1),r2s,'g')
-    plt.fill_between(range(1,Ks+1),r2s - 1 * r2s_std,r2s + 1 * r2s_std, alpha=0.10)
-    plt.legend(('R2 value', 'Standard Deviation'))
-    plt.ylabel('Model R2')
-    plt.xlabel('Number of Neighbors (K)')
-    plt.savefig(knn_plot_path)
-    plt.close()
-    
+    logger.info("Fetching decision tree regressor plot tree")
+    show_plot(dt_plot_tree_path, dt_model_path, render_dt_plot_tree)
+
 def show_knn_plot():
-    """Gets the existing KNN plot
+    """Gets the KNN plot
     """
-    logger.info("Fetching existing KNN plot")
-    show_existing_plot(knn_plot_path)
-    
-def plot_random_forest(y_test, y_pred):
-    """Generates a random forest scatter plot
+    logger.info("Fetching KNN plot")
+    show_plot(knn_plot_path, knn_plot_data_path, render_knn)
 
-    Args:
-        y_test (np array): Test target values
-        y_pred (np array): Predicted target values
-    """
-    logger.info("Generating random forest scatter plot")
-    plt.figure()
-    plt.scatter(y_test, y_pred, alpha=0.5, color="blue",ec='k')
-    plt.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'k--', lw=2,label="perfect model")
-    plt.title("Random Forest Predictions vs Actual")
-    plt.xlabel("Actual Values")
-    plt.ylabel("Predicted Values")
-    plt.legend()
-    plt.savefig(rf_plot_path)
-    plt.close()
-    
 def show_rf_plot():
-    """Gets the existing random forest plot
+    """Gets the random forest plot
     """
-    logger.info("Fetching existing random forest plot")
-    show_existing_plot(rf_plot_path)
-
-def plot_xgboost(y_test, y_pred):
-    """Generates a XGBoost scatter plot
+    logger.info("Fetching random forest plot")
+    show_plot(rf_plot_path, rf_plot_data_path,
+              lambda data: render_predictions_vs_actual(data, "Random Forest Predictions vs Actual"))
 
-    Args:
-        y_test (np array): Test target values
-        y_pred (np array): Predicted target values
-    """
-    logger.info("Generating XGBoost scatter plot")
-    plt.figure()
-    plt.scatter(y_test, y_pred, alpha=0.5, color="blue",ec='k')
-    plt.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'k--', lw=2,label="perfect model")
-    plt.title("XGBoost Predictions vs Actual")
-    plt.xlabel("Actual Values")
-    plt.ylabel("Predicted Values")
-    plt.legend()
-    plt.savefig(xgb_plot_path) 
-    plt.close()   
-    
 def show_xgb_plot():
-    """Gets the existing XGBoost plot
+    """Gets the XGBoost plot
     """
-    logger.info("Fetching existing XGBoost plot")
-    show_existing_plot(xgb_plot_path)
\ No newline at end of file
+    logger.info("Fetching XGBoost plot")
+    show_plot(xgb_plot_path, xgb_plot_data_path,
+              lambda data: render_predictions_vs_actual(data, "XGBoost Predictions vs Actual"))
@@ -0,0 +1,232 @@
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+import joblib
+import numpy as np
+from . import ml_models
+from .model_registry import registry
+
+logger = logging.getLogger(__name__)
+
+default_compress = 3
+latency_rounds = 200
+
+def get_model_files():
+    """Gets every joblib file under data/models/
+
+    Returns:
+        List: paths of the joblib files, sorted by name
+    """
+    return sorted(glob.glob(os.path.join(ml_models.data_models_path, '*.joblib')))
+
+def timed_load(path, mmap_mode=None):
+    """Loads a joblib file and times it
+
+    Returns:
+        tuple: load time in seconds and the loaded object
+    """
+    start = time.perf_counter()
+    obj = joblib.load(path, mmap_mode=mmap_mode)
+    return time.perf_counter() - start, obj
+
+def get_resident_memory():
+    """Gets the resident memory of the current process
+
+    Returns:
+        int: resident bytes, None if it can not be read on this platform
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return None
+
+def measure_load_memory(paths, mmap_mode=None):
+    """Loads the joblib files one after another, keeping them all loaded,
+    and measures how much the resident memory grows with each of them.
+    Memory-mapped arrays only become resident when they are read, and their
+    pages are shared with every other process mapping the same file.
+
+    Args:
+        paths (List): paths of the joblib files
+        mmap_mode (str, optional): joblib memory-map mode. Defaults to None.
+
+    Returns:
+        List: resident bytes added by every file, None if unknown
+    """
+    loaded, growth = [], []
+    for path in paths:
+        before = get_resident_memory()
+        loaded.append(joblib.load(path, mmap_mode=mmap_mode))
+        after = get_resident_memory()
+        growth.append(None if before is None else after - before)
+    return growth
+
+def get_load_memory(paths, mmap_mode=None):
+    """Measures the resident memory of loading the joblib files in a fresh
+    process, so that nothing is already loaded or freed memory reused.
+
+    Args:
+        paths (List): paths of the joblib files
+        mmap_mode (str, optional): joblib memory-map mode. Defaults to None.
+
+    Returns:
+        List: resident bytes added by every file, None if unknown
+    """
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(measure_load_memory, paths, mmap_mode).result()
+
+def get_scaler(path):
+    """Gets the scaler the inputs of a persisted model or index are
+    standardized with before they are predicted or queried
+
+    Args:
+        path (str): path of the joblib file
+
+    Returns:
+        StandardScaler: the saved scaler, None if the inputs are not scaled
+        or the scaler is not saved
+    """
+    scaled_paths = {os.path.normpath(ml_models.model_paths[model_key]): scaler_path
+                    for model_key, scaler_path in ml_models.scaler_paths.items()}
+    scaled_paths[os.path.normpath(ml_models.knn_index_path)] = ml_models.knn_scaler_path
+    scaler_path = scaled_paths.get(os.path.normpath(path))
+    if scaler_path is None:
+        return None
+    try:
+        return registry.get(scaler_path)
+    except FileNotFoundError:
+        logger.warning(f"No saved scaler for {os.path.basename(path)}, timing unscaled rows")
+        return None
+
+def get_latency(obj, df, rounds=latency_rounds, scaler=None):
+    """Measures the single-row and batched per-row latency of a model, or
+    of a neighbor index query
+
+    Args:
+        obj (object): the loaded model or index
+        df (DataFrame): The players full dataset
+        rounds (int, optional): single rows timed. Defaults to latency_rounds.
+        scaler (StandardScaler, optional): scaler the rows are standardized
+        with before the timing, as the predictions do. Defaults to None.
+
+    Returns:
+        tuple: single-row and batched per-row latency in milliseconds, None
+        for objects that do not predict
+    """
+    if hasattr(obj, 'predict'):
+        X = df.loc[:, ml_models.get_feature_names(obj)].to_numpy(dtype=np.float64)
+        run = obj.predict
+    elif hasattr(obj, 'query'):
+        X = df.loc[:, ml_models.get_knn_feature_names()].to_numpy(dtype=np.float64)
+        run = lambda rows: obj.query(rows, 10)
+    else:
+        return None, None
+    if scaler is not None:
+        X = scaler.transform(X)
+    rounds = min(rounds, len(X))
+    start = time.perf_counter()
+    for i in range(rounds):
+        run(X[i:i+1])
+    single_ms = (time.perf_counter() - start) / rounds * 1000
+    start = time.perf_counter()
+    run(X)
+    batch_ms = (time.perf_counter() - start) / len(X) * 1000
+    return single_ms, batch_ms
+
+def profile_model_file(path, df, mmap_mode=None):
+    """Profiles one persisted model: on-disk size, load time and
+    prediction latency
+
+    Args:
+        path (str): path of the joblib file
+        df (DataFrame): The players full dataset, used for the latency
+        mmap_mode (str, optional): joblib memory-map mode of the load.
+        Defaults to None, which reads the arrays into memory.
+
+    Returns:
+        dict: profile of the file
+    """
+    logger.info(f"Profiling {os.path.basename(path)}")
+    load_seconds, obj = timed_load(path, mmap_mode)
+    single_ms, batch_ms = get_latency(obj, df, scaler=get_scaler(path))
+    return {"file": os.path.basename(path),
+            "mmap_mode": mmap_mode,
+            "size_bytes": os.path.getsize(path),
+            "load_ms": load_seconds * 1000,
+            "predict_single_ms": single_ms,
+            "predict_batch_row_ms": batch_ms}
+
+def profile_compressed(path, compress=default_compress):
+    """Profiles a compressed copy of a persisted model, without changing it
+
+    Args:
+        path (str): path of the joblib file
+        compress (int, optional): zlib level. Defaults to default_compress.
+
+    Returns:
+        dict: compressed size and load time of the copy
+    """
+    obj = joblib.load(path)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = os.path.join(tmp_dir, os.path.basename(path))
+        joblib.dump(obj, tmp_path, compress=compress)
+        load_seconds, _ = timed_load(tmp_path)
+        return {"compressed_size_bytes": os.path.getsize(tmp_path),
+                "compressed_load_ms": load_seconds * 1000}
+
+def profile_models(df, mmap_mode=None, compare_compressed=False):
+    """Profiles every joblib file under data/models/
+
+    Args:
+        df (DataFrame): The players full dataset
+        mmap_mode (str, optional): joblib memory-map mode of the loads
+        compare_compressed (bool, optional): also profile a compressed copy
+        of every file. Defaults to False.
+
+    Returns:
+        List: profile of every file
+    """
+    paths = get_model_files()
+    profiles = []
+    for path in paths:
+        profile = profile_model_file(path, df, mmap_mode)
+        if compare_compressed:
+            profile.update(profile_compressed(path))
+        profiles.append(profile)
+    for profile, memory in zip(profiles, get_load_memory(paths, mmap_mode)):
+        profile["memory_bytes"] = memory
+    return profiles
+
+def rewrite_models(compress):
+    """Saves every joblib file under data/models/ again, compressed to
+    save disk space, or uncompressed so that it can be memory-mapped
+
+    Args:
+        compress (int): zlib level, 0 for uncompressed files
+
+    Returns:
+        dict: size of every file before and after
+    """
+    sizes = dict()
+    for path in get_model_files():
+        stat = os.stat(path)
+        obj = joblib.load(path)
+        # os.replace keeps the file whole for a service loading it meanwhile
+        joblib.dump(obj, f"{path}.tmp", compress=compress)
+        os.replace(f"{path}.tmp", path)
+        # same content, the compiled models must stay newer than their models
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        sizes[os.path.basename(path)] = (stat.st_size, os.path.getsize(path))
+        logger.info(f"Rewrote {os.path.basename(path)} with compress={compress}")
+    return sizes
@@ -0,0 +1,74 @@
+import joblib
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+class ModelRegistry:
+    """ Keeps the persisted models and scalers in memory so every joblib file
+    is deserialized once, and reloaded only when the file on disk changes.
+    With an mmap_mode the numpy arrays of uncompressed files are memory-mapped,
+    so processes loading the same file share one copy of them.
+    """
+    def __init__(self, mmap_mode=None):
+        self.mmap_mode = mmap_mode
+        self.entries = dict()
+        self.loads = 0
+        self.hits = 0
+        self.lock = threading.Lock()
+
+    def get(self, path):
+        """Gets the object saved in a joblib file, loading it on first use
+        or when the file's mtime has changed since it was loaded.
+
+        Args:
+            path (str): path of the joblib file
+
+        Raises:
+            FileNotFoundError: if the joblib file does not exist
+
+        Returns:
+            object: the deserialized model or scaler
+        """
+        path = os.path.abspath(path)
+        mtime = os.stat(path).st_mtime_ns
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry and entry[0] == mtime:
+                self.hits += 1
+                return entry[1]
+            if entry:
+                logger.info(f"{os.path.basename(path)} changed on disk, reloading")
+            else:
+                logger.info(f"Loading {os.path.basename(path)} into the registry")
+            obj = joblib.load(path, mmap_mode=self.mmap_mode)
+            self.entries[path] = (mtime, obj)
+            self.loads += 1
+            return obj
+
+    def invalidate(self, path=None):
+        """Drops one entry, or every entry, from the registry
+
+        Args:
+            path (str, optional): path of the joblib file to drop. Defaults
+            to None, which drops all the entries.
+        """
+        with self.lock:
+            if path is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(os.path.abspath(path), None)
+
+    def stats(self):
+        """Gets the registry counters
+
+        Returns:
+            dict: number of loads, hits and resident entries
+        """
+        with self.lock:
+            return {"loads": self.loads,
+                    "hits": self.hits,
+                    "resident": len(self.entries)}
+
+registry = ModelRegistry()
@@ -0,0 +1,115 @@
+import logging
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.neighbors import BallTree, KDTree
+
+logger = logging.getLogger(__name__)
+
+kd_tree_max_features = 15
+approximate_min_rows = 200000
+default_leaf_size = 40
+default_n_probe = 8
+
+def get_index_method(n_rows, n_features):
+    """Chooses the index for a matrix. A KD-tree stays exact and fast for
+    the few features of the players dataset at any size, a ball tree
+    prunes better once there are too many features for a KD-tree, and a
+    large matrix with many features gets the approximate quantized index.
+
+    Args:
+        n_rows (int): rows of the indexed matrix
+        n_features (int): columns of the indexed matrix
+
+    Returns:
+        str: kd_tree, ball_tree or ivf
+    """
+    if n_features <= kd_tree_max_features:
+        return "kd_tree"
+    return "ivf" if n_rows >= approximate_min_rows else "ball_tree"
+
+class QuantizedIVFIndex:
+    """ Approximate nearest neighbor index: the rows are clustered into
+    inverted lists by k-means, stored as 8-bit codes, and a query only
+    scans the lists of its n_probe closest centroids.
+    """
+    def __init__(self, X, n_lists=None, n_probe=default_n_probe, random_state=42):
+        X = np.asarray(X, dtype=np.float32)
+        n_lists = n_lists or max(1, int(np.sqrt(len(X))))
+        self.n_probe = n_probe
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, n_init=3,
+                                 random_state=random_state).fit(X)
+        self.centroids = kmeans.cluster_centers_.astype(np.float32)
+        lists = kmeans.labels_
+        # rows sorted by list, the rows of list i are order[offsets[i]:offsets[i+1]]
+        self.order = np.argsort(lists, kind='stable')
+        self.offsets = np.searchsorted(lists[self.order], np.arange(n_lists + 1))
+        self.mins = X.min(axis=0)
+        self.scales = (X.max(axis=0) - self.mins) / 255
+        self.scales[self.scales == 0] = 1
+        self.codes = np.round((X[self.order] - self.mins) / self.scales).astype(np.uint8)
+
+    def query(self, X, k):
+        """Finds the approximate k nearest rows of every query row
+
+        Args:
+            X (np array): 2D matrix of query rows
+            k (int): neighbors per query
+
+        Returns:
+            tuple: distances and row positions, both of shape (len(X), k),
+            sorted by distance
+        """
+        X = np.asarray(X, dtype=np.float32)
+        k = min(k, len(self.order))
+        distances = np.empty((len(X), k), dtype=np.float64)
+        positions = np.empty((len(X), k), dtype=np.intp)
+        centroid_distances = ((X[:, None, :] - self.centroids[None, :, :]) ** 2).sum(axis=2)
+        for i, x in enumerate(X):
+            lists = np.argsort(centroid_distances[i])
+            # probe more lists when the closest ones hold fewer than k rows
+            sizes = np.cumsum(self.offsets[lists + 1] - self.offsets[lists])
+            n_probe = max(self.n_probe, int(np.searchsorted(sizes, k)) + 1)
+            candidates = np.concatenate([np.arange(self.offsets[l], self.offsets[l + 1])
+                                         for l in lists[:n_probe]])
+            rows = self.codes[candidates] * self.scales + self.mins
+            candidate_distances = ((rows - x) ** 2).sum(axis=1)
+            nearest = np.argpartition(candidate_distances, k - 1)[:k]
+            nearest = nearest[np.argsort(candidate_distances[nearest])]
+            distances[i] = np.sqrt(candidate_distances[nearest])
+            positions[i] = self.order[candidates[nearest]]
+        return distances, positions
+
+class NeighborIndex:
+    """ Spatial index over the standardized training matrix of the KNN
+    model, mapping the neighbors found back to dataset row ids.
+    """
+    def __init__(self, X, row_ids, method=None, leaf_size=default_leaf_size):
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        self.row_ids = np.asarray(row_ids)
+        self.method = method or get_index_method(*X.shape)
+        if self.method == "ivf":
+            self.index = QuantizedIVFIndex(X)
+        elif self.method == "ball_tree":
+            self.index = BallTree(X, leaf_size=leaf_size)
+        else:
+            self.index = KDTree(X, leaf_size=leaf_size)
+        logger.info(f"Built a {self.method} neighbor index over {len(X)} rows")
+
+    def query(self, X, n_neighbors):
+        """Finds the nearest indexed rows of a batch of query rows
+
+        Args:
+            X (np array): 2D matrix of standardized query rows
+            n_neighbors (int): neighbors per query
+
+        Returns:
+            tuple: distances and dataset row ids, both of shape
+            (len(X), n_neighbors), closest first
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        n_neighbors = min(n_neighbors, len(self.row_ids))
+        if self.method == "ivf":
+            distances, positions = self.index.query(X, n_neighbors)
+        else:
+            distances, positions = self.index.query(X, k=n_neighbors)
+        return distances, self.row_ids[positions]
@@ -0,0 +1,230 @@
+import logging
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+from . import data_loader, ml_models
+from .model_registry import registry
+
+logger = logging.getLogger(__name__)
+
+# cleanup_dataframe drops the text columns, they are read back for the answers
+label_columns = ['short_name', 'club_position']
+default_n_players = 10
+
+class PlayerSearchIndex:
+    """ Similarity search over the standardized feature matrix of the whole
+    dataset, with value_eur, age and position filters. value_eur and age
+    are kept argsorted and every position keeps its rows, so a filter
+    selects its candidates with a binary search or a lookup, and only the
+    candidates of the most selective filter are scanned for distances.
+    """
+    def __init__(self, df, labels, feature_names, scaler):
+        self.feature_names = feature_names
+        self.scaler = scaler
+        X = df.loc[:, feature_names].to_numpy(dtype=np.float64)
+        self.X = np.ascontiguousarray(scaler.transform(X), dtype=np.float32)
+        self.names = labels['short_name'].to_numpy(dtype=object)
+        self.positions = labels['club_position'].to_numpy(dtype=object)
+        self.values = df['value_eur'].to_numpy(dtype=np.float64)
+        self.ages = df['age'].to_numpy(dtype=np.float64)
+        self.value_order = np.argsort(self.values, kind='stable')
+        self.sorted_values = self.values[self.value_order]
+        self.age_order = np.argsort(self.ages, kind='stable')
+        self.sorted_ages = self.ages[self.age_order]
+        position_codes, position_ids = np.unique(self.positions.astype(str),
+                                                 return_inverse=True)
+        self.position_rows = {code: np.flatnonzero(position_ids == i)
+                              for i, code in enumerate(position_codes)}
+        self.name_rows = dict()
+        for row, name in enumerate(self.names):
+            self.name_rows.setdefault(str(name).lower(), row)
+
+    def get_range(self, order, sorted_column, low, high):
+        """Gets the rows with a column value between low and high
+
+        Returns:
+            np array: row positions, None if the range is not bounded
+        """
+        if low is None and high is None:
+            return None
+        start = 0 if low is None else np.searchsorted(sorted_column, low, side='left')
+        end = len(order) if high is None else np.searchsorted(sorted_column, high, side='right')
+        return order[start:end]
+
+    def get_candidates(self, min_value=None, max_value=None, min_age=None,
+                       max_age=None, positions=None):
+        """Gets the rows passing every filter. The smallest of the filtered
+        sets is taken from its index and the other filters are checked on
+        its rows only.
+
+        Args:
+            min_value (float, optional): lowest value_eur
+            max_value (float, optional): highest value_eur
+            min_age (int, optional): youngest age
+            max_age (int, optional): oldest age
+            positions (List, optional): club_position codes, any of them
+
+        Returns:
+            np array: row positions, None if no filter is given
+        """
+        candidates = []
+        value_rows = self.get_range(self.value_order, self.sorted_values, min_value, max_value)
+        if value_rows is not None:
+            candidates.append(("value", value_rows))
+        age_rows = self.get_range(self.age_order, self.sorted_ages, min_age, max_age)
+        if age_rows is not None:
+            candidates.append(("age", age_rows))
+        if positions:
+            codes = {code.upper() for code in positions}
+            position_rows = [self.position_rows[code] for code in codes
+                             if code in self.position_rows]
+            candidates.append(("position", np.concatenate(position_rows)
+                               if position_rows else np.empty(0, dtype=np.intp)))
+        if not candidates:
+            return None
+
+        driver, rows = min(candidates, key=lambda candidate: len(candidate[1]))
+        if driver != "value" and value_rows is not None:
+            values = self.values[rows]
+            if min_value is not None:
+                rows = rows[values >= min_value]
+                values = self.values[rows]
+            if max_value is not None:
+                rows = rows[values <= max_value]
+        if driver != "age" and age_rows is not None:
+            ages = self.ages[rows]
+            if min_age is not None:
+                rows = rows[ages >= min_age]
+                ages = self.ages[rows]
+            if max_age is not None:
+                rows = rows[ages <= max_age]
+        if driver != "position" and positions:
+            rows = rows[np.isin(self.positions[rows], list(codes))]
+        return rows
+
+    def search(self, x, n=default_n_players, exclude=None, **filters):
+        """Finds the players closest to a standardized feature row among
+        the players passing the filters
+
+        Args:
+            x (np array): standardized features of the query
+            n (int, optional): players to return. Defaults to default_n_players.
+            exclude (int, optional): row position left out of the answer,
+            the queried player itself
+            **filters: min_value, max_value, min_age, max_age and positions,
+            as in get_candidates
+
+        Returns:
+            List: records of the closest players, nearest first
+        """
+        rows = self.get_candidates(**filters)
+        if rows is None:
+            rows = np.arange(len(self.X))
+        if exclude is not None:
+            rows = rows[rows != exclude]
+        diff = self.X[rows] - np.asarray(x, dtype=np.float32)
+        distances = np.einsum('ij,ij->i', diff, diff)
+        if len(rows) > n:
+            nearest = np.argpartition(distances, n)[:n]
+        else:
+            nearest = np.arange(len(rows))
+        nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+        return [{"row_id": int(rows[i]),
+                 "short_name": self.names[rows[i]],
+                 "club_position": self.positions[rows[i]],
+                 "age": int(self.ages[rows[i]]),
+                 "value_eur": float(self.values[rows[i]]),
+                 "distance": float(np.sqrt(distances[i]))}
+                for i in nearest]
+
+    def search_features(self, features, n=default_n_players, **filters):
+        """Finds the players closest to a feature row in the dataset's scale
+
+        Args:
+            features (dict): value of every search feature
+            n (int, optional): players to return. Defaults to default_n_players.
+            **filters: filters of get_candidates
+
+        Returns:
+            List: records of the closest players, nearest first
+        """
+        X = np.array([[features[name] for name in self.feature_names]], dtype=np.float64)
+        return self.search(self.scaler.transform(X)[0], n, **filters)
+
+    def find_player(self, name):
+        """Gets the row of a player by short name, ignoring the case
+
+        Raises:
+            KeyError: if no player has the name
+
+        Returns:
+            int: row position of the first player with the name
+        """
+        try:
+            return self.name_rows[name.lower()]
+        except KeyError:
+            raise KeyError(f"No player named {name}") from None
+
+    def search_like(self, name, n=default_n_players, **filters):
+        """Finds the players closest to a player of the dataset
+
+        Args:
+            name (str): short name of the player
+            n (int, optional): players to return. Defaults to default_n_players.
+            **filters: filters of get_candidates
+
+        Returns:
+            List: records of the closest players, nearest first
+        """
+        row = self.find_player(name)
+        return self.search(self.X[row], n, exclude=row, **filters)
+
+def get_search_features(df):
+    """Gets the features and scaler of the search, the ones of the KNN
+    model when it is trained, else the best correlated features scaled on
+    the dataset
+
+    Args:
+        df (DataFrame): The players full dataset
+
+    Returns:
+        tuple: feature names and fitted scaler
+    """
+    try:
+        knn_model = registry.get(ml_models.knn_model_path)
+        return ml_models.get_feature_names(knn_model), registry.get(ml_models.knn_scaler_path)
+    except FileNotFoundError:
+        logger.info("No KNN model found, scaling the best correlated features")
+        feature_names = ml_models.get_best_corr_features(df)
+        return feature_names, StandardScaler().fit(df.loc[:, feature_names].to_numpy())
+
+def load_labels(path=data_loader.data_path):
+    """Reads the player names and positions that the cleaned up dataset drops
+
+    Args:
+        path (str, optional): path of the csv file. Defaults to data_loader.data_path.
+
+    Returns:
+        DataFrame: short_name and club_position of every row
+    """
+    return pd.read_csv(path, usecols=label_columns).fillna('')
+
+def build_search_index(df=None, labels=None):
+    """Builds the similarity search index of the players dataset
+
+    Args:
+        df (DataFrame, optional): The players full dataset. Defaults to None,
+        which loads it.
+        labels (DataFrame, optional): short_name and club_position of every
+        row. Defaults to None, which reads them from the csv file.
+
+    Returns:
+        PlayerSearchIndex: the search index
+    """
+    if df is None:
+        df = data_loader.load_dataset()
+    if labels is None:
+        labels = load_labels()
+    feature_names, scaler = get_search_features(df)
+    logger.info(f"Building the player search index of {len(df)} players")
+    return PlayerSearchIndex(df, labels, feature_names, scaler)
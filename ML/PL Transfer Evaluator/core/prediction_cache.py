@@ -0,0 +1,152 @@
+from collections import OrderedDict
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+data_models_path = os.path.join(base_dir, '../data/models/')
+prediction_cache_db_path = f"{data_models_path}prediction_cache.sqlite"
+
+default_max_entries = 4096
+
+class PredictionCache:
+    """ Bounded LRU cache of single player predictions, keyed by the model,
+    the version of its saved file and the exact feature values. Saving a
+    model again changes its version, so the stale predictions are never
+    returned and age out of the cache. An optional sqlite tier keeps the
+    predictions across restarts, keyed by the model version too, so
+    processes sharing it at different versions never read each other's
+    rows. A model's rows of older versions are dropped when its file
+    changes.
+    """
+    def __init__(self, max_entries=default_max_entries, disk_path=None):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        self.connection = None
+        self.disk_versions = dict()
+        if disk_path:
+            self.enable_disk(disk_path)
+
+    def enable_disk(self, disk_path=prediction_cache_db_path):
+        """Adds the on-disk tier, creating its sqlite database if needed
+
+        Args:
+            disk_path (str, optional): path of the sqlite database. Defaults
+            to prediction_cache_db_path.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+        with self.lock:
+            self.connection = sqlite3.connect(disk_path, check_same_thread=False)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS predictions (model TEXT, version INTEGER, "
+                "features TEXT, value REAL, PRIMARY KEY (model, version, features))")
+            self.connection.commit()
+            self.disk_versions.clear()
+        logger.info(f"Prediction cache persisted to {os.path.basename(disk_path)}")
+
+    def drop_stale_rows(self, model, version):
+        """Deletes the disk rows of a model saved by an earlier version of its
+        file, once per version. The rows of newer versions are kept for the
+        processes already using them. Called with the lock held.
+        """
+        if self.disk_versions.get(model) == version:
+            return
+        deleted = self.connection.execute(
+            "DELETE FROM predictions WHERE model = ? AND version < ?",
+            (model, version)).rowcount
+        self.connection.commit()
+        if deleted:
+            logger.info(f"Dropped {deleted} cached predictions of the previous {model} model")
+        self.disk_versions[model] = version
+
+    def get(self, model, version, features):
+        """Gets a memoized prediction
+
+        Args:
+            model (str): key of the model
+            version (int): version of the saved model, its file's mtime
+            features (tuple): feature values of the player
+
+        Returns:
+            float: the predicted value, None if it is not cached
+        """
+        key = (model, version, features)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            if self.connection is not None:
+                self.drop_stale_rows(model, version)
+                row = self.connection.execute(
+                    "SELECT value FROM predictions "
+                    "WHERE model = ? AND version = ? AND features = ?",
+                    (model, version, json.dumps(features))).fetchone()
+                if row is not None:
+                    self.disk_hits += 1
+                    self.store(key, row[0])
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, model, version, features, value):
+        """Memoizes a prediction, evicting the least recently used one when
+        the cache is full
+
+        Args:
+            model (str): key of the model
+            version (int): version of the saved model, its file's mtime
+            features (tuple): feature values of the player
+            value (float): the predicted value
+        """
+        with self.lock:
+            self.store((model, version, features), value)
+            if self.connection is not None:
+                self.drop_stale_rows(model, version)
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                    (model, version, json.dumps(features), value))
+                self.connection.commit()
+
+    def store(self, key, value):
+        """Adds an entry to the memory tier. Called with the lock held.
+        """
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drops every memoized prediction, from both tiers
+        """
+        with self.lock:
+            self.entries.clear()
+            if self.connection is not None:
+                self.connection.execute("DELETE FROM predictions")
+                self.connection.commit()
+
+    def stats(self):
+        """Gets the cache counters
+
+        Returns:
+            dict: number of hits, disk hits, misses, evictions and resident
+            entries
+        """
+        with self.lock:
+            return {"hits": self.hits,
+                    "disk_hits": self.disk_hits,
+                    "misses": self.misses,
+                    "evictions": self.evictions,
+                    "resident": len(self.entries)}
+
+prediction_cache = PredictionCache()
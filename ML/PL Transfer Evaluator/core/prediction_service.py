@@ -0,0 +1,245 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import time
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+from . import ml_models
+from .model_registry import registry
+
+logger = logging.getLogger(__name__)
+
+max_body_size = 64 * 1024 * 1024
+default_similar_players = 10
+
+def load_all_models():
+    """Loads every trained model and scaler into the registry, so that
+    they stay resident for the lifetime of the service.
+
+    Returns:
+        List: keys of the models available for prediction
+    """
+    available = []
+    for model_key in ml_models.model_paths:
+        try:
+            ml_models.load_predictor(model_key)
+        except FileNotFoundError:
+            logger.warning(f"No saved {model_key} model, it will not be served.")
+        else:
+            available.append(model_key)
+    logger.info(f"Models resident in memory: {', '.join(available)}")
+    return available
+
+def build_feature_matrix(rows, feature_names):
+    """Builds the input matrix of a model from JSON rows of features
+
+    Args:
+        rows (List): dictionaries of feature name to value, one per player
+        feature_names (List): features the model was trained with
+
+    Raises:
+        ValueError: if a row is not an object, has missing or unknown
+        features, or a non numeric or non finite value
+
+    Returns:
+        np array: 2D matrix of input features
+    """
+    X = np.empty((len(rows), len(feature_names)), dtype=np.float64)
+    expected = set(feature_names)
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise ValueError(f"Row {i} must be an object of feature values")
+        missing = [name for name in feature_names if name not in row]
+        unknown = [name for name in row if name not in expected]
+        if missing or unknown:
+            raise ValueError(f"Row {i} has missing features {missing} "
+                             f"and unknown features {unknown}, expected "
+                             f"{feature_names}")
+        try:
+            X[i] = [float(row[name]) for name in feature_names]
+        except (TypeError, ValueError):
+            raise ValueError(f"Row {i} has a non numeric feature value")
+        # nan and inf convert with float() but the models cannot predict them
+        if not np.isfinite(X[i]).all():
+            raise ValueError(f"Row {i} has a nan or infinite feature value")
+    return X
+
+class PredictionRequestHandler(BaseHTTPRequestHandler):
+    """ Handles the /predict/{model} and /predict/{model}/batch endpoints,
+    the /similar and /similar/batch player lookups, and lists the served
+    models on GET /models.
+    """
+    def do_GET(self):
+        if self.path.rstrip('/') != '/models':
+            self.send_json(404, {"error": f"Unknown endpoint {self.path}"})
+            return
+        models = dict()
+        for model_key in ml_models.model_paths:
+            try:
+                model, _ = ml_models.load_predictor(model_key)
+            except FileNotFoundError:
+                continue
+            models[model_key] = ml_models.get_feature_names(model)
+        self.send_json(200, {"models": models, "registry": registry.stats()})
+
+    def do_POST(self):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        parts = url.path.strip('/').split('/')
+        if parts[0] == 'similar':
+            self.find_similar(parts, parse_qs(url.query), start)
+            return
+        if (len(parts) not in (2, 3) or parts[0] != 'predict'
+                or (len(parts) == 3 and parts[2] != 'batch')):
+            self.send_json(404, {"error": f"Unknown endpoint {self.path}"})
+            return
+        model_key, is_batch = parts[1], len(parts) == 3
+        if model_key not in ml_models.model_paths:
+            self.send_json(404, {"error": f"Unknown model '{model_key}'"})
+            return
+        try:
+            predictor = ml_models.load_predictor(model_key)
+        except FileNotFoundError:
+            self.send_json(503, {"error": f"Model '{model_key}' is not trained"})
+            return
+
+        try:
+            body = self.read_json()
+            if is_batch and not isinstance(body, list):
+                raise ValueError("Batch requests must be a JSON array of objects")
+            rows = body if is_batch else [body]
+            X = build_feature_matrix(rows, ml_models.get_feature_names(predictor[0]))
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+
+        try:
+            y_pred = ml_models.predict_values(predictor, X) if len(X) else np.empty(0)
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        except Exception:
+            logger.exception(f"POST {self.path} failed to predict")
+            self.send_json(500, {"error": f"Model '{model_key}' failed to predict"})
+            return
+        latency_ms = (time.perf_counter() - start) * 1000
+        result = {"model": model_key, "latency_ms": round(latency_ms, 3)}
+        if is_batch:
+            result["predictions"] = [float(value) for value in y_pred]
+        else:
+            result["prediction"] = float(y_pred[0])
+        logger.info(f"POST {self.path} predicted {len(X)} rows in {latency_ms:.2f} ms")
+        self.send_json(200, result, latency_ms)
+
+    def find_similar(self, parts, query, start):
+        """Finds the most similar players of one row, or a batch of rows,
+        of KNN features. The number of players is read from ?n=.
+
+        Args:
+            parts (List): parts of the request path
+            query (dict): parsed query string
+            start (float): perf_counter at the start of the request
+        """
+        if len(parts) > 2 or (len(parts) == 2 and parts[1] != 'batch'):
+            self.send_json(404, {"error": f"Unknown endpoint {self.path}"})
+            return
+        is_batch = len(parts) == 2
+        try:
+            feature_names = ml_models.get_knn_feature_names()
+        except FileNotFoundError:
+            self.send_json(503, {"error": "Model 'knn' is not trained"})
+            return
+
+        try:
+            n_neighbors = query.get('n', [str(default_similar_players)])[0]
+            if not n_neighbors.isdigit() or int(n_neighbors) < 1:
+                raise ValueError("n must be a positive integer")
+            n_neighbors = int(n_neighbors)
+            body = self.read_json()
+            if is_batch and not isinstance(body, list):
+                raise ValueError("Batch requests must be a JSON array of objects")
+            rows = body if is_batch else [body]
+            X = build_feature_matrix(rows, feature_names)
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+
+        results = []
+        if len(X):
+            try:
+                distances, row_ids = ml_models.find_similar_players(X, n_neighbors)
+            except ValueError as e:
+                self.send_json(400, {"error": str(e)})
+                return
+            except Exception:
+                logger.exception(f"POST {self.path} failed to search")
+                self.send_json(500, {"error": "The similar players search failed"})
+                return
+            results = [{"row_ids": ids.tolist(), "distances": dists.tolist()}
+                       for ids, dists in zip(row_ids, distances)]
+        latency_ms = (time.perf_counter() - start) * 1000
+        result = {"latency_ms": round(latency_ms, 3)}
+        if is_batch:
+            result["similar"] = results
+        else:
+            result.update(results[0])
+        logger.info(f"POST {self.path} searched {len(X)} rows in {latency_ms:.2f} ms")
+        self.send_json(200, result, latency_ms)
+
+    def read_json(self):
+        """Reads and decodes the JSON request body
+
+        Raises:
+            ValueError: if the body is missing, too large or not valid JSON
+
+        Returns:
+            object: the decoded body
+        """
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            raise ValueError("Request body is empty")
+        if length > max_body_size:
+            raise ValueError("Request body is too large")
+        try:
+            return json.loads(self.rfile.read(length))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+
+    def send_json(self, status, payload, latency_ms=None):
+        """Sends a JSON response
+
+        Args:
+            status (int): HTTP status code
+            payload (dict): response body
+            latency_ms (float, optional): request latency sent as a header
+        """
+        content = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        if latency_ms is not None:
+            self.send_header('X-Latency-Ms', f"{latency_ms:.3f}")
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} - {format % args}")
+
+def run_service(host, port):
+    """Loads all the models and serves predictions until interrupted
+
+    Args:
+        host (str): interface to bind
+        port (int): port to listen on
+    """
+    load_all_models()
+    server = ThreadingHTTPServer((host, port), PredictionRequestHandler)
+    logger.info(f"Prediction service listening on http://{host}:{port}")
+    print(f"Prediction service listening on http://{host}:{port}, press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info("Prediction service stopped.")
@@ -0,0 +1,83 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import logging
+import os
+import time
+from . import ml_models
+
+logger = logging.getLogger(__name__)
+
+trainers = {
+    "slr": ml_models.train_and_predict_simple_lr,
+    "mlr": ml_models.train_and_predict_multiple_lr,
+    "dtr": ml_models.train_and_predict_dtr,
+    "knn": ml_models.train_and_predict_knn,
+    "rf": ml_models.train_and_predict_rf,
+    "xgb": ml_models.train_and_predict_xgb,
+}
+
+default_max_workers = min(len(trainers), os.cpu_count() or 1)
+
+def get_missing_models():
+    """Gets the models which have no saved joblib file yet
+
+    Returns:
+        List: keys of the models that need to be trained
+    """
+    return [model_key for model_key in trainers
+            if not os.path.exists(ml_models.model_paths[model_key])]
+
+def run_trainer(model_key, df, training_data):
+    """Runs a single trainer and times it, used as the worker function of
+    the process pool.
+
+    Args:
+        model_key (str): key of the model to train
+        df (DataFrame): The players full dataset
+        training_data (dict): shared features and train/test split
+
+    Returns:
+        float: wall time of the trainer in seconds
+    """
+    start = time.perf_counter()
+    trainers[model_key](df, training_data)
+    return time.perf_counter() - start
+
+def train_models(df, max_workers=default_max_workers):
+    """Trains all the models missing a saved joblib file, running the
+    independent model builds in a process pool.
+
+    Args:
+        df (DataFrame): The players full dataset
+        max_workers (int, optional): number of worker processes. Defaults to
+        default_max_workers, 1 trains the models one after another in-process.
+
+    Returns:
+        dict: wall time in seconds of each model trained
+    """
+    missing_models = get_missing_models()
+    for model_key in trainers:
+        if model_key not in missing_models:
+            trainers[model_key](df)
+    if not missing_models:
+        return dict()
+
+    training_data = ml_models.prepare_training_data(df)
+    timings = dict()
+    start = time.perf_counter()
+    if max_workers == 1:
+        for model_key in missing_models:
+            timings[model_key] = run_trainer(model_key, df, training_data)
+    else:
+        logger.info(f"Training {len(missing_models)} models with "
+                    f"{max_workers} worker processes")
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(run_trainer, model_key, df, training_data): model_key
+                       for model_key in missing_models}
+            for future in as_completed(futures):
+                timings[futures[future]] = future.result()
+    total = time.perf_counter() - start
+
+    for model_key, elapsed in timings.items():
+        logger.info(f"Trained {model_key} model in {elapsed:.2f}s")
+    logger.info(f"Trained {len(timings)} models in {total:.2f}s wall time")
+    return timings
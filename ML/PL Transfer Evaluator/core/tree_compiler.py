@@ -0,0 +1,216 @@
+import json
+import logging
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor
+from xgboost import XGBRegressor
+
+logger = logging.getLogger(__name__)
+
+batch_rows = 8192
+
+class FlatTreeEnsemble:
+    """ Trees of a fitted ensemble flattened into contiguous arrays, one
+    entry per node of every tree. A leaf points to itself, so a batch of
+    rows walks all the trees at once for max_depth steps.
+    """
+    def __init__(self, feature, threshold, left, right, default_left, value,
+                 roots, strict, base_score=0.0, average=False, value_dtype=np.float64):
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp)
+        self.threshold = np.ascontiguousarray(threshold)
+        self.left = np.ascontiguousarray(left, dtype=np.intp)
+        self.right = np.ascontiguousarray(right, dtype=np.intp)
+        self.default_left = np.ascontiguousarray(default_left, dtype=bool)
+        self.value = np.ascontiguousarray(value, dtype=value_dtype)
+        self.roots = np.ascontiguousarray(roots, dtype=np.intp)
+        # xgboost goes left on x < threshold, sklearn on x <= threshold
+        self.strict = strict
+        self.base_score = value_dtype(base_score)
+        self.average = average
+        self.max_depth = get_max_depth(self.left, self.right, self.roots)
+
+    def apply(self, X):
+        """Gets the leaf every row lands in, in every tree
+
+        Args:
+            X (np array): 2D matrix of float32 input features
+
+        Returns:
+            np array: node index of shape (len(X), number of trees)
+        """
+        n_rows, n_features = X.shape
+        X_flat = X.ravel()
+        row_offsets = (np.arange(n_rows) * n_features)[:, None]
+        node = np.tile(self.roots, (n_rows, 1))
+        has_missing = np.isnan(X).any()
+        for step in range(self.max_depth):
+            x = X_flat[row_offsets + self.feature[node]]
+            threshold = self.threshold[node]
+            go_left = x < threshold if self.strict else x <= threshold
+            if has_missing:
+                go_left = np.where(np.isnan(x), self.default_left[node], go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+            # most leaves are shallower than the deepest one
+            if step % 4 == 3 and (self.left[node] == node).all():
+                break
+        return node
+
+    def predict(self, X):
+        """Predicts a batch of rows by walking all the trees at once
+
+        Args:
+            X (np array): 2D matrix of input features, one row per player
+
+        Returns:
+            np array: predicted values, one per row
+        """
+        # both libraries compare the features as float32
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        y_pred = np.empty(len(X), dtype=self.value.dtype)
+        for start in range(0, len(X), batch_rows):
+            values = self.value[self.apply(X[start:start + batch_rows])]
+            # trees are added one after another, as the libraries do
+            if self.average:
+                total = np.cumsum(values, axis=1)[:, -1] / len(self.roots)
+            else:
+                values = np.hstack([np.full((len(values), 1), self.base_score), values])
+                total = np.cumsum(values, axis=1, dtype=self.value.dtype)[:, -1]
+            y_pred[start:start + len(values)] = total
+        return y_pred
+
+def get_max_depth(left, right, roots):
+    """Gets the depth of the deepest leaf of all the trees
+
+    Args:
+        left (np array): left child of every node, leaves point to themselves
+        right (np array): right child of every node
+        roots (np array): root node of every tree
+
+    Returns:
+        int: number of steps from the roots to the deepest leaf
+    """
+    depth, frontier = 0, roots
+    while True:
+        frontier = frontier[left[frontier] != frontier]
+        if not len(frontier):
+            return depth
+        frontier = np.concatenate([left[frontier], right[frontier]])
+        depth += 1
+
+def flatten_trees(trees):
+    """Concatenates the node arrays of several trees, offsetting the child
+    indices of every tree by the nodes before it
+
+    Args:
+        trees (List): dicts of feature, threshold, left, right, default_left
+        and value arrays, with -1 as the children of a leaf
+
+    Returns:
+        dict: the concatenated arrays and the root node of every tree
+    """
+    arrays = {key: [] for key in trees[0]}
+    roots, offset = [], 0
+    for tree in trees:
+        n_nodes = len(tree["left"])
+        is_leaf = tree["left"] == -1
+        own_index = np.arange(offset, offset + n_nodes)
+        for side in ("left", "right"):
+            arrays[side].append(np.where(is_leaf, own_index, tree[side] + offset))
+        arrays["feature"].append(np.where(is_leaf, 0, tree["feature"]))
+        for key in ("threshold", "default_left", "value"):
+            arrays[key].append(tree[key])
+        roots.append(offset)
+        offset += n_nodes
+    flat = {key: np.concatenate(values) for key, values in arrays.items()}
+    flat["roots"] = np.array(roots)
+    return flat
+
+def compile_sklearn_trees(estimators):
+    """Flattens fitted sklearn regression trees
+
+    Args:
+        estimators (List): fitted DecisionTreeRegressor models
+
+    Returns:
+        dict: the concatenated node arrays of the trees
+    """
+    trees = []
+    for estimator in estimators:
+        tree = estimator.tree_
+        if tree.n_outputs != 1:
+            raise ValueError("Only single output trees can be compiled")
+        trees.append({
+            "feature": tree.feature,
+            "threshold": tree.threshold,
+            "left": tree.children_left,
+            "right": tree.children_right,
+            "default_left": getattr(tree, 'missing_go_to_left',
+                                    np.zeros(tree.node_count, dtype=np.uint8)),
+            "value": tree.value[:, 0, 0],
+        })
+    return flatten_trees(trees)
+
+def compile_xgb_trees(xgb_model):
+    """Flattens the trees of a fitted XGBoost regressor from its JSON model
+
+    Args:
+        xgb_model (XGBRegressor): fitted model
+
+    Raises:
+        ValueError: if the model is not a gbtree regression with an identity
+        link, or has categorical splits
+
+    Returns:
+        tuple: the concatenated node arrays and the base score
+    """
+    learner = json.loads(xgb_model.get_booster().save_raw(raw_format='json'))['learner']
+    if (learner['gradient_booster']['name'] != 'gbtree'
+            or learner['objective']['name'] != 'reg:squarederror'):
+        raise ValueError("Only gbtree models with the reg:squarederror objective "
+                         "can be compiled")
+    trees = []
+    for tree in learner['gradient_booster']['model']['trees']:
+        if any(tree['split_type']):
+            raise ValueError("Trees with categorical splits can not be compiled")
+        left = np.array(tree['left_children'])
+        split_conditions = np.array(tree['split_conditions'], dtype=np.float32)
+        # a leaf keeps its value in split_conditions
+        trees.append({
+            "feature": np.array(tree['split_indices']),
+            "threshold": split_conditions,
+            "left": left,
+            "right": np.array(tree['right_children']),
+            "default_left": np.array(tree['default_left'], dtype=bool),
+            "value": np.where(left == -1, split_conditions, 0).astype(np.float32),
+        })
+    base_score = float(learner['learner_model_param']['base_score'].strip('[]'))
+    return flatten_trees(trees), base_score
+
+def compile_model(model):
+    """Compiles a fitted random forest, decision tree or XGBoost regressor
+    into a FlatTreeEnsemble with the same predictions
+
+    Args:
+        model (estimator): fitted model
+
+    Raises:
+        ValueError: if the model can not be compiled
+
+    Returns:
+        FlatTreeEnsemble: the compiled model, with the model's feature_names_
+    """
+    if isinstance(model, XGBRegressor):
+        flat, base_score = compile_xgb_trees(model)
+        compiled = FlatTreeEnsemble(**flat, strict=True, base_score=base_score,
+                                    value_dtype=np.float32)
+    elif isinstance(model, (RandomForestRegressor, DecisionTreeRegressor)):
+        estimators = getattr(model, 'estimators_', [model])
+        compiled = FlatTreeEnsemble(**compile_sklearn_trees(estimators),
+                                    strict=False, average=True)
+    else:
+        raise ValueError(f"Models of type {type(model).__name__} can not be compiled")
+    if hasattr(model, 'feature_names_'):
+        compiled.feature_names_ = model.feature_names_
+    logger.info(f"Compiled {len(compiled.roots)} trees with {len(compiled.left)} nodes, "
+                f"max depth {compiled.max_depth}")
+    return compiled
@@ -0,0 +1,46 @@
+import argparse
+import logging
+
+from core import player_search
+import logging_config
+
+logging_config.setup_logging()
+logger = logging.getLogger(__name__)
+
+def parse_args():
+    """Parses the command line arguments of the player search
+
+    Returns:
+        Namespace: parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Finds the players most similar to a player of the dataset.")
+    parser.add_argument("name", help="short name of the player, e.g. 'H. Kane'")
+    parser.add_argument("-n", type=int, default=player_search.default_n_players,
+                        help="players to list")
+    parser.add_argument("--min-value", type=float, help="lowest value_eur")
+    parser.add_argument("--max-value", type=float, help="highest value_eur")
+    parser.add_argument("--min-age", type=int, help="youngest age")
+    parser.add_argument("--max-age", type=int, help="oldest age")
+    parser.add_argument("--positions", nargs="+", help="club_position codes, e.g. ST LW RW")
+    return parser.parse_args()
+
+def main():
+    """Starting point of the player search
+    """
+    args = parse_args()
+    index = player_search.build_search_index()
+    try:
+        players = index.search_like(args.name, args.n, min_value=args.min_value,
+                                    max_value=args.max_value, min_age=args.min_age,
+                                    max_age=args.max_age, positions=args.positions)
+    except KeyError as e:
+        print(e.args[0])
+        return
+    print(f"{'Player':<24} {'Position':<9} {'Age':>4} {'Value':>14} {'Distance':>9}")
+    for player in players:
+        print(f"{player['short_name']:<24} {player['club_position']:<9} {player['age']:>4} "
+              f"{player['value_eur']:>14,.0f} {player['distance']:>9.3f}")
+
+if __name__ == '__main__':
+    main()
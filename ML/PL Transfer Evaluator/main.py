@@ -1,7 +1,9 @@
+import argparse
 import time
 import logging
 
 from core import app_utils, app_core
+from core.prediction_cache import prediction_cache
 import logging_config
 
 logging_config.setup_logging()
@@ -15,10 +17,24 @@ def show_menu():
     print("3. Predict player's transfer value")
     print("4. Exit")
     
+def parse_args():
+    """Parses the command line arguments of the application
+
+    Returns:
+        Namespace: parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="PL Transfer Evaluator")
+    parser.add_argument("--persist-predictions", action="store_true",
+                        help="keep the cached player predictions on disk across restarts")
+    return parser.parse_args()
+
 def main():
     """Starting point of the PL Transfer Evaluator application
     """
+    args = parse_args()
     logger.info("Starting the PL Transfer Evaluator application.")
+    if args.persist_predictions:
+        prediction_cache.enable_disk()
     app_core.init_all_ml_models()
     while True:
         app_utils.clear_and_print_header("PL Transfer Evaluator")
@@ -0,0 +1,68 @@
+import argparse
+import json
+import logging
+
+from core import data_loader, model_profiler
+import logging_config
+
+logging_config.setup_logging()
+logger = logging.getLogger(__name__)
+
+def parse_args():
+    """Parses the command line arguments of the model profiler
+
+    Returns:
+        Namespace: parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Profiles the size, load time, memory and latency of the saved models.")
+    parser.add_argument("--mmap", action="store_true",
+                        help="load the models with memory-mapped arrays")
+    parser.add_argument("--compare-compressed", action="store_true",
+                        help="also profile a compressed copy of every model")
+    parser.add_argument("--rewrite", choices=["compressed", "uncompressed"],
+                        help="save every model again, compressed for disk space or "
+                             "uncompressed so that it can be memory-mapped")
+    parser.add_argument("-o", "--output", help="json file to save the profiles to")
+    return parser.parse_args()
+
+def format_value(value, fmt):
+    """Formats a profile value, or a dash when it was not measured
+    """
+    return "-" if value is None else format(value, fmt)
+
+def print_profiles(profiles):
+    """Prints the profiles as a table
+    """
+    print(f"{'File':<42} {'Size KiB':>9} {'Load ms':>8} {'RSS KiB':>10} "
+          f"{'Single ms':>10} {'Batch ms/row':>12} {'Zip KiB':>8} {'Zip load ms':>11}")
+    for p in profiles:
+        zip_size = p.get('compressed_size_bytes')
+        print(f"{p['file']:<42} {p['size_bytes'] / 1024:9.1f} {p['load_ms']:8.2f} "
+              f"{format_value(p['memory_bytes'] and p['memory_bytes'] / 1024, '10.1f'):>10} "
+              f"{format_value(p['predict_single_ms'], '10.3f'):>10} "
+              f"{format_value(p['predict_batch_row_ms'], '12.4f'):>12} "
+              f"{format_value(zip_size and zip_size / 1024, '8.1f'):>8} "
+              f"{format_value(p.get('compressed_load_ms'), '11.2f'):>11}")
+
+def main():
+    """Starting point of the model profiler
+    """
+    args = parse_args()
+    if args.rewrite:
+        compress = model_profiler.default_compress if args.rewrite == "compressed" else 0
+        for file, (before, after) in model_profiler.rewrite_models(compress).items():
+            print(f"{file:<42} {before / 1024:9.1f} KiB -> {after / 1024:9.1f} KiB")
+        return
+
+    df = data_loader.load_dataset()
+    profiles = model_profiler.profile_models(df, 'r' if args.mmap else None,
+                                             args.compare_compressed)
+    print_profiles(profiles)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(profiles, f, indent=4)
+        print(f"Profiles saved to {args.output}")
+
+if __name__ == '__main__':
+    main()
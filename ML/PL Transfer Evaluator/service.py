@@ -0,0 +1,36 @@
+import argparse
+import logging
+
+from core import prediction_service
+from core.model_registry import registry
+import logging_config
+
+logging_config.setup_logging()
+logger = logging.getLogger(__name__)
+
+def parse_args():
+    """Parses the command line arguments of the prediction service
+
+    Returns:
+        Namespace: parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Serves the trained PL Transfer Evaluator models over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to bind")
+    parser.add_argument("--port", type=int, default=8000, help="port to listen on")
+    parser.add_argument("--mmap", action="store_true",
+                        help="memory-map the model arrays, so that several service "
+                             "processes share one copy of them")
+    return parser.parse_args()
+
+def main():
+    """Starting point of the prediction service
+    """
+    args = parse_args()
+    logger.info("Starting the PL Transfer Evaluator prediction service.")
+    if args.mmap:
+        registry.mmap_mode = 'r'
+    prediction_service.run_service(args.host, args.port)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+
+from core import chunked_training
+
+def make_rows(n_rows=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.integers(40, 95, size=(n_rows, 3)).astype(np.float64)
+    # a large offset, as value_eur has, where naive sums of squares lose precision
+    y = 1e8 + 1e5 * X[:, 0] + 5e4 * X[:, 1] + rng.normal(0, 1e5, n_rows)
+    return np.column_stack([X, y])
+
+def accumulate(rows, chunk_size=128):
+    moments = chunked_training.CoMomentAccumulator(rows.shape[1])
+    for start in range(0, len(rows), chunk_size):
+        moments.update(rows[start:start + chunk_size])
+    return moments
+
+def test_comoments_match_numpy():
+    rows = make_rows()
+    moments = accumulate(rows)
+    assert moments.n == len(rows)
+    assert np.allclose(moments.mean, rows.mean(axis=0))
+    assert np.allclose(moments.covariance(ddof=1), np.cov(rows, rowvar=False))
+    assert np.allclose(moments.correlation(), np.corrcoef(rows, rowvar=False))
+
+def test_linear_regression_matches_full_fit():
+    rows = make_rows()
+    moments = accumulate(rows)
+    X, y = rows[:, :3], rows[:, 3]
+    model = chunked_training.solve_linear_regression(moments, [0, 1, 2], 3)
+    expected = LinearRegression().fit(X, y)
+    assert np.allclose(model.predict(X), expected.predict(X))
+
+def test_scaled_linear_regression_on_training_rows():
+    rows = make_rows()
+    X, y = rows[:, :3], rows[:, 3]
+    # the scaler is fitted on all the rows, the model on the training rows
+    scaler = chunked_training.get_scaler(accumulate(rows), [0, 1, 2])
+    expected_scaler = StandardScaler().fit(X)
+    assert np.allclose(scaler.transform(X), expected_scaler.transform(X))
+    model = chunked_training.solve_linear_regression(accumulate(rows[:800]), [0, 1, 2],
+                                                     3, scaler)
+    X_std = expected_scaler.transform(X[:800])
+    expected = LinearRegression().fit(X_std, y[:800])
+    assert np.allclose(model.coef_, expected.coef_)
+    assert np.isclose(model.intercept_, expected.intercept_)
+    X1 = np.hstack([np.ones((800, 1)), X_std])
+    assert np.allclose(model.sufficient_stats_["xtx"], X1.T @ X1)
+    assert np.allclose(model.sufficient_stats_["xty"], X1.T @ y[:800])
+
+def test_reservoir_keeps_smallest_keys():
+    rows = make_rows(n_rows=500)
+    reservoir = chunked_training.BottomKReservoir(50, rows.shape[1],
+                                                  np.random.default_rng(0))
+    for start in range(0, len(rows), 64):
+        reservoir.update(rows[start:start + 64], np.arange(start, min(start + 64, 500)))
+    keys = np.random.default_rng(0).random(500)
+    assert reservoir.seen == 500
+    assert sorted(reservoir.row_ids) == sorted(np.argsort(keys)[:50])
+    assert np.array_equal(reservoir.rows, rows[reservoir.row_ids])
@@ -0,0 +1,24 @@
+from core import incremental_update
+
+def test_interrupted_commit_is_finished_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(incremental_update, "data_deltas_path", f"{tmp_path}/")
+    monkeypatch.setattr(incremental_update, "applied_log_path", f"{tmp_path}/applied_deltas.json")
+    files = [tmp_path / "model_a.joblib", tmp_path / "model_b.joblib"]
+    for path in files:
+        path.write_text("old")
+        (tmp_path / f"{path.name}.tmp").write_text("new")
+    record = {"fingerprint": "abc", "file": "delta.csv", "rows": 3,
+              "applied_at": "2026-10-18T00:00:00", "retrain": []}
+    log = {"applied": [], "pending": {"record": record, "replacements": [
+        (f"{path}.tmp", str(path)) for path in files]}}
+    incremental_update.save_applied_log(log)
+    # the refresh stopped after replacing the first file
+    (tmp_path / "model_a.joblib.tmp").replace(files[0])
+
+    log = incremental_update.load_applied_log()
+    incremental_update.commit_pending(log)
+    assert [path.read_text() for path in files] == ["new", "new"]
+    log = incremental_update.load_applied_log()
+    assert log["pending"] is None
+    assert incremental_update.get_applied_record(log, "abc")["rows"] == 3
+    assert incremental_update.get_applied_record(log, "def") is None
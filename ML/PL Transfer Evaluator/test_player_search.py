@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from core import player_search
+
+def make_index(n_rows=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"overall": rng.integers(50, 95, n_rows),
+                       "passing": rng.integers(30, 95, n_rows),
+                       "age": rng.integers(16, 38, n_rows),
+                       "value_eur": rng.integers(1, 200, n_rows) * 500000})
+    labels = pd.DataFrame({"short_name": [f"Player {i}" for i in range(n_rows)],
+                           "club_position": rng.choice(["ST", "LW", "CB", "GK", "SUB"], n_rows)})
+    feature_names = ["overall", "passing"]
+    scaler = StandardScaler().fit(df[feature_names].to_numpy(dtype=np.float64))
+    return player_search.PlayerSearchIndex(df, labels, feature_names, scaler)
+
+def full_scan(index, x, n, exclude, min_value=None, max_value=None, min_age=None,
+              max_age=None, positions=None):
+    mask = np.ones(len(index.X), dtype=bool)
+    if min_value is not None:
+        mask &= index.values >= min_value
+    if max_value is not None:
+        mask &= index.values <= max_value
+    if min_age is not None:
+        mask &= index.ages >= min_age
+    if max_age is not None:
+        mask &= index.ages <= max_age
+    if positions:
+        mask &= np.isin(index.positions, positions)
+    mask[exclude] = False
+    rows = np.flatnonzero(mask)
+    distances = ((index.X[rows] - x) ** 2).sum(axis=1)
+    return sorted(distances[np.argsort(distances, kind='stable')[:n]])
+
+def test_filtered_search_matches_full_scan():
+    index = make_index()
+    filter_sets = [{},
+                   {"max_value": 20e6},
+                   {"min_value": 5e6, "max_value": 30e6, "max_age": 23},
+                   {"min_age": 30, "positions": ["st", "LW"]},
+                   {"max_value": 10e6, "max_age": 20, "positions": ["GK"]},
+                   {"positions": ["CF"]}]
+    for filters in filter_sets:
+        for row in (0, 17, 1999):
+            players = index.search(index.X[row], 10, exclude=row, **filters)
+            codes = [code.upper() for code in filters.get("positions", [])]
+            expected = full_scan(index, index.X[row], 10, row, **{**filters, "positions": codes})
+            assert np.allclose([player["distance"] ** 2 for player in players], expected)
+            for player in players:
+                assert player["row_id"] != row
+                assert (filters.get("min_value", 0) <= player["value_eur"]
+                        <= filters.get("max_value", np.inf))
+                assert filters.get("min_age", 0) <= player["age"] <= filters.get("max_age", 99)
+
+def test_search_like_by_name():
+    index = make_index()
+    players = index.search_like("player 5", n=3, positions=["CB"])
+    assert len(players) == 3
+    assert all(player["club_position"] == "CB" for player in players)
+    assert all(player["short_name"] != "Player 5" for player in players)
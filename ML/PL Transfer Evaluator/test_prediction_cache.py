@@ -0,0 +1,41 @@
+from core.prediction_cache import PredictionCache
+
+def test_lru_eviction():
+    cache = PredictionCache(max_entries=2)
+    cache.put("rf", 1, (80.0,), 1e6)
+    cache.put("rf", 1, (81.0,), 2e6)
+    assert cache.get("rf", 1, (80.0,)) == 1e6
+    cache.put("rf", 1, (82.0,), 3e6)
+    # (81.0,) was the least recently used
+    assert cache.get("rf", 1, (81.0,)) is None
+    assert cache.get("rf", 1, (80.0,)) == 1e6
+    assert cache.stats() == {"hits": 2, "disk_hits": 0, "misses": 1,
+                             "evictions": 1, "resident": 2}
+
+def test_new_model_version_misses():
+    cache = PredictionCache()
+    cache.put("xgb", 1, (80.0, 3.0), 1e6)
+    assert cache.get("xgb", 2, (80.0, 3.0)) is None
+    assert cache.get("knn", 1, (80.0, 3.0)) is None
+
+def test_disk_tier_survives_restart(tmp_path):
+    db_path = tmp_path / "prediction_cache.sqlite"
+    cache = PredictionCache(disk_path=db_path)
+    cache.put("mlr", 1, (80.0, 70.0), 1e6)
+    restarted = PredictionCache(disk_path=db_path)
+    assert restarted.get("mlr", 1, (80.0, 70.0)) == 1e6
+    assert restarted.stats()["disk_hits"] == 1
+    # the model file changed, its persisted rows are dropped
+    assert restarted.get("mlr", 2, (80.0, 70.0)) is None
+    assert PredictionCache(disk_path=db_path).get("mlr", 1, (80.0, 70.0)) is None
+
+def test_disk_tier_shared_across_versions(tmp_path):
+    db_path = tmp_path / "prediction_cache.sqlite"
+    old, new = PredictionCache(disk_path=db_path), PredictionCache(disk_path=db_path)
+    old.put("knn", 1, (80.0,), 1e6)
+    new.put("knn", 2, (80.0,), 2e6)
+    # a process still on the old model keeps its rows and never reads the new ones
+    old.put("knn", 1, (81.0,), 3e6)
+    assert PredictionCache(disk_path=db_path).get("knn", 1, (81.0,)) == 3e6
+    assert PredictionCache(disk_path=db_path).get("knn", 2, (80.0,)) == 2e6
+    assert PredictionCache(disk_path=db_path).get("knn", 2, (81.0,)) is None
@@ -0,0 +1,49 @@
+from http.server import ThreadingHTTPServer
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from core import ml_models, prediction_service
+
+feature_names = ["overall", "potential"]
+
+@pytest.fixture
+def service(monkeypatch):
+    model = LinearRegression().fit(np.array([[60.0, 70.0], [80.0, 85.0], [70.0, 90.0]]),
+                                   np.array([1e6, 5e6, 3e6]))
+    model.feature_names_ = feature_names
+    monkeypatch.setattr(ml_models, "load_predictor", lambda model_key: (model, None))
+    monkeypatch.setattr(ml_models, "get_knn_feature_names", lambda: feature_names)
+    server = ThreadingHTTPServer(("127.0.0.1", 0),
+                                 prediction_service.PredictionRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def post(url, body):
+    request = urllib.request.Request(url, data=body.encode("utf-8"), method="POST")
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+@pytest.mark.parametrize("path", ["/predict/mlr", "/similar"])
+@pytest.mark.parametrize("body", ['{"overall": "nan", "potential": 80}',
+                                  '{"overall": NaN, "potential": 80}',
+                                  '{"overall": 70, "potential": "inf"}'])
+def test_non_finite_features_are_rejected(service, path, body):
+    status, payload = post(service + path, body)
+    assert status == 400
+    assert "nan or infinite" in payload["error"]
+
+def test_finite_features_are_predicted(service):
+    status, payload = post(service + "/predict/mlr", '{"overall": 70, "potential": 80}')
+    assert status == 200
+    assert np.isfinite(payload["prediction"])
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.neighbors import KNeighborsRegressor
+from sklearn.tree import DecisionTreeRegressor
+from xgboost import XGBRegressor
+
+from core import tree_compiler
+
+def make_data(n_rows=400, seed=0):
+    # integer ratings like the players dataset, so many rows sit on thresholds
+    rng = np.random.default_rng(seed)
+    X = rng.integers(40, 95, size=(n_rows, 6)).astype(np.float64)
+    y = 1e5 * np.exp(X[:, 0] / 12) + 5e4 * X[:, 1] + rng.normal(0, 1e5, n_rows)
+    return X, y
+
+def test_random_forest_parity():
+    X, y = make_data()
+    model = RandomForestRegressor(n_estimators=30, random_state=42).fit(X, y)
+    compiled = tree_compiler.compile_model(model)
+    X_test, _ = make_data(seed=1)
+    assert np.array_equal(compiled.predict(X_test), model.predict(X_test))
+    assert np.array_equal(compiled.predict(X_test[:1]), model.predict(X_test[:1]))
+
+def test_decision_tree_parity():
+    X, y = make_data()
+    model = DecisionTreeRegressor(max_depth=8, random_state=42).fit(X, y)
+    X_test, _ = make_data(seed=1)
+    assert np.array_equal(tree_compiler.compile_model(model).predict(X_test),
+                          model.predict(X_test))
+
+def test_xgboost_parity():
+    X, y = make_data()
+    model = XGBRegressor(n_estimators=50, random_state=42).fit(X, y)
+    compiled = tree_compiler.compile_model(model)
+    X_test, _ = make_data(seed=1)
+    assert np.array_equal(compiled.predict(X_test), model.predict(X_test))
+    X_test[::5, 2] = np.nan
+    assert np.array_equal(compiled.predict(X_test), model.predict(X_test))
+
+def test_xgboost_continued_boosting_parity():
+    X, y = make_data()
+    model = XGBRegressor(n_estimators=20, random_state=42).fit(X, y)
+    X_delta, y_delta = make_data(n_rows=50, seed=2)
+    model.set_params(n_estimators=5)
+    model.fit(X_delta, y_delta, xgb_model=model.get_booster())
+    X_test, _ = make_data(seed=1)
+    assert np.array_equal(tree_compiler.compile_model(model).predict(X_test),
+                          model.predict(X_test))
+
+def test_compile_keeps_feature_names():
+    X, y = make_data()
+    model = DecisionTreeRegressor(max_depth=3).fit(X, y)
+    model.feature_names_ = ['overall', 'passing']
+    assert tree_compiler.compile_model(model).feature_names_ == ['overall', 'passing']
+
+def test_compile_unsupported_model():
+    X, y = make_data()
+    with pytest.raises(ValueError):
+        tree_compiler.compile_model(KNeighborsRegressor().fit(X, y))
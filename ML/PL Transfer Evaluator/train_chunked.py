@@ -0,0 +1,42 @@
+import argparse
+import logging
+
+from core import chunked_training
+import logging_config
+
+logging_config.setup_logging()
+logger = logging.getLogger(__name__)
+
+def parse_args():
+    """Parses the command line arguments of the chunked training
+
+    Returns:
+        Namespace: parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Trains every model on players csv files streamed in chunks, "
+                    "for datasets too large to load at once.")
+    parser.add_argument("--pattern", default=chunked_training.players_pattern,
+                        help="glob of the players csv files, one per season")
+    parser.add_argument("--chunk-size", type=int, default=chunked_training.default_chunk_size,
+                        help="rows read at a time")
+    parser.add_argument("--sample-size", type=int, default=chunked_training.default_sample_size,
+                        help="training rows sampled for the tree models and KNN")
+    parser.add_argument("--test-sample-size", type=int,
+                        default=chunked_training.default_test_sample_size,
+                        help="test rows sampled for the metrics")
+    return parser.parse_args()
+
+def main():
+    """Starting point of the chunked training
+    """
+    args = parse_args()
+    logger.info(f"Starting chunked training on {args.pattern}")
+    timings = chunked_training.train_chunked(args.pattern, args.chunk_size,
+                                             args.sample_size, args.test_sample_size)
+    print(f"{'Step':<8} {'Seconds':>8}")
+    for step, seconds in timings.items():
+        print(f"{step:<8} {seconds:8.2f}")
+
+if __name__ == '__main__':
+    main()
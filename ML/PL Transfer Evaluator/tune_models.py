@@ -0,0 +1,75 @@
+import argparse
+import logging
+import os
+import time
+
+from core import data_loader, hyperparam_search, ml_models, training_scheduler
+import logging_config
+
+logging_config.setup_logging()
+logger = logging.getLogger(__name__)
+
+scaled_models = ["knn"]
+single_threaded_models = ["rf", "xgb"]
+
+def parse_args():
+    """Parses the command line arguments of the hyperparameter search
+
+    Returns:
+        Namespace: parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Searches the hyperparameters of the PL Transfer Evaluator models.")
+    parser.add_argument("-m", "--models", nargs="+", default=list(hyperparam_search.search_spaces),
+                        choices=list(hyperparam_search.search_spaces),
+                        help="models to search, defaults to all")
+    parser.add_argument("--time-budget", type=float,
+                        help="total seconds for the whole search, shared between the models")
+    parser.add_argument("--folds", type=int, default=5, help="cross-validation folds")
+    parser.add_argument("--n-candidates", type=int,
+                        help="random configurations per model instead of the full grid")
+    parser.add_argument("--factor", type=int, default=3, help="successive halving factor")
+    parser.add_argument("--retrain", action="store_true",
+                        help="retrain and save the searched models with their best configuration")
+    return parser.parse_args()
+
+def main():
+    """Starting point of the hyperparameter search
+    """
+    args = parse_args()
+    logger.info(f"Starting hyperparameter search for {', '.join(args.models)}")
+    df = data_loader.load_dataset()
+    training_data = ml_models.prepare_training_data(df)
+
+    start = time.perf_counter()
+    for i, model_key in enumerate(args.models):
+        time_budget = None
+        if args.time_budget is not None:
+            remaining = args.time_budget - (time.perf_counter() - start)
+            time_budget = max(0, remaining / (len(args.models) - i))
+        # only the training split is searched, the test split stays held out
+        X_train, _, y_train, _ = ml_models.get_training_split(
+            training_data, standardized=model_key in scaled_models)
+        params = dict(ml_models.default_params[model_key])
+        if model_key in single_threaded_models:
+            params["n_jobs"] = 1
+        estimator = ml_models.estimator_classes[model_key](**params)
+
+        print(f"Searching {model_key}...")
+        result = hyperparam_search.successive_halving_search(
+            estimator, hyperparam_search.search_spaces[model_key], X_train, y_train,
+            n_splits=args.folds, factor=args.factor, n_candidates=args.n_candidates,
+            time_budget=time_budget)
+        hyperparam_search.save_search_result(model_key, result, df.attrs.get('fingerprint'))
+        print(f"{model_key}: best CV R2 {result['cv_score_mean']:.4f} "
+              f"(+/- {result['cv_score_std']:.4f}) with {result['best_params']} "
+              f"in {result['seconds']:.1f}s")
+
+        if args.retrain:
+            if os.path.exists(ml_models.model_paths[model_key]):
+                os.remove(ml_models.model_paths[model_key])
+            training_scheduler.trainers[model_key](df, training_data)
+            print(f"{model_key}: retrained and saved with the best configuration")
+
+if __name__ == '__main__':
+    main()
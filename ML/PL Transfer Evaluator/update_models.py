@@ -0,0 +1,40 @@
+import argparse
+import logging
+
+from core import incremental_update
+import logging_config
+
+logging_config.setup_logging()
+logger = logging.getLogger(__name__)
+
+def parse_args():
+    """Parses the command line arguments of the incremental update
+
+    Returns:
+        Namespace: parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Refreshes the saved models with a delta csv of new or changed players.")
+    parser.add_argument("delta", help="csv of the new or changed players, "
+                                      "in the players_22.csv format")
+    parser.add_argument("--drift-threshold", type=float,
+                        default=incremental_update.drift_threshold,
+                        help="population stability index above which the decision "
+                             "tree and random forest are retrained")
+    return parser.parse_args()
+
+def main():
+    """Starting point of the incremental update
+    """
+    args = parse_args()
+    logger.info(f"Starting incremental update with {args.delta}")
+    summary = incremental_update.refresh_models(args.delta, args.drift_threshold)
+    print(f"{'Model':<6} {'Action':<10} {'Seconds':>8}  Drift")
+    for model_key, result in summary.items():
+        drift = ""
+        if "drift" in result:
+            drift = f"{result['drift']:.3f} ({result['drift_column']})"
+        print(f"{model_key:<6} {result['action']:<10} {result['seconds']:8.3f}  {drift}")
+
+if __name__ == '__main__':
+    main()